@@ -0,0 +1,70 @@
+"""
+So sánh chấm bài 100 câu bằng 100 lời gọi /check-answer với một lời gọi /check-exam.
+
+    python benchmarks/bench_batch_grading.py --questions 100 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import free_port, run_backend, summarize
+from fake_llm_server import start_server
+
+
+async def run(base_url: str, num_questions: int, rounds: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        # Sinh theo lô nhỏ để phản hồi của LLM không vượt quá max_tokens
+        answers = []
+        while len(answers) < num_questions:
+            response = await client.post("/generate-exam", json={"num_questions": min(25, num_questions - len(answers))})
+            response.raise_for_status()
+            answers.extend({"question_id": q["id"], "answer": q["answer"]} for q in response.json())
+
+        sequential, concurrent, batch = [], [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for answer in answers:
+                (await client.post("/check-answer", json=answer)).raise_for_status()
+            sequential.append(time.perf_counter() - start)
+
+            # Cách frontend hiện tại: Promise.all trên tất cả câu hỏi
+            start = time.perf_counter()
+            results = await asyncio.gather(*(client.post("/check-answer", json=answer) for answer in answers))
+            concurrent.append(time.perf_counter() - start)
+            assert all(r.status_code == 200 for r in results)
+
+            start = time.perf_counter()
+            response = await client.post("/check-exam", json={"answers": answers})
+            response.raise_for_status()
+            batch.append(time.perf_counter() - start)
+            assert response.json()["correct_answers"] == len(answers)
+
+    return {
+        "questions": len(answers),
+        "single_sequential": summarize(sequential),
+        "single_concurrent": summarize(concurrent),
+        "batch": summarize(batch),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=0.05)
+    try:
+        with run_backend(llm_port, env={"QUESTION_POOL_ENABLED": "0"}) as base_url:
+            report = await run(base_url, args.questions, args.rounds)
+    finally:
+        await runner.cleanup()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
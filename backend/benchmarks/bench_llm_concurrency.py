@@ -0,0 +1,81 @@
+"""
+Kiểm tra /check-answer không bị chặn khi có nhiều lời gọi LLM đang chạy.
+
+Khởi động máy chủ LLM giả lập (độ trễ cố định), gửi 50 yêu cầu /get-explanation
+đồng thời và đo độ trễ /check-answer trong lúc đó so với khi hệ thống rảnh.
+
+    python benchmarks/bench_llm_concurrency.py --latency 1.0 --explanations 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import free_port, run_backend, summarize
+from fake_llm_server import start_server
+
+
+async def measure_check_answer(client: httpx.AsyncClient, question, samples: int, interval: float = 0.02):
+    latencies = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        response = await client.post("/check-answer", json={"question_id": question["id"], "answer": question["answer"]})
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(base_url: str, explanations: int, samples: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        response = await client.get("/get-question")
+        response.raise_for_status()
+        question = response.json()
+
+        idle = await measure_check_answer(client, question, samples)
+
+        # Mỗi yêu cầu giải thích một câu hỏi khác nhau để không trúng bộ đệm lời giải thích
+        response = await client.post("/generate-exam", json={"num_questions": explanations})
+        response.raise_for_status()
+        payloads = [{"question_id": q["id"], "answer": q["answer"]} for q in response.json()]
+        start = time.perf_counter()
+        explanation_tasks = [asyncio.create_task(client.post("/get-explanation", json=payload)) for payload in payloads]
+        await asyncio.sleep(0.05)
+        busy = await measure_check_answer(client, question, samples)
+        results = await asyncio.gather(*explanation_tasks)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "check_answer_idle": summarize(idle),
+        "check_answer_busy": summarize(busy),
+        "explanations_ok": sum(1 for r in results if r.status_code == 200),
+        "explanations_elapsed_s": round(elapsed, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=1.0, help="Độ trễ LLM giả lập (giây)")
+    parser.add_argument("--explanations", type=int, default=50, help="Số yêu cầu /get-explanation đồng thời")
+    parser.add_argument("--samples", type=int, default=30, help="Số mẫu /check-answer mỗi pha")
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=args.latency)
+    try:
+        with run_backend(llm_port) as base_url:
+            report = await run(base_url, args.explanations, args.samples)
+    finally:
+        await runner.cleanup()
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    # /check-answer phải giữ độ trễ thấp, không bị kéo dài theo độ trễ của LLM
+    busy_p99 = report["check_answer_busy"]["p99_ms"]
+    if busy_p99 > args.latency * 1000 / 2:
+        raise SystemExit(f"/check-answer bị chặn: p99={busy_p99}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Benchmark bộ phân tích đề thi cục bộ trên một tập PDF mẫu nhiều bố cục.
+
+Đo số trang/giây của bộ phân tích (trên văn bản đã trích xuất), tỉ lệ chunk
+phải chuyển (một phần) cho LLM và tỉ lệ câu hỏi không phân tích cục bộ được.
+
+    python benchmarks/bench_local_pdf_parser.py --pages 200
+"""
+import argparse
+import json
+import time
+
+import common  # noqa: F401  (thêm thư mục backend vào sys.path)
+from local_pdf_parser import extract_answer_key, parse_questions
+from pdf_fixtures import STYLES, build_exam_pdf
+from pdf_parser import extract_page_texts
+from pdf_pipeline import PDF_CHUNK_CHARS, split_chunk
+
+
+def chunk_pages(pages, max_chars: int):
+    """Phiên bản đồng bộ của pdf_pipeline.iter_chunks"""
+    buffer = ""
+    for text in pages:
+        buffer += text + "\n"
+        while len(buffer) > max_chars:
+            chunk, buffer = split_chunk(buffer, max_chars)
+            yield chunk
+    if buffer.strip():
+        yield buffer
+
+
+def run_corpus(name: str, pages, questions_expected: int, repeat: int):
+    chunks = list(chunk_pages(pages, PDF_CHUNK_CHARS))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parsed = 0
+        fallbacks = 0
+        answer_key = extract_answer_key("".join(chunks))
+        for chunk in chunks:
+            questions, rest = parse_questions(chunk, answer_key)
+            parsed += len(questions)
+            fallbacks += bool(rest)
+    elapsed = (time.perf_counter() - start) / repeat
+    return {
+        "corpus": name,
+        "pages": len(pages),
+        "pages_per_s": round(len(pages) / elapsed),
+        "questions_local": parsed,
+        "questions_expected": questions_expected,
+        "chunks": len(chunks),
+        "chunk_fallback_rate": round(fallbacks / len(chunks), 3),
+        "question_fallback_rate": round(1 - parsed / questions_expected, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--questions-per-page", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    corpora = [(style, (style,)) for style in STYLES] + [("mixed", STYLES)]
+    for name, styles in corpora:
+        pdf_content = build_exam_pdf(args.pages, args.questions_per_page, styles=styles)
+        pages = [text for _, text, _ in extract_page_texts(pdf_content, list(range(args.pages)))]
+        results.append(run_corpus(name, pages, args.pages * args.questions_per_page, args.repeat))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Đo chi phí của middleware và bộ đo thời gian: /check-answer với METRICS_ENABLED=1 và 0.
+
+    python benchmarks/bench_metrics_overhead.py --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import free_port, run_backend, summarize
+from fake_llm_server import start_server
+
+
+async def run(base_url: str, num_requests: int, concurrency: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        response = await client.post("/generate-exam", json={"num_questions": 50, "topic": "vocab"})
+        response.raise_for_status()
+        answers = [{"question_id": q["id"], "answer": q["answer"]} for q in response.json()]
+
+        latencies = []
+
+        async def user(offset: int):
+            for i in range(offset, num_requests, concurrency):
+                start = time.perf_counter()
+                (await client.post("/check-answer", json=answers[i % len(answers)])).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        scrape = time.perf_counter()
+        metrics_size = len((await client.get("/metrics")).content)
+        scrape = time.perf_counter() - scrape
+    return {
+        "rps": round(len(latencies) / elapsed),
+        **summarize(latencies),
+        "metrics_bytes": metrics_size,
+        "scrape_ms": round(scrape * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=0.0)
+    report = {}
+    try:
+        for enabled in ("0", "1"):
+            with run_backend(llm_port, env={"METRICS_ENABLED": enabled, "QUESTION_POOL_ENABLED": "0"}) as base_url:
+                report["metrics_on" if enabled == "1" else "metrics_off"] = await run(base_url, args.requests, args.concurrency)
+    finally:
+        await runner.cleanup()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Đo khả năng mở rộng theo số worker của /check-answer và /get-question (phục vụ từ kho tạo sẵn).
+
+Với mỗi số worker, backend được khởi động với trạng thái dùng chung trên SQLite
+(như `python server.py --workers N`). Câu hỏi được tạo qua một worker và chấm điểm
+qua worker bất kỳ, nên mọi lỗi 404 của /check-answer đều được tính là lỗi.
+Tải được sinh bởi nhiều tiến trình client để client không trở thành nút thắt.
+
+    python benchmarks/bench_multiworker.py --workers 1 2 4 --duration 10 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+
+from common import free_port, run_backend, summarize
+from fake_llm_server import start_server
+from server import shared_state_env
+
+# Kho tạo sẵn đủ lớn để /get-question được phục vụ từ kho trong suốt phép đo
+POOL_ENV = {
+    "QUESTION_POOL_LOW_WATERMARK": "1000",
+    "QUESTION_POOL_TARGET": "3000",
+    "QUESTION_POOL_BATCH_SIZE": "25",
+}
+
+
+async def _load(base_url: str, endpoint: str, answers, duration: float, concurrency: int):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(base_url, connector=connector) as session:
+        async def user(index: int):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                if endpoint == "check-answer":
+                    answer = answers[index % len(answers)]
+                    index += concurrency
+                    request = session.post("/check-answer", json=answer)
+                else:
+                    request = session.get("/get-question")
+                async with request as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(base_url: str, endpoint: str, answers, duration: float, concurrency: int):
+    return asyncio.run(_load(base_url, endpoint, answers, duration, concurrency))
+
+
+async def measure(base_url: str, endpoint: str, answers, args):
+    loop = asyncio.get_running_loop()
+    per_client = max(1, args.concurrency // args.clients)
+    with ProcessPoolExecutor(args.clients) as executor:
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(executor, client_process, base_url, endpoint, answers, args.duration, per_client)
+            for _ in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - started
+    latencies = [value for values, _ in results for value in values]
+    errors = sum(errors for _, errors in results)
+    return {"rps": round(len(latencies) / elapsed), "errors": errors, **summarize(latencies)}
+
+
+async def issue_answers(base_url: str, count: int):
+    """Tạo câu hỏi (từ vựng, không cần LLM) và trả về câu trả lời đúng cho từng câu"""
+    answers = []
+    async with aiohttp.ClientSession(base_url) as session:
+        while len(answers) < count:
+            async with session.post("/generate-exam", json={"num_questions": 50, "topic": "vocab"}) as response:
+                response.raise_for_status()
+                answers.extend({"question_id": q["id"], "answer": q["answer"]} for q in await response.json())
+    return answers[:count]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=os.cpu_count() or 1, help="Số tiến trình sinh tải")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--warmup", type=float, default=5.0, help="Thời gian chờ kho tạo sẵn được bổ sung (giây)")
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=0.0)
+    report = {"cpu_count": os.cpu_count(), "runs": []}
+    try:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as state_dir:
+                env = {**shared_state_env(workers, state_dir), **POOL_ENV}
+                with run_backend(llm_port, env=env, args=["--workers", str(workers)]) as base_url:
+                    answers = await issue_answers(base_url, args.questions)
+                    await asyncio.sleep(args.warmup)
+                    report["runs"].append({
+                        "workers": workers,
+                        "check_answer": await measure(base_url, "check-answer", answers, args),
+                        "get_question": await measure(base_url, "get-question", answers, args),
+                    })
+    finally:
+        await runner.cleanup()
+
+    baseline = report["runs"][0] if report["runs"] else None
+    for run in report["runs"]:
+        for endpoint in ("check_answer", "get_question"):
+            base_rps = baseline[endpoint]["rps"] or 1
+            run[endpoint]["speedup"] = round(run[endpoint]["rps"] / base_rps, 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
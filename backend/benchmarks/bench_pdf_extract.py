@@ -0,0 +1,79 @@
+"""
+Đo tốc độ trích xuất văn bản PDF (trang/giây) với tệp chỉ có văn bản và tệp scan.
+
+Với mỗi tệp:
+  - serial: extract_text_from_pdf trên một luồng
+  - cold:   stream_pages lần đầu (pool tiến trình, kèm OCR cho trang scan nếu khả dụng)
+  - warm:   tải lại đúng tệp đó (bộ đệm theo tệp và theo trang)
+  - shared: tệp khác có cùng nội dung trang (chỉ tính dấu vân tay, không trích xuất lại)
+
+OCR cần pytesseract, Pillow và chương trình tesseract; nếu thiếu, trang scan được nhận
+diện nhưng trả về văn bản rỗng và kết quả ghi rõ "ocr_available": false.
+
+    python benchmarks/bench_pdf_extract.py --pages 200 --scanned-pages 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import common  # noqa: F401  (thêm thư mục backend vào sys.path)
+import pdf_pipeline
+from pdf_fixtures import build_exam_pdf, build_scanned_exam_pdf
+from pdf_parser import extract_text_from_pdf
+
+
+def rate(pages: int, seconds: float) -> float:
+    return round(pages / seconds, 1) if seconds else float("inf")
+
+
+async def measure(pdf_content: bytes, same_pages: bytes):
+    start = time.perf_counter()
+    extract_text_from_pdf(pdf_content)
+    serial = time.perf_counter() - start
+
+    runs = {}
+    for name, content in (("cold", pdf_content), ("warm", pdf_content), ("shared", same_pages)):
+        start = time.perf_counter()
+        pages = [text async for _, text in pdf_pipeline.stream_pages(content)]
+        runs[name] = time.perf_counter() - start
+    total = len(pages)
+    return {
+        "pages": total,
+        "chars": sum(len(text) for text in pages),
+        "serial_pages_per_s": rate(total, serial),
+        **{f"{name}_pages_per_s": rate(total, seconds) for name, seconds in runs.items()},
+    }
+
+
+def with_trailer(pdf_content: bytes) -> bytes:
+    """Cùng nội dung trang nhưng khác byte của tệp (như một lần xuất lại)"""
+    return pdf_content + b"\n% re-exported\n"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Số trang của tệp chỉ có văn bản")
+    parser.add_argument("--scanned-pages", type=int, default=20, help="Số trang của tệp scan")
+    args = parser.parse_args()
+
+    text_pdf = build_exam_pdf(args.pages)
+    scanned_pdf = build_scanned_exam_pdf(args.scanned_pages)
+    pdf_pipeline.get_executor()  # khởi tạo pool trước khi đo
+    try:
+        report = {
+            "cpus": os.cpu_count(),
+            "pdf_workers": pdf_pipeline.PDF_WORKERS,
+            "ocr_workers": pdf_pipeline.PDF_OCR_WORKERS,
+            "text_only": await measure(text_pdf, with_trailer(text_pdf)),
+            "scanned": await measure(scanned_pdf, with_trailer(scanned_pdf)),
+            "stats": pdf_pipeline.get_stats(),
+        }
+    finally:
+        pdf_pipeline.shutdown_executor()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
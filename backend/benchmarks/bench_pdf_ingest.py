@@ -0,0 +1,78 @@
+"""
+Đo thông lượng nhập đề thi PDF: cách cũ (trích xuất tuần tự + một prompt duy nhất)
+so với pipeline chia chunk và phân tích song song.
+
+    python benchmarks/bench_pdf_ingest.py --pages 200 --latency 0.5 --token-latency 0.005
+
+Máy chủ giả lập mô phỏng thời gian sinh token và việc cắt phản hồi theo max_tokens,
+nên cách cũ bị cắt cụt JSON với đề thi lớn.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from common import free_port
+from fake_llm_server import start_server
+from pdf_fixtures import build_exam_pdf
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="Độ trễ cố định mỗi lời gọi LLM (giây)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Thời gian sinh mỗi token đầu ra (giây)")
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    os.environ.update({"OPENAI_API_KEY": "fake", "OPENAI_API_BASE": f"http://127.0.0.1:{llm_port}/v1"})
+    # Tắt bộ đệm trang để mọi lần đo đều trích xuất thật (xem bench_pdf_extract.py cho bộ đệm)
+    os.environ["PDF_PAGE_CACHE_CAPACITY"] = "0"
+    # Import sau khi cấu hình biến môi trường để openai dùng máy chủ giả lập
+    import llm_client
+    import pdf_pipeline
+    from openai_helper import parse_text_questions
+    from pdf_parser import extract_text_from_pdf
+
+    pdf_content = build_exam_pdf(args.pages)
+    runner = await start_server(port=llm_port, latency=args.latency, token_latency=args.token_latency)
+    try:
+        start = time.perf_counter()
+        extract_text_from_pdf(pdf_content)
+        serial_extract = time.perf_counter() - start
+
+        pdf_pipeline.get_executor()  # khởi tạo pool trước khi đo
+        start = time.perf_counter()
+        pages = [page async for page in pdf_pipeline.stream_pages(pdf_content)]
+        parallel_extract = time.perf_counter() - start
+
+        start = time.perf_counter()
+        serial_questions = await parse_text_questions(extract_text_from_pdf(pdf_content))
+        serial_total = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pipeline_questions = await pdf_pipeline.ingest_pdf(pdf_content)
+        pipeline_total = time.perf_counter() - start
+    finally:
+        await llm_client.shutdown()
+        await runner.cleanup()
+        pdf_pipeline.shutdown_executor()
+
+    print(json.dumps({
+        "pages": len(pages),
+        "cpus": os.cpu_count(),
+        "pdf_bytes": len(pdf_content),
+        "extract_serial_pages_per_s": round(args.pages / serial_extract, 1),
+        "extract_parallel_pages_per_s": round(args.pages / parallel_extract, 1),
+        "single_prompt": {"seconds": round(serial_total, 2), "questions": len(serial_questions)},
+        "pipeline": {
+            "seconds": round(pipeline_total, 2),
+            "questions": len(pipeline_questions),
+            "pages_per_s": round(args.pages / pipeline_total, 1),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
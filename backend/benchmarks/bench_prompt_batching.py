@@ -0,0 +1,140 @@
+"""
+Đo số lời gọi LLM và số token theo endpoint với prompt gọn và gộp lời giải thích.
+
+Các cấu hình được chạy với cùng tải:
+  - baseline: prompt sinh câu hỏi phiên bản 1, mỗi lời giải thích một lời gọi
+  - compact:  prompt sinh câu hỏi phiên bản 2 (gọn), chưa gộp
+  - batched:  prompt gọn và gộp các lời giải thích đồng thời (LLM_BATCH_EXPLANATIONS=1); chỉ gộp khi
+              mọi chỗ gọi LLM đều bận
+  - compact_saturated / batched_saturated: như compact / batched với LLM_MAX_CONCURRENCY=4
+
+Số lời gọi và token được đọc từ máy chủ LLM giả lập (ước lượng 4 ký tự/token). Máy chủ giả lập tính
+thời gian cho từng token đầu ra (`--token-latency`), vì một lời gọi gộp N lời giải thích sinh ra N lần
+số token và không nhanh hơn N lời gọi riêng.
+
+    python benchmarks/bench_prompt_batching.py --exams 20 --uploads 8 --explanations 64
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import free_port, run_backend, summarize
+from fake_llm_server import start_server
+from pdf_fixtures import build_exam_pdf
+
+CONFIGS = {
+    "baseline": {"PROMPT_QUESTIONS_VERSION": "1", "LLM_BATCH_EXPLANATIONS": "0"},
+    "compact": {"PROMPT_QUESTIONS_VERSION": "2", "LLM_BATCH_EXPLANATIONS": "0"},
+    "batched": {"PROMPT_QUESTIONS_VERSION": "2", "LLM_BATCH_EXPLANATIONS": "1"},
+    # Ít chỗ gọi LLM hơn số yêu cầu đồng thời: lời gọi phải xếp hàng, lúc này việc gộp mới có tác dụng
+    "compact_saturated": {"PROMPT_QUESTIONS_VERSION": "2", "LLM_BATCH_EXPLANATIONS": "0", "LLM_MAX_CONCURRENCY": "4"},
+    "batched_saturated": {"PROMPT_QUESTIONS_VERSION": "2", "LLM_BATCH_EXPLANATIONS": "1", "LLM_MAX_CONCURRENCY": "4"},
+}
+
+
+async def llm_counters(llm: httpx.AsyncClient):
+    stats = (await llm.get("/stats")).json()
+    return {key: stats[key] for key in ("requests", "prompt_tokens", "completion_tokens")}
+
+
+async def wait_for_warming(client: httpx.AsyncClient):
+    """Chờ việc tạo trước lời giải thích (sau /upload-exam) kết thúc"""
+    while (await client.get("/explanation-cache-stats")).json()["warming"]:
+        await asyncio.sleep(0.05)
+
+
+async def measure(client: httpx.AsyncClient, llm: httpx.AsyncClient, requests, concurrency: int, settle=None):
+    """Chạy các yêu cầu với giới hạn đồng thời, trả về độ trễ và lượng LLM đã dùng"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(request):
+        async with semaphore:
+            start = time.perf_counter()
+            (await request()).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    before = await llm_counters(llm)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(request) for request in requests))
+    if settle:
+        await settle(client)
+    elapsed = time.perf_counter() - start
+    after = await llm_counters(llm)
+    used = {("llm_calls" if key == "requests" else key): after[key] - before[key] for key in after}
+    return {"requests": len(requests), **used, "elapsed_s": round(elapsed, 2), **summarize(latencies)}
+
+
+async def run(base_url: str, llm_url: str, args):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client, httpx.AsyncClient(base_url=llm_url) as llm:
+        # Câu hỏi từ vựng (không cần LLM) làm đầu vào cho /get-explanation
+        questions = []
+        while len(questions) < args.explanations:
+            questions.append((await client.get("/get-question", params={"topic": "vocab"})).json())
+
+        exam = [
+            lambda: client.post("/generate-exam", json={"num_questions": args.exam_size})
+            for _ in range(args.exams)
+        ]
+        # Mỗi tệp PDF có câu hỏi khác nhau để bộ đệm lời giải thích không che mất lời gọi
+        pdfs = [build_exam_pdf(args.pdf_pages, seed=seed) for seed in range(args.uploads)]
+        upload = [
+            (lambda pdf=pdf: client.post("/upload-exam", files={"file": ("exam.pdf", pdf, "application/pdf")}))
+            for pdf in pdfs
+        ]
+        explain = [
+            (lambda q=q: client.post("/get-explanation", json={"question_id": q["id"], "answer": q["answer"]}))
+            for q in questions
+        ]
+        return {
+            "generate-exam": await measure(client, llm, exam, args.concurrency),
+            # Gồm cả các lời giải thích được tạo trước trong nền cho câu hỏi vừa trích xuất
+            "upload-exam": await measure(client, llm, upload, args.concurrency, settle=wait_for_warming),
+            "get-explanation": await measure(client, llm, explain, args.concurrency),
+        }
+
+
+def savings(base, new):
+    result = {}
+    for key in ("llm_calls", "prompt_tokens", "completion_tokens"):
+        result[f"{key}_saved"] = base[key] - new[key]
+        result[f"{key}_saved_pct"] = round((base[key] - new[key]) / base[key] * 100, 1) if base[key] else 0.0
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exams", type=int, default=20, help="Số yêu cầu /generate-exam")
+    parser.add_argument("--exam-size", type=int, default=10)
+    parser.add_argument("--uploads", type=int, default=8, help="Số yêu cầu /upload-exam")
+    parser.add_argument("--pdf-pages", type=int, default=2)
+    parser.add_argument("--explanations", type=int, default=64, help="Số yêu cầu /get-explanation")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2, help="Độ trễ của LLM giả lập (giây)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Thời gian sinh mỗi token đầu ra (giây)")
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=args.latency, token_latency=args.token_latency)
+    report = {}
+    try:
+        for name, config in CONFIGS.items():
+            env = {**config, "QUESTION_POOL_ENABLED": "0"}
+            with run_backend(llm_port, env=env) as base_url:
+                report[name] = await run(base_url, f"http://127.0.0.1:{llm_port}", args)
+    finally:
+        await runner.cleanup()
+
+    for name in ("compact", "batched"):
+        for endpoint, result in report[name].items():
+            result["vs_baseline"] = savings(report["baseline"][endpoint], result)
+    for endpoint, result in report["batched_saturated"].items():
+        result["vs_compact_saturated"] = savings(report["compact_saturated"][endpoint], result)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,186 @@
+"""
+Đo chỉ mục câu hỏi gần trùng (MinHash/LSH) trên kho tới 1 triệu câu hỏi.
+
+- Thời gian check_and_add mỗi câu (p50/p99) ở nhiều kích thước kho, để xác nhận chi phí không tăng theo kho
+- Độ nhạy: tỉ lệ bản diễn đạt lại (đổi lời dẫn, hoa/thường, dấu câu, thứ tự lựa chọn, thay một từ)
+  được nhận ra, so với so trùng chính xác trên văn bản đã chuẩn hóa
+- Dương tính giả: tỉ lệ câu khác nhau (cùng lời dẫn và lựa chọn nhưng khác câu) bị coi là trùng,
+  kèm bảng độ nhạy/dương tính giả theo ngưỡng
+- So với quét tuyến tính toàn bộ chữ ký ở kho nhỏ, và bộ nhớ tăng thêm của tiến trình
+
+    python benchmarks/bench_question_dedup.py --size 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+from common import process_rss_mb
+from question_dedup import NearDuplicateIndex, normalize_question
+
+PREFIXES = [
+    ("Choose the correct word to complete the sentence:", "Select the right word to fill in the blank:"),
+    ("Which option best completes the sentence?", "Pick the option that best completes this sentence:"),
+    ("Fill in the blank:", "Complete the sentence:"),
+    ("What is the meaning of the underlined word?", "What does the underlined word mean?"),
+]
+SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "vos", "pel", "du", "sha", "gri", "om", "bel", "nu", "tra", "zen", "fi"]
+
+
+def make_words(count: int, rng: random.Random):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_question(index: int, words, rng: random.Random):
+    sentence = " ".join(rng.choice(words) for _ in range(rng.randint(7, 12)))
+    return {
+        "id": f"q-{index:08d}",
+        "type": "multiple_choice",
+        "prefix": rng.randrange(len(PREFIXES)),
+        "body": sentence,
+        "question": None,
+        "options": [rng.choice(words) for _ in range(4)],
+        "answer": "A",
+    }
+
+
+def render(item, variant: int = 0):
+    question = dict(item)
+    question["question"] = f"{PREFIXES[item['prefix']][variant]} {item['body']} ___."
+    return question
+
+
+def paraphrase(item, words, rng: random.Random):
+    """Bản diễn đạt lại: lời dẫn khác, đổi hoa/thường và dấu câu, đảo lựa chọn, có thể thay một từ"""
+    question = render(item, variant=1)
+    text = question["question"]
+    if rng.random() < 0.5:
+        tokens = text.split()
+        position = rng.randrange(len(tokens) - len(PREFIXES[item["prefix"]][1].split())) + len(PREFIXES[item["prefix"]][1].split())
+        tokens[min(position, len(tokens) - 1)] = rng.choice(words)
+        text = " ".join(tokens)
+    question["question"] = text.upper() if rng.random() < 0.3 else text.replace("___.", "_____ ?")
+    question["options"] = rng.sample(item["options"], len(item["options"]))
+    question["id"] = item["id"] + "-p"
+    return question
+
+
+def sibling(item, words, rng: random.Random):
+    """Câu khác nhưng giống bề ngoài: cùng lời dẫn và lựa chọn, khác câu cần điền"""
+    question = render(dict(item, body=" ".join(rng.choice(words) for _ in range(rng.randint(7, 12)))))
+    question["id"] = item["id"] + "-s"
+    return question
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure_checks(index: NearDuplicateIndex, questions):
+    timings = []
+    for question in questions:
+        start = time.perf_counter()
+        index.check_and_add(question)
+        timings.append(time.perf_counter() - start)
+    return {
+        "p50_us": round(percentile(timings, 0.5) * 1e6, 1),
+        "p99_us": round(percentile(timings, 0.99) * 1e6, 1),
+        "mean_us": round(statistics.fmean(timings) * 1e6, 1),
+    }
+
+
+def linear_scan_us(index: NearDuplicateIndex, probes) -> float:
+    """Thời gian mỗi câu khi so chữ ký với toàn bộ kho (không dùng LSH)"""
+    num_hashes = index.num_hashes
+    signatures = index._signatures
+    start = time.perf_counter()
+    for probe in probes:
+        signature = index.signature(probe)
+        best = 0
+        for slot in range(index.size):
+            matches = sum(map(int.__eq__, signature, signatures[slot * num_hashes:(slot + 1) * num_hashes]))
+            best = max(best, matches)
+    return round((time.perf_counter() - start) / len(probes) * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000, help="Số câu hỏi trong kho")
+    parser.add_argument("--probes", type=int, default=2_000, help="Số câu đo tại mỗi mốc và số câu đo độ nhạy")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--bands", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = make_words(20_000, rng)
+    items = [make_question(i, words, rng) for i in range(args.size + 2 * args.probes)]
+    corpus, fresh = items[:args.size], items[args.size:]
+
+    index = NearDuplicateIndex(capacity=args.size + len(fresh), threshold=args.threshold, bands=args.bands)
+    rss_before = process_rss_mb(os.getpid())
+    checkpoints, inserted, insert_seconds = [], 0, 0.0
+    mark = 10_000
+    while inserted < args.size:
+        mark = min(mark, args.size)
+        start = time.perf_counter()
+        for item in corpus[inserted:mark]:
+            index.check_and_add(render(item))
+        insert_seconds += time.perf_counter() - start
+        inserted = mark
+        # Đo trên câu mới chưa có trong kho (mỗi mốc dùng một nhóm riêng)
+        group = fresh[:args.probes] if len(checkpoints) % 2 == 0 else fresh[args.probes:]
+        probes = [dict(render(item), id=f"{item['id']}-{inserted}") for item in group]
+        checkpoints.append({"size": inserted, **measure_checks(index, probes)})
+        mark *= 10
+    rss_after = process_rss_mb(os.getpid())
+
+    # Độ nhạy và dương tính giả (chỉ tra cứu, không thêm vào chỉ mục)
+    sample = rng.sample(corpus, args.probes)
+    paraphrases = [paraphrase(item, words, rng) for item in sample]
+    paraphrase_scores = [
+        score if match == item["id"] else 0.0
+        for item, (match, score) in zip(sample, map(index.best_match, paraphrases))
+    ]
+    exact = {normalize_question(render(item)) for item in sample}
+    exact_detected = sum(normalize_question(question) in exact for question in paraphrases)
+    sibling_scores = [index.best_match(sibling(item, words, rng))[1] for item in sample]
+    by_threshold = [
+        {
+            "threshold": threshold,
+            "paraphrase_recall": round(sum(score >= threshold for score in paraphrase_scores) / len(sample), 4),
+            "false_positive_rate": round(sum(score >= threshold for score in sibling_scores) / len(sample), 4),
+        }
+        for threshold in (0.5, 0.6, 0.7, 0.8)
+    ]
+
+    small = NearDuplicateIndex(capacity=10_000, threshold=args.threshold, bands=args.bands)
+    for item in corpus[:10_000]:
+        small.check_and_add(render(item))
+    scan_probes = [render(item) for item in fresh[:50]]
+    start = time.perf_counter()
+    for probe in scan_probes:
+        small.find(probe)
+    lsh_small_us = round((time.perf_counter() - start) / len(scan_probes) * 1e6, 1)
+
+    print(json.dumps({
+        "size": args.size,
+        "threshold": args.threshold,
+        "insert_per_s": round(args.size / insert_seconds),
+        "check_and_add": checkpoints,
+        "exact_match_recall": round(exact_detected / len(paraphrases), 4),
+        "by_threshold": by_threshold,
+        "index_rss_mb": round(rss_after - rss_before, 1),
+        "index": index.stats(),
+        "at_10k": {"lsh_find_us": lsh_small_us, "linear_scan_us": linear_scan_us(small, scan_probes)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Microbenchmark tra cứu câu hỏi theo ID trong QuestionStore.
+
+Đo thời gian get() trung bình ở nhiều kích thước kho (đến 1 triệu câu hỏi)
+để xác nhận thời gian tra cứu không đổi theo số lượng câu hỏi.
+
+    python benchmarks/bench_question_store.py --max-size 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+import common  # noqa: F401  (thêm thư mục backend vào sys.path)
+from question_store import QuestionStore
+
+TYPES = ["fill_blank", "multiple_choice", "sentence_rearrangement"]
+TOPICS = ["grammar", "vocabulary", "travel", "science", None]
+
+
+def make_question(index: int):
+    return {
+        "id": f"q-{index:08d}",
+        "type": TYPES[index % len(TYPES)],
+        "question": f"Question number {index} _____.",
+        "options": None,
+        "answer": "answer",
+    }
+
+
+def bench_lookup(store: QuestionStore, size: int, lookups: int) -> float:
+    ids = [f"q-{random.randrange(size):08d}" for _ in range(lookups)]
+    get = store.get
+    start = time.perf_counter()
+    for question_id in ids:
+        get(question_id)
+    return (time.perf_counter() - start) / lookups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-size", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    store = QuestionStore(capacity=args.max_size)
+    results = []
+    size = 0
+    checkpoint = 1_000
+    insert_elapsed = 0.0
+    while checkpoint <= args.max_size:
+        insert_start = time.perf_counter()
+        for index in range(size, checkpoint):
+            store.add(make_question(index), topic=TOPICS[index % len(TOPICS)])
+        insert_elapsed += time.perf_counter() - insert_start
+        size = checkpoint
+        results.append({"size": size, "lookup_ns": round(bench_lookup(store, size, args.lookups) * 1e9, 1)})
+        checkpoint *= 10
+
+    print(json.dumps({
+        "lookups": results,
+        "inserts_per_s": round(size / insert_elapsed),
+        "stats": {k: v for k, v in store.stats().items() if k != "types"},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Đo lớp phân tích phản hồi LLM: tốc độ, số câu hỏi cứu được và chi phí sinh lại.
+
+Phần 1 so sánh cách cũ (bỏ rào ```json rồi json.loads, hỏng là mất cả lô) với
+response_parser.parse_questions trên các dạng phản hồi thường gặp.
+Phần 2 chạy /generate-exam với máy chủ LLM giả lập trả về một tỉ lệ phản hồi hỏng
+và so sánh số lời gọi, token và số câu hỏi nhận được khi có/không sinh lại phần thiếu.
+
+    python benchmarks/bench_response_parsing.py --responses 2000 --exams 100 --malformed-rate 0.3
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import httpx
+
+from common import free_port, run_backend
+from fake_llm_server import build_questions, corrupt, start_server
+from response_parser import parse_questions
+
+
+def legacy_parse(text: str):
+    """Cách phân tích trước đây trong openai_helper (kể cả bước gán ID)"""
+    if text.startswith("```json"):
+        text = text[7:-3].strip()
+    try:
+        questions = json.loads(text)
+    except json.JSONDecodeError:
+        return []
+    for question in questions:
+        question["id"] = str(uuid.uuid4())
+    return questions
+
+
+def build_cases(num_questions: int):
+    content = json.dumps(build_questions(num_questions), ensure_ascii=False)
+    rng = random.Random(1)
+    return {
+        "clean": [content],
+        "fenced": ["```json\n" + content + "\n```"],
+        "chatty": ["Dưới đây là các câu hỏi:\n" + content + "\nChúc bạn học tốt!"],
+        "truncated": [content[:int(len(content) * rng.uniform(0.3, 0.9))] for _ in range(50)],
+        "missing_comma": [content.replace("}, {", "} {", 1)],
+        "mixed_corrupt": [corrupt(content, rng) for _ in range(50)],
+    }
+
+
+def parse_benchmark(num_questions: int, responses: int):
+    report = {}
+    for name, texts in build_cases(num_questions).items():
+        row = {}
+        for label, parse in (("legacy", legacy_parse), ("parser", lambda text: parse_questions(text).questions)):
+            recovered = 0
+            start = time.perf_counter()
+            for i in range(responses):
+                recovered += len(parse(texts[i % len(texts)]))
+            elapsed = time.perf_counter() - start
+            row[label] = {
+                "us_per_response": round(elapsed / responses * 1e6, 1),
+                "questions_recovered_pct": round(recovered / (responses * num_questions) * 100, 1),
+            }
+        report[name] = row
+    return report
+
+
+async def exam_benchmark(args):
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=args.latency, malformed_rate=args.malformed_rate)
+    report = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{llm_port}") as llm:
+            for attempts in ("0", "1"):
+                env = {"QUESTION_POOL_ENABLED": "0", "LLM_REGENERATE_ATTEMPTS": attempts}
+                with run_backend(llm_port, env=env) as base_url:
+                    before = (await llm.get("/stats")).json()
+                    received, short = 0, 0
+                    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+                        semaphore = asyncio.Semaphore(args.concurrency)
+
+                        async def exam():
+                            nonlocal received, short
+                            async with semaphore:
+                                response = await client.post("/generate-exam", json={"num_questions": args.exam_size})
+                            count = len(response.json()) if response.status_code == 200 else 0
+                            received += count
+                            short += count < args.exam_size
+
+                        await asyncio.gather(*(exam() for _ in range(args.exams)))
+                        parse_stats = (await client.get("/llm-stats")).json()["response_parsing"]
+                    after = (await llm.get("/stats")).json()
+                report[f"regenerate_attempts={attempts}"] = {
+                    "llm_calls": after["requests"] - before["requests"],
+                    "completion_tokens": after["completion_tokens"] - before["completion_tokens"],
+                    "questions_received_pct": round(received / (args.exams * args.exam_size) * 100, 1),
+                    "short_exams": short,
+                    "salvage_rate": parse_stats["salvage_rate"],
+                }
+    finally:
+        await runner.cleanup()
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=2000, help="Số phản hồi mỗi dạng trong phần 1")
+    parser.add_argument("--questions", type=int, default=20, help="Số câu hỏi mỗi phản hồi trong phần 1")
+    parser.add_argument("--exams", type=int, default=100)
+    parser.add_argument("--exam-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--malformed-rate", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    report = {
+        "parsing": parse_benchmark(args.questions, args.responses),
+        "generate_exam": await exam_benchmark(args),
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Benchmark lịch ôn tập ngắt quãng ở quy mô 100k người học × 5k mục.
+
+- Bộ nhớ: mỗi người học ôn `--reviews` mục ngẫu nhiên trong danh mục `--items` mục
+- Người học "đầy đủ": `--dense-learners` người học, mỗi người đã ôn toàn bộ `--items` mục
+- next_due: độ trễ lấy mục đến hạn tiếp theo (p50/p99)
+- SQLite: tốc độ ghi theo bài kiểm tra và thời gian nạp lại một người học
+
+    python benchmarks/bench_spaced_repetition.py --learners 100000 --items 5000 --reviews 50
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import uuid
+
+from common import summarize
+from spaced_repetition import DAY, SpacedRepetition
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def populate(scheduler: SpacedRepetition, learners, items, reviews: int, rng: random.Random, now: float, batch: int = 20) -> float:
+    """Mỗi người học nộp các bài kiểm tra `batch` câu cho đến khi ôn đủ `reviews` mục, trả về số kết quả/giây"""
+    total = 0
+    start = time.perf_counter()
+    for learner in learners:
+        chosen = rng.sample(items, reviews) if reviews < len(items) else items
+        for offset in range(0, len(chosen), batch):
+            outcomes = [(item, rng.random() < 0.8) for item in chosen[offset:offset + batch]]
+            # Rải thời điểm ôn trong 30 ngày để lịch đến hạn đa dạng
+            scheduler.record_many(learner, outcomes, now=now - rng.random() * 30 * DAY)
+            total += len(outcomes)
+    return round(total / (time.perf_counter() - start))
+
+
+def time_next_due(scheduler: SpacedRepetition, learners, rng: random.Random, now: float, samples: int = 10_000):
+    durations = []
+    for learner in rng.choices(learners, k=samples):
+        start = time.perf_counter()
+        scheduler.next_due(learner, count=1, now=now)
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def time_review_cycle(scheduler: SpacedRepetition, learners, rng: random.Random, now: float, samples: int = 10_000):
+    """Vòng ôn tập thực tế: lấy mục đến hạn rồi ghi kết quả"""
+    durations = []
+    for learner in rng.choices(learners, k=samples):
+        start = time.perf_counter()
+        due = scheduler.next_due(learner, count=1, now=now)
+        if due:
+            scheduler.record(learner, due[0]["item_id"], rng.random() < 0.8, now=now)
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def bench_memory(args, items, rng):
+    gc.collect()
+    rss_before = rss_mb()
+    scheduler = SpacedRepetition()
+    learners = [f"learner-{i}" for i in range(args.learners)]
+    now = time.time()
+    rate = populate(scheduler, learners, items, args.reviews, rng, now)
+    records = args.learners * args.reviews
+    growth = rss_mb() - rss_before
+    return {
+        "learners": args.learners,
+        "records": records,
+        "record_rate_per_s": rate,
+        "rss_growth_mb": round(growth),
+        "bytes_per_record": round(growth * 1024 * 1024 / records),
+        "next_due": time_next_due(scheduler, learners, rng, now),
+        "review_cycle": time_review_cycle(scheduler, learners, rng, now),
+    }
+
+
+def bench_dense(args, items, rng):
+    scheduler = SpacedRepetition()
+    learners = [f"dense-{i}" for i in range(args.dense_learners)]
+    now = time.time()
+    rate = populate(scheduler, learners, items, len(items), rng, now)
+    return {
+        "learners": args.dense_learners,
+        "items_per_learner": len(items),
+        "record_rate_per_s": rate,
+        "next_due": time_next_due(scheduler, learners, rng, now),
+        "review_cycle": time_review_cycle(scheduler, learners, rng, now),
+    }
+
+
+def bench_sqlite(args, items, rng):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reviews.db")
+        scheduler = SpacedRepetition(capacity=100, db_path=path)
+        learners = [f"learner-{i}" for i in range(args.db_learners)]
+        now = time.time()
+        rate = populate(scheduler, learners, items, args.reviews, rng, now)
+        # Người học không còn trong bộ nhớ phải được nạp lại từ SQLite
+        cold = []
+        for learner in rng.sample(learners, min(1000, len(learners))):
+            scheduler._learners.pop(learner, None)
+            start = time.perf_counter()
+            scheduler.next_due(learner, now=now)
+            cold.append(time.perf_counter() - start)
+        report = {
+            "learners": args.db_learners,
+            "records": args.db_learners * args.reviews,
+            "record_rate_per_s": rate,
+            "cold_load_next_due": summarize(cold),
+            "db_size_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+        }
+        scheduler.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--reviews", type=int, default=50, help="Số mục mỗi người học đã ôn")
+    parser.add_argument("--dense-learners", type=int, default=200)
+    parser.add_argument("--db-learners", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    items = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(args.items)]
+    report = {
+        "memory": bench_memory(args, items, rng),
+        "dense": bench_dense(args, items, rng),
+        "sqlite": bench_sqlite(args, items, rng),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+So sánh thời gian tới câu hỏi đầu tiên giữa /generate-exam và /generate-exam/stream.
+
+Kho câu hỏi tạo sẵn bị tắt để mọi câu hỏi đều phải sinh từ LLM giả lập.
+
+    python benchmarks/bench_streaming.py --questions 30 --latency 0.3 --token-latency 0.005
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import free_port, run_backend
+from fake_llm_server import start_server
+
+
+async def run(base_url: str, num_questions: int):
+    payload = {"num_questions": num_questions}
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        start = time.perf_counter()
+        response = await client.post("/generate-exam", json=payload)
+        response.raise_for_status()
+        blocking_total = time.perf_counter() - start
+        blocking_count = len(response.json())
+
+        start = time.perf_counter()
+        first = None
+        streamed = 0
+        async with client.stream("POST", "/generate-exam/stream", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                json.loads(line)
+                streamed += 1
+                if first is None:
+                    first = time.perf_counter() - start
+        stream_total = time.perf_counter() - start
+
+    return {
+        "blocking": {"first_question_ms": round(blocking_total * 1000), "total_ms": round(blocking_total * 1000), "questions": blocking_count},
+        "stream": {"first_question_ms": round((first or 0) * 1000), "total_ms": round(stream_total * 1000), "questions": streamed},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.3, help="Độ trễ tới token đầu tiên (giây)")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Thời gian sinh mỗi token (giây)")
+    args = parser.parse_args()
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=args.latency, token_latency=args.token_latency)
+    try:
+        with run_backend(llm_port, env={"QUESTION_POOL_ENABLED": "0"}) as base_url:
+            report = await run(base_url, args.questions)
+    finally:
+        await runner.cleanup()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
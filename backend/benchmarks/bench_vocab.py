@@ -0,0 +1,89 @@
+"""
+Benchmark dịch vụ từ vựng ở quy mô lớn (dữ liệu tổng hợp từ vocab.json).
+
+Đo thời gian dựng chỉ mục, bộ nhớ tăng thêm và độ trễ tìm kiếm/tra cứu.
+
+    python benchmarks/bench_vocab.py --sizes 100000 1000000
+"""
+import argparse
+import gc
+import json
+import random
+import resource
+import string
+import time
+
+import common  # noqa: F401  (thêm thư mục backend vào sys.path)
+from vocab import VOCAB_PATH, Vocabulary
+
+
+def synthesize(base, size: int, rng: random.Random):
+    entries = []
+    for index in range(size):
+        entry = base[index % len(base)]
+        suffix = "".join(rng.choices(string.ascii_lowercase, k=4))
+        entries.append({
+            "english": f"{entry['english']}{suffix}",
+            "vietnamese": [f"{gloss} {suffix}" for gloss in entry["vietnamese"]],
+            "pos": entry["pos"],
+            "pronunciation": entry.get("pronunciation", ""),
+            "explanation": entry.get("explanation", ""),
+        })
+    return entries
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def time_queries(fn, queries, repeat: int = 3) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with open(VOCAB_PATH, encoding="utf-8") as f:
+        base = json.load(f)
+    rng = random.Random(7)
+    results = []
+    for size in args.sizes:
+        entries = synthesize(base, size, rng)
+        gc.collect()
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        vocabulary = Vocabulary(entries)
+        build_s = time.perf_counter() - start
+        del entries
+        gc.collect()
+
+        words = [vocabulary.entry(rng.randrange(size)) for _ in range(200)]
+        prefix_queries = [w["english"][:-2] for w in words]
+        # Tiền tố ngắn khớp với hàng chục nghìn từ (dữ liệu tổng hợp lặp lại 72 từ gốc)
+        broad_prefix_queries = [w["english"][:3] for w in words]
+        substring_queries = [w["english"][-5:] for w in words]
+        vietnamese_queries = [w["vietnamese"][0] for w in words]
+        results.append({
+            "entries": size,
+            "build_s": round(build_s, 2),
+            "peak_rss_growth_mb": round(rss_mb() - rss_before),
+            "prefix_search_ms": round(time_queries(lambda q: vocabulary.search(q, limit=20), prefix_queries), 3),
+            "broad_prefix_search_ms": round(time_queries(lambda q: vocabulary.search(q, limit=20), broad_prefix_queries), 3),
+            "substring_search_ms": round(time_queries(lambda q: vocabulary.search(q, limit=20), substring_queries), 3),
+            "vietnamese_search_ms": round(time_queries(lambda q: vocabulary.search(q, limit=20), vietnamese_queries), 3),
+            "pos_page_ms": round(time_queries(lambda q: vocabulary.by_pos("noun", offset=q, limit=20), list(range(0, 2000, 10))), 3),
+            "random_sample_ms": round(time_queries(lambda q: vocabulary.sample(10), list(range(200))), 3),
+        })
+        del vocabulary
+        gc.collect()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
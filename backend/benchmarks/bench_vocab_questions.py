@@ -0,0 +1,76 @@
+"""
+Đo tốc độ sinh câu hỏi từ vựng cục bộ và so sánh /generate-exam giữa chủ đề "vocab" và LLM.
+
+- Tốc độ sinh trong tiến trình (câu hỏi/giây) cho từng loại câu hỏi, với vocab.json và dữ liệu tổng hợp
+- Độ trễ /generate-exam (topic "vocab" so với LLM giả lập, kho tạo sẵn tắt)
+
+    python benchmarks/bench_vocab_questions.py --size 100000 --questions 20 --latency 1.0
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from bench_vocab import synthesize
+from common import free_port, run_backend, summarize
+from fake_llm_server import start_server
+from question_pool import ALL_QUESTION_TYPES
+from vocab import VOCAB_PATH, Vocabulary
+from vocab_questions import VocabQuestionGenerator
+
+
+def throughput(generator: VocabQuestionGenerator, question_types, seconds: float = 1.0) -> float:
+    generated = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        generated += len(generator.generate(100, question_types))
+    return round(generated / (time.perf_counter() - start))
+
+
+async def endpoint_latency(base_url: str, num_questions: int, rounds: int):
+    report = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for label, topic in (("vocab", "vocab"), ("llm", "English vocabulary")):
+            durations = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                response = await client.post("/generate-exam", json={"num_questions": num_questions, "topic": topic})
+                response.raise_for_status()
+                durations.append(time.perf_counter() - start)
+            report[label] = summarize(durations)
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000, help="Số từ của bộ dữ liệu tổng hợp")
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=1.0, help="Độ trễ của LLM giả lập (giây)")
+    args = parser.parse_args()
+
+    with open(VOCAB_PATH, encoding="utf-8") as f:
+        base = json.load(f)
+    datasets = {"vocab.json": base, f"synthetic_{args.size}": synthesize(base, args.size, random.Random(7))}
+    report = {"questions_per_second": {}}
+    for name, entries in datasets.items():
+        generator = VocabQuestionGenerator(Vocabulary(entries), rng=random.Random(7))
+        rates = {question_type: throughput(generator, [question_type]) for question_type in ALL_QUESTION_TYPES}
+        rates["mixed"] = throughput(generator, None)
+        report["questions_per_second"][name] = rates
+
+    llm_port = free_port()
+    runner = await start_server(port=llm_port, latency=args.latency)
+    try:
+        with run_backend(llm_port, env={"QUESTION_POOL_ENABLED": "0"}) as base_url:
+            report["generate_exam"] = await endpoint_latency(base_url, args.questions, args.rounds)
+    finally:
+        await runner.cleanup()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
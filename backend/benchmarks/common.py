@@ -0,0 +1,88 @@
+"""Các tiện ích dùng chung cho benchmark: khởi động backend, thống kê độ trễ"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackendURL(str):
+    """Địa chỉ backend, kèm PID của tiến trình để đo bộ nhớ"""
+
+    pid: int = 0
+
+
+def process_rss_mb(pid: int) -> float:
+    """Bộ nhớ thường trú hiện tại (MB) của một tiến trình, 0 nếu không đọc được (chỉ Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+@contextmanager
+def run_backend(llm_port: int, port: Optional[int] = None, env: Optional[Dict[str, str]] = None, args: Optional[List[str]] = None):
+    """Chạy backend FastAPI trong tiến trình con, trỏ tới máy chủ LLM giả lập"""
+    port = port or free_port()
+    process_env = dict(os.environ)
+    process_env.update({
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_API_BASE": f"http://127.0.0.1:{llm_port}/v1",
+    })
+    process_env.update(env or {})
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    process = subprocess.Popen(command + (args or []), cwd=BACKEND_DIR, env=process_env)
+    base_url = BackendURL(f"http://127.0.0.1:{port}")
+    base_url.pid = process.pid
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                if time.time() > deadline or process.poll() is not None:
+                    raise RuntimeError("Backend không khởi động được")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Tóm tắt danh sách độ trễ (giây) thành p50/p95/p99/max tính bằng mili giây"""
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
@@ -0,0 +1,73 @@
+"""
+So sánh hai tệp kết quả của load_suite.py (ví dụ trước và sau một commit).
+
+In bảng thay đổi thông lượng và p50/p95/p99 theo endpoint; trả về mã thoát 1
+nếu có endpoint chậm đi (p95 tăng) hoặc thông lượng giảm quá ngưỡng.
+
+    python benchmarks/compare_results.py results/base.json results/new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+
+def change(base: float, new: float) -> float:
+    return (new - base) / base * 100 if base else 0.0
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Trả về (các dòng của bảng, danh sách suy giảm vượt ngưỡng)"""
+    lines = [f"{'endpoint':<18}{'metric':<8}{'base':>12}{'new':>12}{'change':>10}"]
+    regressions = []
+    rows = [("total", base.get("total", {}), new.get("total", {}))]
+    for endpoint in sorted(set(base.get("endpoints", {})) | set(new.get("endpoints", {}))):
+        rows.append((endpoint, base["endpoints"].get(endpoint, {}), new["endpoints"].get(endpoint, {})))
+
+    for endpoint, before, after in rows:
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+            if metric not in before or metric not in after:
+                continue
+            delta = change(before[metric], after[metric])
+            lines.append(f"{endpoint:<18}{metric:<8}{before[metric]:>12}{after[metric]:>12}{delta:>9.1f}%")
+            if metric == "rps" and delta < -threshold:
+                regressions.append(f"{endpoint}: thông lượng giảm {-delta:.1f}%")
+            elif metric == "p95_ms" and delta > threshold:
+                regressions.append(f"{endpoint}: p95 tăng {delta:.1f}%")
+            elif metric == "errors" and after[metric] > before[metric]:
+                regressions.append(f"{endpoint}: số lỗi tăng từ {before[metric]} lên {after[metric]}")
+
+    rss_before, rss_after = base.get("rss_mb", {}).get("peak"), new.get("rss_mb", {}).get("peak")
+    if rss_before is not None and rss_after is not None:
+        delta = change(rss_before, rss_after)
+        lines.append(f"{'backend':<18}{'rss_mb':<8}{rss_before:>12}{rss_after:>12}{delta:>9.1f}%")
+        if delta > threshold:
+            regressions.append(f"RSS đỉnh tăng {delta:.1f}%")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Ngưỡng suy giảm (%%)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    if base.get("meta", {}).get("params") != new.get("meta", {}).get("params"):
+        print("Cảnh báo: hai lần chạy dùng tham số khác nhau")
+    print(f"base: {base.get('meta', {}).get('commit')}  new: {new.get('meta', {}).get('commit')}")
+
+    lines, regressions = compare(base, new, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print("\nSuy giảm vượt ngưỡng:")
+        print("\n".join(f"- {item}" for item in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Máy chủ giả lập API chat completion của OpenAI, dùng cho các benchmark.
+
+Chạy độc lập:
+    python benchmarks/fake_llm_server.py --port 9000 --latency 0.5
+
+Sau đó trỏ backend tới máy chủ này:
+    OPENAI_API_BASE=http://127.0.0.1:9000/v1 OPENAI_API_KEY=fake uvicorn main:app
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+import uuid
+
+from aiohttp import web
+
+QUESTION_TEMPLATES = [
+    {
+        "id": 0,
+        "type": "fill_blank",
+        "question": "The capital of Vietnam is _____.",
+        "options": None,
+        "answer": "Hanoi",
+    },
+    {
+        "id": 0,
+        "type": "multiple_choice",
+        "question": "Which is the largest planet in the Solar System?",
+        "options": ["Earth", "Mars", "Jupiter", "Saturn"],
+        "answer": "Jupiter",
+    },
+    {
+        "id": 0,
+        "type": "sentence_rearrangement",
+        "question": "Rearrange the following words to form a complete sentence.",
+        "options": ["studying", "I", "university", "am", "at", "a"],
+        "answer": ["I", "am", "studying", "at", "a", "university"],
+    },
+]
+
+# Âm tiết dùng để tạo ngữ cảnh riêng cho mỗi câu hỏi, để các câu sinh ra khác nhau như khi mô hình thật
+# sinh với temperature > 0 (nếu không, bộ lọc câu gần trùng của backend sẽ loại gần hết)
+CONTEXT_SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "vos", "pel", "du", "sha", "gri", "om", "bel", "nu", "tra", "zen", "fi"]
+_question_numbers = itertools.count(1)
+
+_COUNT_PATTERN = re.compile(r"SỐ LƯỢNG CÂU HỎI CẦN TẠO RA:\s*(\d+)")
+_EXPLANATION_COUNT_PATTERN = re.compile(r"SỐ LƯỢNG LỜI GIẢI THÍCH:\s*(\d+)")
+_PDF_QUESTION_PATTERN = re.compile(r"^\s*\d+\.\s*(.+)$", re.MULTILINE)
+
+
+def build_questions(num_questions: int):
+    questions = []
+    for i in range(num_questions):
+        question = dict(QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)])
+        number = next(_question_numbers)
+        rng = random.Random(number)
+        context = " ".join("".join(rng.choice(CONTEXT_SYLLABLES) for _ in range(3)) for _ in range(10))
+        question["question"] = f"{question['question']} (#{number}: {context})"
+        questions.append(question)
+    return questions
+
+
+def build_explanation(explanation_size: int) -> str:
+    return ("Đây là lời giải thích giả lập. " * max(1, explanation_size // 32)).strip()
+
+
+def build_content(messages, explanation_size: int) -> str:
+    """Sinh nội dung phản hồi phù hợp với loại prompt nhận được"""
+    prompt = "\n".join(m.get("content", "") for m in messages)
+    match = _EXPLANATION_COUNT_PATTERN.search(prompt)
+    if match:
+        # Giải thích theo lô: mảng JSON, mỗi câu một lời giải thích
+        return json.dumps([
+            {"index": i + 1, "explanation": build_explanation(explanation_size)} for i in range(int(match.group(1)))
+        ], ensure_ascii=False)
+    if "Văn bản PDF" in prompt:
+        # Giả lập việc phân tích đề thi: mỗi dòng đánh số trở thành một câu hỏi
+        return json.dumps([
+            {"id": 0, "type": "multiple_choice", "question": text.strip(), "options": ["A", "B", "C", "D"], "answer": "A"}
+            for text in _PDF_QUESTION_PATTERN.findall(prompt)
+        ], ensure_ascii=False)
+    if "JSON" in prompt:
+        match = _COUNT_PATTERN.search(prompt)
+        num_questions = int(match.group(1)) if match else 5
+        return json.dumps(build_questions(num_questions), ensure_ascii=False)
+    return build_explanation(explanation_size)
+
+
+def corrupt(content: str, rng: random.Random) -> str:
+    """Làm hỏng phản hồi JSON như mô hình thật đôi khi trả về: bị cắt giữa chừng hoặc có lời dẫn"""
+    if rng.random() < 0.5:
+        return content[:int(len(content) * rng.uniform(0.3, 0.9))]
+    return "Dưới đây là các câu hỏi [đã tạo]:\n```json\n" + content + "\n```\nChúc bạn học tốt!"
+
+
+def make_app(latency: float = 0.5, explanation_size: int = 512, token_latency: float = 0.0, malformed_rate: float = 0.0) -> web.Application:
+    rng = random.Random(0)
+    stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    async def stream_completion(request: web.Request, body, content: str) -> web.StreamResponse:
+        """Trả về nội dung theo định dạng SSE của API stream, từng đoạn 4 token"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        await asyncio.sleep(latency)
+        piece = 16
+        try:
+            for start in range(0, len(content), piece):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": content[start:start + piece]}, "finish_reason": None}],
+                }
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                if token_latency:
+                    await asyncio.sleep(piece / 4 * token_latency)
+            await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            # Client đã đóng stream sớm (đã nhận đủ dữ liệu)
+            pass
+        return response
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        if body.get("stream"):
+            try:
+                content = build_content(body.get("messages", []), explanation_size)
+                return await stream_completion(request, body, content[:body.get("max_tokens", 4000) * 4])
+            finally:
+                stats["in_flight"] -= 1
+        try:
+            content = build_content(body.get("messages", []), explanation_size)
+            if malformed_rate and content.startswith("[") and rng.random() < malformed_rate:
+                content = corrupt(content, rng)
+            # Cắt phản hồi theo max_tokens (ước lượng 4 ký tự/token) giống API thật
+            max_chars = body.get("max_tokens", 4000) * 4
+            finish_reason = "length" if len(content) > max_chars else "stop"
+            content = content[:max_chars]
+            completion_tokens = len(content) // 4
+            await asyncio.sleep(latency + completion_tokens * token_latency)
+        finally:
+            stats["in_flight"] -= 1
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+async def start_server(host: str = "127.0.0.1", port: int = 9000, **kwargs) -> web.AppRunner:
+    """Khởi động máy chủ giả lập trong event loop hiện tại"""
+    runner = web.AppRunner(make_app(**kwargs))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Máy chủ giả lập OpenAI chat completion")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Độ trễ mỗi lời gọi (giây)")
+    parser.add_argument("--explanation-size", type=int, default=512, help="Độ dài lời giải thích (ký tự)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Thời gian sinh mỗi token đầu ra (giây)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Tỉ lệ phản hồi JSON bị làm hỏng")
+    args = parser.parse_args()
+    web.run_app(
+        make_app(args.latency, args.explanation_size, args.token_latency, args.malformed_rate), host=args.host, port=args.port
+    )
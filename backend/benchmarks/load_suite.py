@@ -0,0 +1,176 @@
+"""
+Bộ tải tổng hợp: chạy backend với máy chủ LLM giả lập và một hỗn hợp yêu cầu thực tế.
+
+Mỗi người dùng ảo chọn thao tác tiếp theo theo trọng số của kịch bản (bộ sinh số
+ngẫu nhiên có seed cố định để các lần chạy so sánh được với nhau). Kết quả gồm
+thông lượng, p50/p95/p99 theo endpoint và RSS của tiến trình backend, được ghi ra
+tệp JSON để so sánh giữa các commit bằng compare_results.py.
+
+    python benchmarks/load_suite.py --scenario mixed --duration 30 --output results/mixed.json
+    python benchmarks/compare_results.py results/base.json results/mixed.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from typing import Dict, List
+
+import httpx
+
+from common import BACKEND_DIR, free_port, process_rss_mb, run_backend, summarize
+from fake_llm_server import start_server
+from pdf_fixtures import build_exam_pdf
+
+# Trọng số các thao tác trong từng kịch bản
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    "mixed": {"get-question": 35, "check-answer": 35, "get-explanation": 15, "generate-exam": 10, "upload-exam": 5},
+    "read-heavy": {"get-question": 25, "check-answer": 70, "get-explanation": 5},
+    "ingest": {"generate-exam": 50, "upload-exam": 50},
+}
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, pdf: bytes, exam_size: int):
+        self.client = client
+        self.pdf = pdf
+        self.exam_size = exam_size
+        self.questions: List[Dict] = []
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    async def call(self, operation: str, rng: random.Random):
+        if operation == "get-question":
+            request = self.client.get("/get-question")
+        elif operation == "generate-exam":
+            request = self.client.post("/generate-exam", json={"num_questions": self.exam_size})
+        elif operation == "upload-exam":
+            request = self.client.post("/upload-exam", files={"file": ("exam.pdf", self.pdf, "application/pdf")})
+        else:
+            question = rng.choice(self.questions)
+            path = "/check-answer" if operation == "check-answer" else "/get-explanation"
+            # Khoảng một nửa số câu trả lời đúng
+            answer = question["answer"] if rng.random() < 0.5 else "sai"
+            request = self.client.post(path, json={"question_id": question["id"], "answer": answer})
+
+        start = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok, response = False, None
+        self.latencies.setdefault(operation, []).append(time.perf_counter() - start)
+        if not ok:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+            return
+        if operation in ("get-question", "generate-exam"):
+            body = response.json()
+            self.questions.extend(body if isinstance(body, list) else [body])
+            # Giới hạn danh sách để bộ nhớ của client không ảnh hưởng phép đo
+            del self.questions[:-5000]
+
+    async def user(self, weights: Dict[str, int], seed: int, deadline: float):
+        rng = random.Random(seed)
+        operations, counts = list(weights), list(weights.values())
+        while time.perf_counter() < deadline:
+            await self.call(rng.choices(operations, counts)[0], rng)
+
+
+async def sample_rss(pid: int, samples: List[float], interval: float = 0.5):
+    while True:
+        samples.append(process_rss_mb(pid))
+        await asyncio.sleep(interval)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(base_url, args) -> Dict:
+    weights = SCENARIOS[args.scenario]
+    pdf = build_exam_pdf(args.pdf_pages, seed=args.seed)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        workload = Workload(client, pdf, args.exam_size)
+        # Chuẩn bị sẵn câu hỏi để /check-answer và /get-explanation có ID hợp lệ ngay từ đầu
+        response = await client.post("/generate-exam", json={"num_questions": 20})
+        response.raise_for_status()
+        workload.questions.extend(response.json())
+
+        rss: List[float] = []
+        sampler = asyncio.create_task(sample_rss(base_url.pid, rss))
+        rss_start = process_rss_mb(base_url.pid)
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(workload.user(weights, args.seed * 1000 + i, deadline) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+    endpoints = {}
+    for operation, values in sorted(workload.latencies.items()):
+        endpoints[operation] = {
+            "rps": round(len(values) / elapsed, 2),
+            "errors": workload.errors.get(operation, 0),
+            **summarize(values),
+        }
+    total = sum(len(values) for values in workload.latencies.values())
+    return {
+        "total": {"requests": total, "rps": round(total / elapsed, 2), "errors": sum(workload.errors.values())},
+        "endpoints": endpoints,
+        "rss_mb": {"start": round(rss_start, 1), "peak": round(max(rss, default=rss_start), 1), "end": round(rss[-1] if rss else rss_start, 1)},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.2, help="Độ trễ của LLM giả lập (giây)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Độ trễ thêm cho mỗi token đầu ra (giây)")
+    parser.add_argument("--explanation-size", type=int, default=512, help="Độ dài lời giải thích giả lập (ký tự)")
+    parser.add_argument("--exam-size", type=int, default=10, help="Số câu hỏi mỗi /generate-exam")
+    parser.add_argument("--pdf-pages", type=int, default=5, help="Số trang của tệp PDF cho /upload-exam")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Biến môi trường thêm cho backend")
+    parser.add_argument("--output", help="Tệp JSON ghi kết quả")
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    llm_port = free_port()
+    runner = await start_server(
+        port=llm_port, latency=args.latency, explanation_size=args.explanation_size, token_latency=args.token_latency
+    )
+    try:
+        with run_backend(llm_port, env=env) as base_url:
+            results = await run(base_url, args)
+    finally:
+        await runner.cleanup()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "params": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        **results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
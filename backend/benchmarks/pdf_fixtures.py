@@ -0,0 +1,155 @@
+"""Sinh tệp PDF đề thi mẫu (văn bản hoặc bản scan) cho các benchmark, không cần thư viện ngoài"""
+import random
+import zlib
+from typing import List, Optional, Sequence
+
+try:
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = None
+
+WORDS = ["study", "travel", "weather", "family", "market", "library", "holiday", "science", "music", "garden"]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_text_pdf(pages: List[List[str]]) -> bytes:
+    """Tạo PDF trong đó mỗi trang chứa các dòng văn bản cho trước (chỉ hỗ trợ ký tự Latin-1)"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # /Pages, điền sau khi biết các trang
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        stream = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        for line in lines:
+            stream.append(f"({_escape(line)}) Tj T*")
+        stream.append("ET")
+        data = "\n".join(stream).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    return _write_pdf(objects, page_ids)
+
+
+def _write_pdf(objects: List[Optional[bytes]], page_ids: List[int]) -> bytes:
+    """Ghi các đối tượng thành tệp PDF; đối tượng 1 là /Catalog, đối tượng 2 (/Pages) được điền ở đây"""
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _render_page(lines: List[str], width: int, height: int) -> bytes:
+    """
+    Ảnh xám 8 bit của một trang scan. Có Pillow thì vẽ chữ thật (để OCR đọc được),
+    nếu không thì vẽ các vạch ngang giả lập dòng chữ.
+    """
+    if Image is not None:
+        image = Image.new("L", (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        for number, line in enumerate(lines):
+            draw.text((40, 40 + number * 22), line, fill=0)
+        return image.tobytes()
+    pixels = bytearray(b"\xff" * (width * height))
+    for number, line in enumerate(lines):
+        top = 40 + number * 22
+        for y in range(top, min(top + 10, height)):
+            row = y * width
+            pixels[row + 40:row + 40 + min(len(line) * 6, width - 80)] = b"\x00" * min(len(line) * 6, width - 80)
+    return bytes(pixels)
+
+
+def build_scanned_pdf(pages: List[List[str]], width: int = 850, height: int = 1100) -> bytes:
+    """Tạo PDF trong đó mỗi trang chỉ là một ảnh (như bản scan), không có lớp văn bản"""
+    objects: List[Optional[bytes]] = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    page_ids = []
+    for lines in pages:
+        data = zlib.compress(_render_page(lines, width, height))
+        objects.append(
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (width, height, len(data))
+            + data + b"\nendstream"
+        )
+        image_id = len(objects)
+        content = b"q 595 0 0 842 0 0 cm /Im0 Do Q"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+            % (image_id, content_id)
+        )
+        page_ids.append(len(objects))
+    return _write_pdf(objects, page_ids)
+
+
+STYLES = ("standard", "inline", "vietnamese", "answer_key", "irregular")
+
+
+def exam_lines(first_number: int, count: int, rng: random.Random, style: str = "standard") -> List[str]:
+    """
+    Sinh các dòng của `count` câu hỏi trắc nghiệm theo một bố cục:
+
+    - standard: "1. câu hỏi / A. / B. / C. / D. / Answer: X"
+    - inline: các lựa chọn trên cùng một dòng
+    - vietnamese: "Câu 1: ..." và "Ans: x" (PDF mẫu chỉ hỗ trợ Latin-1 nên không dùng "Đáp án")
+    - answer_key: không có đáp án từng câu, bảng đáp án ở cuối trang
+    - irregular: lựa chọn không đánh chữ cái, không có đáp án (cần LLM)
+    """
+    lines = []
+    key = []
+    for number in range(first_number, first_number + count):
+        words = rng.sample(WORDS, 4)
+        answer = rng.choice("ABCD")
+        text = f"Which word best completes the sentence about {words[0]} number {number}?"
+        if style == "vietnamese":
+            lines.append(f"Câu {number}: {text}")
+        else:
+            lines.append(f"{number}. {text}")
+        if style == "inline":
+            lines.append("   ".join(f"{letter}. {word}" for letter, word in zip("ABCD", words)))
+        elif style == "irregular":
+            lines.append(" / ".join(words))
+        else:
+            lines.extend(f"{letter}. {word}" for letter, word in zip("ABCD", words))
+        if style in ("standard", "inline"):
+            lines.append(f"Answer: {answer}")
+        elif style == "vietnamese":
+            lines.append(f"Ans: {answer.lower()}")
+        key.append(f"{number}-{answer}")
+    if style == "answer_key":
+        lines.append("Answer key")
+        lines.append("  ".join(key))
+    return lines
+
+
+def build_exam_pdf(num_pages: int, questions_per_page: int = 8, seed: int = 42, styles: Sequence[str] = ("standard",)) -> bytes:
+    """Tạo đề thi trắc nghiệm `num_pages` trang, mỗi trang `questions_per_page` câu hỏi, bố cục xoay vòng theo `styles`"""
+    rng = random.Random(seed)
+    pages = [
+        exam_lines(page * questions_per_page + 1, questions_per_page, rng, styles[page % len(styles)])
+        for page in range(num_pages)
+    ]
+    return build_text_pdf(pages)
+
+
+def build_scanned_exam_pdf(num_pages: int, questions_per_page: int = 6, seed: int = 42) -> bytes:
+    """Tạo đề thi trắc nghiệm dạng bản scan (mỗi trang là một ảnh)"""
+    rng = random.Random(seed)
+    return build_scanned_pdf([exam_lines(page * questions_per_page + 1, questions_per_page, rng) for page in range(num_pages)])
@@ -1,37 +1,118 @@
 import asyncio
+import os
 from typing import List, Dict, Any, Optional, Union
-from openai_helper import generate_questions
+from openai_helper import generate_questions, stream_questions
+from question_pool import QuestionPool
+from question_store import QuestionStore
+from sqlite_store import SQLiteQuestionStore
+from vocab_questions import generate_vocab_questions, parse_vocab_topic
+from question_dedup import merge_duplicates
 import uuid
+from metrics import timed
 
-# Danh sách câu hỏi tạm thời để lưu trữ các câu hỏi đã tạo (nếu muốn lưu lại)
-generated_questions = []
+# Chế độ lưu trữ: "memory" (mặc định, mất khi khởi động lại) hoặc "sqlite" (bền vững, dùng chung giữa các worker)
+QUESTION_STORE_BACKEND = os.getenv("QUESTION_STORE_BACKEND", "memory")
 
+def create_question_store(backend: str = QUESTION_STORE_BACKEND):
+    """Tạo kho câu hỏi theo chế độ lưu trữ được chọn"""
+    if backend == "sqlite":
+        return SQLiteQuestionStore(path=os.getenv("QUESTION_DB_PATH", "questions.db"))
+    if backend == "memory":
+        return QuestionStore(
+            capacity=int(os.getenv("QUESTION_STORE_CAPACITY", "100000")),
+            ttl=float(os.getenv("QUESTION_STORE_TTL", "0")),
+        )
+    raise ValueError(f"Chế độ lưu trữ không hợp lệ: {backend}")
+
+# Kho câu hỏi đã tạo, tra cứu theo ID
+question_store = create_question_store()
+
+# Kho câu hỏi tạo sẵn, được bổ sung nền để /get-question và /generate-exam trả lời ngay
+QUESTION_POOL_ENABLED = os.getenv("QUESTION_POOL_ENABLED", "1") == "1"
+question_pool = QuestionPool(
+    generate_questions,
+    low_watermark=int(os.getenv("QUESTION_POOL_LOW_WATERMARK", "10")),
+    batch_size=int(os.getenv("QUESTION_POOL_BATCH_SIZE", "20")),
+    target=int(os.getenv("QUESTION_POOL_TARGET", "40")),
+    min_requests=int(os.getenv("QUESTION_POOL_MIN_REQUESTS", "2")),
+)
+
+async def _draw_questions(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None):
+    # Chủ đề "vocab" / "vocab:<pos>" được sinh cục bộ từ danh sách từ vựng, không qua LLM hay kho tạo sẵn
+    if parse_vocab_topic(topic)[0]:
+        return generate_vocab_questions(num_questions, question_types=question_types, topic=topic)
+    if QUESTION_POOL_ENABLED:
+        return await question_pool.take(num_questions, question_types=question_types, topic=topic)
+    return await generate_questions(num_questions=num_questions, question_types=question_types, topic=topic)
+
+@timed("database")
 async def get_random_question(question_types: Optional[List[str]] = None, topic: Optional[str] = None):
-    """Lấy một câu hỏi ngẫu nhiên do OpenAI tạo"""
-    questions = await generate_questions(num_questions=1, question_types=question_types, topic=topic)
+    """Lấy một câu hỏi ngẫu nhiên do OpenAI tạo (hoặc sinh từ từ vựng với chủ đề "vocab")"""
+    questions = await _draw_questions(1, question_types=question_types, topic=topic)
     if not questions:
         return None
     question = questions[0]
-    generated_questions.append(question)  # Lưu câu hỏi vào danh sách tạm
+    question_store.add(question, topic=topic)  # Lưu câu hỏi vào kho
     return question
 
+@timed("database")
 async def get_random_questions(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None):
     """Lấy nhiều câu hỏi ngẫu nhiên do OpenAI tạo"""
-    questions = await generate_questions(num_questions=num_questions, question_types=question_types, topic=topic)
+    questions = await _draw_questions(num_questions, question_types=question_types, topic=topic)
     if not questions:
         return []
-    generated_questions.extend(questions)  # Lưu các câu hỏi vào danh sách tạm
+    question_store.add_many(questions, topic=topic)  # Lưu cả lô câu hỏi vào kho
     return questions
 
+@timed("database")
+async def stream_random_questions(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None):
+    """Trả về lần lượt num_questions câu hỏi: trước hết từ kho tạo sẵn, phần còn lại sinh theo stream"""
+    if parse_vocab_topic(topic)[0]:
+        questions = generate_vocab_questions(num_questions, question_types=question_types, topic=topic)
+        question_store.add_many(questions, topic=topic)
+        for question in questions:
+            yield question
+        return
+    emitted = 0
+    if QUESTION_POOL_ENABLED:
+        for question in question_pool.take_available(num_questions, question_types=question_types, topic=topic):
+            question_store.add(question, topic=topic)
+            emitted += 1
+            yield question
+    if emitted >= num_questions:
+        return
+    async for question in stream_questions(num_questions - emitted, question_types=question_types, topic=topic):
+        question_store.add(question, topic=topic)
+        yield question
+
+@timed("database")
 def get_question_by_id(question_id: str):
-    """Lấy câu hỏi theo ID từ danh sách đã tạo"""
-    for question in generated_questions:
-        if question["id"] == question_id:
-            return question
-    return None
-
-def add_question(question_data: Dict[str, Any]):
-    """Thêm câu hỏi mới vào danh sách"""
+    """Lấy câu hỏi theo ID từ kho câu hỏi"""
+    return question_store.get(question_id)
+
+@timed("database")
+def get_questions_by_ids(question_ids: List[str]):
+    """Lấy nhiều câu hỏi theo ID trong một lần truy cập kho (None cho ID không tồn tại)"""
+    return question_store.get_many(question_ids)
+
+@timed("database")
+def add_question(question_data: Dict[str, Any], topic: Optional[str] = None):
+    """Thêm câu hỏi mới vào kho; nếu đã có câu trùng nội dung thì dùng lại ID của câu đã có"""
     question_data["id"] = str(uuid.uuid4())
-    generated_questions.append(question_data)
-    return question_data
\ No newline at end of file
+    results, new_questions = merge_duplicates([question_data], question_store.get_many)
+    question_store.add_many(new_questions, topic=topic)
+    return results[0]
+
+@timed("database")
+def add_questions(questions: List[Dict[str, Any]], topic: Optional[str] = None):
+    """
+    Thêm một lô câu hỏi mới vào kho trong một lần ghi.
+
+    Câu trùng nội dung, cùng loại và đáp án với câu đã lưu dùng lại ID cũ (giữ văn bản đã tải lên)
+    thay vì lưu thêm bản mới; trả về danh sách câu hỏi sau khi gộp.
+    """
+    for question in questions:
+        question["id"] = str(uuid.uuid4())
+    results, new_questions = merge_duplicates(questions, question_store.get_many)
+    question_store.add_many(new_questions, topic=topic)
+    return results
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Set, Tuple
+
+from sqlite_db import SQLiteDB
+
+Producer = Callable[[Dict[str, Any]], Awaitable[Optional[str]]]
+
+
+def explanation_key(question: Dict[str, Any], prompt_version: str) -> str:
+    """Khóa nội dung của lời giải thích: băm (type, question, options, answer, phiên bản prompt)"""
+    payload = json.dumps(
+        [question.get("type"), question.get("question"), question.get("options"), question.get("answer"), prompt_version],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _OwnerCancelled(Exception):
+    """Yêu cầu đang tạo lời giải thích bị hủy trước khi xong"""
+
+
+class _DiskTier:
+    """Tầng lưu trữ lời giải thích trên SQLite, giữ lại sau khi khởi động lại"""
+
+    def __init__(self, path: str):
+        self._db = SQLiteDB(
+            path,
+            "CREATE TABLE IF NOT EXISTS explanations (key TEXT PRIMARY KEY, explanation TEXT NOT NULL, created_at REAL NOT NULL)",
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._db.query_one("SELECT explanation FROM explanations WHERE key = ?", (key,))
+        return row[0] if row else None
+
+    def set(self, key: str, explanation: str):
+        self._db.execute(
+            "INSERT OR REPLACE INTO explanations (key, explanation, created_at) VALUES (?, ?, ?)",
+            (key, explanation, time.time()),
+        )
+
+    def close(self):
+        self._db.close()
+
+
+class ExplanationCache:
+    """
+    Bộ nhớ đệm lời giải thích theo nội dung câu hỏi.
+
+    - Tầng bộ nhớ LRU, tầng đĩa SQLite tùy chọn (`disk_path`)
+    - Các yêu cầu đồng thời cho cùng một khóa chỉ tạo một lời gọi LLM
+    - Tạo trước trong nền (`warm`) chạy tối đa `warm_concurrency` câu cùng lúc và bỏ qua khi
+      `is_busy()` báo lớp gọi LLM đang bận, để không chiếm chỗ của yêu cầu người dùng
+    """
+
+    def __init__(
+        self,
+        prompt_version: str,
+        capacity: int = 10_000,
+        disk_path: Optional[str] = None,
+        warm_concurrency: int = 2,
+        is_busy: Optional[Callable[[], bool]] = None,
+    ):
+        self.prompt_version = prompt_version
+        self.capacity = capacity
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.warm_concurrency = warm_concurrency
+        self._is_busy = is_busy or (lambda: False)
+        self._warm_queue: Deque[Tuple[Dict[str, Any], Producer]] = deque()
+        self._warming: Set[asyncio.Task] = set()
+        self._warm_active = 0
+        self.warm_skipped = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, question: Dict[str, Any]) -> Optional[str]:
+        """Tra cứu lời giải thích đã lưu (không gọi LLM)"""
+        return self._lookup(explanation_key(question, self.prompt_version))
+
+    async def get_or_create(self, question: Dict[str, Any], producer: Producer) -> Optional[str]:
+        """Trả về lời giải thích từ bộ đệm, hoặc tạo mới bằng producer nếu chưa có"""
+        key = explanation_key(question, self.prompt_version)
+        while True:
+            explanation = self._lookup(key)
+            if explanation is not None:
+                return explanation
+
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except _OwnerCancelled:
+                # Yêu cầu đang tạo bị hủy (client ngắt kết nối): người chờ đầu tiên tạo lại, số còn lại chờ nó
+                continue
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            explanation = await producer(question)
+            if explanation:
+                self._store(key, explanation)
+            future.set_result(explanation)
+        except asyncio.CancelledError:
+            # Không hủy future dùng chung: người chờ nhận CancelledError sẽ trả lỗi 500 thay vì tạo lại
+            future.set_exception(_OwnerCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Tránh cảnh báo "exception was never retrieved" khi không có ai chờ
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+        return explanation
+
+    def warm(self, questions: Iterable[Dict[str, Any]], producer: Producer):
+        """Xếp hàng tạo trước lời giải thích cho các câu hỏi trong nền (bỏ qua khi lớp gọi LLM đang bận)"""
+        questions = list(questions)
+        if self._is_busy():
+            self.warm_skipped += len(questions)
+            return
+        self._warm_queue.extend((question, producer) for question in questions)
+        while self._warm_queue and len(self._warming) < self.warm_concurrency:
+            task = asyncio.create_task(self._warm_worker())
+            self._warming.add(task)
+            task.add_done_callback(self._warming.discard)
+
+    async def _warm_worker(self):
+        while self._warm_queue:
+            if self._is_busy():
+                # Nhường chỗ cho yêu cầu người dùng: bỏ phần còn lại, lời giải thích sẽ được tạo khi cần
+                self.warm_skipped += len(self._warm_queue)
+                self._warm_queue.clear()
+                return
+            question, producer = self._warm_queue.popleft()
+            self._warm_active += 1
+            try:
+                await self.get_or_create(question, producer)
+            except Exception as e:
+                print(f"Lỗi khi tạo trước lời giải thích: {e}")
+            finally:
+                self._warm_active -= 1
+
+    def _lookup(self, key: str) -> Optional[str]:
+        explanation = self._memory.get(key)
+        if explanation is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return explanation
+        if self._disk is not None:
+            explanation = self._disk.get(key)
+            if explanation is not None:
+                self.disk_hits += 1
+                self._remember(key, explanation)
+                return explanation
+        return None
+
+    def _store(self, key: str, explanation: str):
+        self._remember(key, explanation)
+        if self._disk is not None:
+            self._disk.set(key, explanation)
+
+    def _remember(self, key: str, explanation: str):
+        self._memory[key] = explanation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Trả về số lần trúng/trượt bộ đệm và tỉ lệ trúng"""
+        hits = self.memory_hits + self.disk_hits + self.coalesced
+        total = hits + self.misses
+        return {
+            "size": len(self._memory),
+            "capacity": self.capacity,
+            "disk": self._disk is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "warming": len(self._warm_queue) + self._warm_active,
+            "warm_skipped": self.warm_skipped,
+        }
+
+    def close(self):
+        """Hủy các tác vụ tạo trước đang chạy và đóng tầng đĩa"""
+        self._warm_queue.clear()
+        for task in list(self._warming):
+            task.cancel()
+        if self._disk is not None:
+            self._disk.close()
@@ -0,0 +1,391 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlite_db import SQLiteDB
+
+Workload = Callable[["Job"], Awaitable[Any]]
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """Hàng đợi công việc đã đầy"""
+
+
+class JobCancelledError(Exception):
+    """Công việc bị hủy trước khi hoàn tất (hủy qua API hoặc khi ứng dụng dừng)"""
+
+
+class Job:
+    """Một công việc chạy nền (tạo bài kiểm tra, nhập đề thi PDF...)"""
+
+    def __init__(self, kind: str, workload: Workload, priority: int):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.priority = priority
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        # Mã HTTP của lỗi khi công việc thất bại (HTTPException mang theo status_code)
+        self.status_code: Optional[int] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._workload = workload
+        self._task: Optional[asyncio.Task] = None
+        self._done = asyncio.Event()
+
+    def set_progress(self, done: int, total: int):
+        """Cập nhật tiến độ (done/total) từ bên trong workload"""
+        if total > 0:
+            self.progress = round(min(done / total, 1.0), 4)
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Chờ công việc kết thúc, trả về False nếu hết thời gian chờ"""
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": self.progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def _from_row(cls, row: Tuple) -> "Job":
+        """Ảnh chụp công việc do worker khác chạy, đọc từ cơ sở dữ liệu dùng chung"""
+        job = cls(row[1], None, row[3])
+        (job.id, _, job.status, _, job.progress, job.error, job.status_code, result,
+         job.created_at, job.started_at, job.finished_at) = row
+        job.result = json.loads(result) if result is not None else None
+        if job.status in FINISHED_STATES:
+            job._done.set()
+        return job
+
+    def _finish(self, status: str):
+        self.status = status
+        self.finished_at = time.time()
+        if status == SUCCEEDED:
+            self.progress = 1.0
+        self._done.set()
+
+
+_JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    progress REAL NOT NULL,
+    error TEXT,
+    status_code INTEGER,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished_at);
+"""
+
+_JOB_COLUMNS = "id, kind, status, priority, progress, error, status_code, result, created_at, started_at, finished_at"
+_FINISHED = ", ".join(f"'{state}'" for state in FINISHED_STATES)
+
+
+class _JobDB:
+    """Lưu trạng thái công việc trên SQLite để mọi worker tra cứu và hủy được công việc của nhau"""
+
+    def __init__(self, path: str):
+        self._db = SQLiteDB(path, _JOB_SCHEMA)
+
+    def save(self, job: Job):
+        result = json.dumps(job.result, ensure_ascii=False, default=str) if job.status == SUCCEEDED else None
+        self._db.execute(
+            f"INSERT OR REPLACE INTO jobs ({_JOB_COLUMNS}, cancel_requested) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, "
+            "COALESCE((SELECT cancel_requested FROM jobs WHERE id = ?), 0))",
+            (job.id, job.kind, job.status, job.priority, job.progress, job.error, job.status_code, result,
+             job.created_at, job.started_at, job.finished_at, job.id),
+        )
+
+    def save_progress(self, jobs: List[Job]):
+        self._db.write_many("UPDATE jobs SET progress = ? WHERE id = ?", [(job.progress, job.id) for job in jobs])
+
+    def load(self, job_id: str) -> Optional[Job]:
+        row = self._db.query_one(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+        return Job._from_row(row) if row else None
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Đánh dấu yêu cầu hủy cho worker đang giữ công việc, False nếu không có hoặc đã kết thúc"""
+        return self._db.execute(
+            f"UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status NOT IN ({_FINISHED})", (job_id,)
+        ) > 0
+
+    def cancel_requested(self, job_ids: List[str]) -> List[str]:
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._db.query(f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({placeholders})", job_ids)
+        return [row[0] for row in rows]
+
+    def trim(self, retention: int):
+        # Chỉ loại bỏ công việc đã kết thúc, bắt đầu từ công việc cũ nhất
+        self._db.execute(
+            f"DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status IN ({_FINISHED}) "
+            "ORDER BY finished_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+            (retention,),
+        )
+
+    def close(self):
+        self._db.close()
+
+
+class JobScheduler:
+    """
+    Bộ lập lịch công việc trong tiến trình.
+
+    - Hàng đợi có giới hạn (`max_queue`), công việc có `priority` nhỏ hơn chạy trước
+    - `workers` công việc chạy đồng thời
+    - Hủy được công việc đang chờ hoặc đang chạy
+    - Giữ lại tối đa `retention` công việc đã kết thúc để tra cứu kết quả
+    - Với `db_path`, trạng thái, tiến độ và kết quả được ghi vào SQLite dùng chung, nên worker
+      khác tra cứu, chờ và hủy được công việc (tiến độ và lệnh hủy đồng bộ mỗi `sync_interval` giây)
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 100,
+        retention: int = 1000,
+        db_path: Optional[str] = None,
+        sync_interval: float = 0.5,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retention = retention
+        self.sync_interval = sync_interval
+        self._db = _JobDB(db_path) if db_path else None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Bộ đếm tăng dần để các công việc cùng độ ưu tiên chạy theo thứ tự gửi
+        self._sequence = itertools.count()
+        self._stopping = False
+
+    def start(self):
+        """Khởi động các worker (gọi khi ứng dụng khởi động)"""
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue(maxsize=self.max_queue)
+        if not self._worker_tasks:
+            self._stopping = False
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self._db is not None and self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync())
+
+    async def shutdown(self, grace: float = 0):
+        """Dừng các worker; công việc đang chạy có tối đa `grace` giây để hoàn tất trước khi bị hủy"""
+        running = [job._task for job in self._jobs.values() if job.status == RUNNING and job._task is not None]
+        if running and grace > 0:
+            await asyncio.wait(running, timeout=grace)
+        # Worker thấy công việc và chính nó bị hủy trong cùng một lượt không được nuốt lệnh hủy của mình
+        self._stopping = True
+        for job in self._jobs.values():
+            if job.status in (QUEUED, RUNNING):
+                self.cancel(job.id)
+        tasks = self._worker_tasks + ([self._sync_task] if self._sync_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._sync_task = None
+
+    def submit(self, kind: str, workload: Workload, priority: int = 10) -> Job:
+        """Gửi công việc vào hàng đợi, ném QueueFullError nếu hàng đợi đầy"""
+        self.start()
+        job = Job(kind, workload, priority)
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), job))
+        except asyncio.QueueFull:
+            raise QueueFullError("Hàng đợi công việc đã đầy")
+        self._jobs[job.id] = job
+        self._save(job)
+        self._trim()
+        return job
+
+    async def run(self, kind: str, workload: Workload, priority: int = 0) -> Any:
+        """
+        Gửi công việc và chờ kết quả; ném lại ngoại lệ của workload nếu thất bại,
+        JobCancelledError nếu công việc bị hủy
+        """
+        job = self.submit(kind, workload, priority)
+        try:
+            await job.wait()
+        except asyncio.CancelledError:
+            # Client ngắt kết nối thì không cần tiếp tục công việc
+            self.cancel(job.id)
+            raise
+        if job.status == FAILED and job.exception is not None:
+            raise job.exception
+        if job.status == CANCELLED:
+            raise JobCancelledError("Công việc đã bị hủy")
+        return job.result
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Công việc của worker này, hoặc ảnh chụp từ cơ sở dữ liệu dùng chung nếu worker khác giữ nó"""
+        job = self._jobs.get(job_id)
+        if job is None and self._db is not None:
+            job = self._db.load(job_id)
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Chờ tối đa `timeout` giây cho công việc kết thúc, trả về trạng thái mới nhất"""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        if job_id in self._jobs:
+            await job.wait(timeout)
+            return job
+        # Công việc của worker khác: đọc lại cơ sở dữ liệu sau mỗi `sync_interval`
+        deadline = time.monotonic() + timeout
+        while job is not None and job.status not in FINISHED_STATES and time.monotonic() < deadline:
+            await asyncio.sleep(min(self.sync_interval, max(deadline - time.monotonic(), 0)))
+            job = self._db.load(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Hủy công việc, trả về False nếu không tồn tại hoặc đã kết thúc"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Worker đang giữ công việc sẽ thấy yêu cầu hủy ở lần đồng bộ tiếp theo
+            return self._db is not None and self._db.request_cancel(job_id)
+        if job.status in FINISHED_STATES:
+            return False
+        if job.status == RUNNING and job._task is not None:
+            job._task.cancel()
+        else:
+            # Công việc đang chờ sẽ bị bỏ qua khi worker lấy ra khỏi hàng đợi
+            self._finish(job, CANCELLED)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Trả về số công việc theo trạng thái và độ dài hàng đợi"""
+        counts = {state: 0 for state in (QUEUED, RUNNING) + FINISHED_STATES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.workers,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "jobs": counts,
+        }
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                if job.status == CANCELLED:
+                    continue
+                job.status = RUNNING
+                job.started_at = time.time()
+                self._save(job)
+                job._task = asyncio.create_task(job._workload(job))
+                try:
+                    job.result = await asyncio.shield(job._task)
+                    self._finish(job, SUCCEEDED)
+                except asyncio.CancelledError:
+                    if self._stopping or not job._task.cancelled():
+                        # Chính worker bị hủy (ứng dụng dừng)
+                        job._task.cancel()
+                        self._finish(job, CANCELLED)
+                        raise
+                    self._finish(job, CANCELLED)
+                except Exception as e:
+                    job.exception = e
+                    job.error = str(getattr(e, "detail", e))
+                    job.status_code = getattr(e, "status_code", 500)
+                    self._finish(job, FAILED)
+            finally:
+                self._queue.task_done()
+
+    async def _sync(self):
+        # Ghi tiến độ của công việc đang chạy và nhận lệnh hủy do worker khác ghi vào cơ sở dữ liệu
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            active = [job for job in self._jobs.values() if job.status in (QUEUED, RUNNING)]
+            if not active:
+                continue
+            try:
+                self._db.save_progress([job for job in active if job.status == RUNNING])
+                for job_id in self._db.cancel_requested([job.id for job in active]):
+                    self.cancel(job_id)
+            except Exception as e:
+                print(f"Lỗi khi đồng bộ công việc: {e}")
+
+    def _save(self, job: Job):
+        if self._db is None:
+            return
+        try:
+            self._db.save(job)
+        except Exception as e:
+            print(f"Lỗi khi lưu công việc {job.id}: {e}")
+
+    def _finish(self, job: Job, status: str):
+        job._finish(status)
+        self._save(job)
+        if self._db is not None:
+            try:
+                self._db.trim(self.retention)
+            except Exception as e:
+                print(f"Lỗi khi dọn công việc cũ: {e}")
+
+    def _trim(self):
+        # Chỉ loại bỏ công việc đã kết thúc, bắt đầu từ công việc cũ nhất
+        excess = len(self._jobs) - self.retention
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES][:excess]:
+            del self._jobs[job_id]
+
+
+# Thời gian DELETE /jobs/{id} chờ công việc đang chạy dừng hẳn trước khi trả về trạng thái
+JOB_CANCEL_WAIT = float(os.getenv("JOB_CANCEL_WAIT", "2"))
+
+# Bộ lập lịch dùng chung của ứng dụng cho các công việc gửi qua /jobs/*
+job_scheduler = JobScheduler(
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_queue=int(os.getenv("JOB_MAX_QUEUE", "100")),
+    retention=int(os.getenv("JOB_RETENTION", "1000")),
+    db_path=os.getenv("JOB_DB_PATH") or None,
+    sync_interval=float(os.getenv("JOB_SYNC_INTERVAL", "0.5")),
+)
+
+# Bộ lập lịch riêng cho các endpoint đồng bộ (/generate-exam, /upload-exam) chờ kết quả trong yêu cầu,
+# để giới hạn đồng thời của chúng không phụ thuộc vào công việc nền
+sync_job_scheduler = JobScheduler(
+    workers=int(os.getenv("SYNC_JOB_WORKERS", "4")),
+    max_queue=int(os.getenv("SYNC_JOB_MAX_QUEUE", "100")),
+    retention=int(os.getenv("SYNC_JOB_RETENTION", "100")),
+)
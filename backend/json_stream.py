@@ -0,0 +1,53 @@
+import json
+from typing import Any, Dict, List
+
+
+class JSONObjectStreamParser:
+    """
+    Tách các đối tượng JSON cấp ngoài cùng từ một luồng văn bản đến dần.
+
+    Dùng cho phản hồi dạng mảng `[{...}, {...}]` nhận theo stream: mỗi đối tượng
+    được trả về ngay khi dấu `}` đóng của nó xuất hiện, không cần chờ cả mảng.
+    Các ký tự bao ngoài (```json, dấu `[`, dấu phẩy, lời dẫn) được bỏ qua.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.errors = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Nạp thêm văn bản, trả về các đối tượng vừa hoàn chỉnh"""
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        value = json.loads("".join(self._buffer))
+                    except json.JSONDecodeError:
+                        self.errors += 1
+                    else:
+                        if isinstance(value, dict):
+                            objects.append(value)
+                    self._buffer = []
+        return objects
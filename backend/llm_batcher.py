@@ -0,0 +1,89 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class RequestBatcher:
+    """
+    Gộp các yêu cầu đồng thời thành một lô và xử lý bằng một lời gọi duy nhất.
+
+    Mỗi `submit` đưa một phần tử vào hàng chờ và đợi kết quả của riêng nó. Lô được
+    gửi đi khi đủ `max_batch` phần tử hoặc khi phần tử đầu tiên đã chờ `max_wait` giây.
+    Hàm `process` nhận danh sách phần tử và trả về danh sách kết quả cùng thứ tự;
+    nếu nó phát sinh ngoại lệ, mọi phần tử trong lô nhận ngoại lệ đó.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 8,
+        max_wait: float = 0.02,
+    ):
+        self._process = process
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._items = 0
+        self._batches = 0
+        self._largest = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Đưa một phần tử vào lô kế tiếp và chờ kết quả của nó"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Bỏ các phần tử mà người gọi đã hủy trước khi lô được gửi
+        batch = [(item, future) for item, future in self._pending[:self.max_batch] if not future.done()]
+        del self._pending[:self.max_batch]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        self._items += len(batch)
+        self._batches += 1
+        self._largest = max(self._largest, len(batch))
+        try:
+            results = await self._process([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def shutdown(self):
+        """Chờ các lô đang xử lý kết thúc (dùng khi ứng dụng dừng)"""
+        if self._pending:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Số phần tử, số lô đã gửi và số lời gọi tiết kiệm được nhờ gộp"""
+        return {
+            "max_batch": self.max_batch,
+            "max_wait": self.max_wait,
+            "items": self._items,
+            "batches": self._batches,
+            "calls_saved": self._items - self._batches,
+            "largest_batch": self._largest,
+            "pending": len(self._pending),
+        }
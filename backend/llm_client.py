@@ -0,0 +1,145 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+import openai
+
+from metrics import record_token_usage, timed
+
+# Cấu hình lớp gọi LLM bất đồng bộ (có thể ghi đè bằng biến môi trường)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "100"))
+
+# Semaphore giới hạn số lời gọi LLM đồng thời, session HTTP dùng chung cho mọi lời gọi
+_semaphore: Optional[asyncio.Semaphore] = None
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=LLM_POOL_SIZE, keepalive_timeout=30)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+
+async def startup():
+    """Khởi tạo session HTTP dùng chung khi ứng dụng khởi động"""
+    _get_semaphore()
+    _get_session()
+
+
+async def shutdown():
+    """Đóng session HTTP dùng chung khi ứng dụng dừng"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+@timed("llm_client")
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 1000,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+    prompt: Optional[str] = None,
+) -> str:
+    """
+    Gọi API chat completion mà không chặn event loop.
+
+    Số lời gọi đồng thời bị giới hạn bởi LLM_MAX_CONCURRENCY, mỗi lời gọi có
+    thời gian chờ riêng (mặc định LLM_TIMEOUT giây).
+
+    Args:
+        messages: Danh sách tin nhắn gửi cho mô hình
+        max_tokens: Số token tối đa của phản hồi
+        temperature: Nhiệt độ lấy mẫu
+        timeout: Thời gian chờ tối đa (giây) cho lời gọi này
+        prompt: Tên@phiên bản của mẫu prompt, dùng làm nhãn khi thống kê token
+
+    Returns:
+        Nội dung phản hồi của mô hình (đã loại bỏ khoảng trắng thừa)
+    """
+    timeout = timeout or LLM_TIMEOUT
+    async with _get_semaphore():
+        # aiosession là ContextVar nên cần gán lại trong ngữ cảnh của từng request
+        openai.aiosession.set(_get_session())
+        response = await asyncio.wait_for(
+            openai.ChatCompletion.acreate(
+                model=LLM_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                request_timeout=timeout,
+            ),
+            timeout=timeout,
+        )
+    record_token_usage(response.get("usage"), prompt)
+    return response.choices[0].message.content.strip()
+
+
+@timed("llm_client")
+async def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 1000,
+    temperature: float = 0.7,
+    timeout: Optional[float] = None,
+    prompt: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Gọi API chat completion ở chế độ stream, trả về lần lượt từng đoạn nội dung.
+
+    Lời gọi chiếm một chỗ trong giới hạn LLM_MAX_CONCURRENCY cho đến khi stream kết thúc;
+    `timeout` áp dụng cho thời gian chờ giữa hai đoạn liên tiếp.
+    """
+    timeout = timeout or LLM_TIMEOUT
+    # API stream không trả usage nên chỉ đếm số lời gọi
+    record_token_usage(None, prompt)
+    async with _get_semaphore():
+        openai.aiosession.set(_get_session())
+        response = await asyncio.wait_for(
+            openai.ChatCompletion.acreate(
+                model=LLM_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                request_timeout=timeout,
+                stream=True,
+            ),
+            timeout=timeout,
+        )
+        iterator = response.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), timeout=timeout)
+            except StopAsyncIteration:
+                break
+            content = chunk.choices[0].get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+def is_saturated() -> bool:
+    """True khi mọi chỗ gọi LLM đồng thời đều đang được dùng"""
+    return _get_semaphore().locked()
+
+
+def get_stats() -> Dict[str, Any]:
+    """Trả về trạng thái hiện tại của lớp gọi LLM"""
+    semaphore = _get_semaphore()
+    return {
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "in_flight": LLM_MAX_CONCURRENCY - semaphore._value,
+        "timeout": LLM_TIMEOUT,
+    }
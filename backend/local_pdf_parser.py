@@ -0,0 +1,150 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Dòng bắt đầu câu hỏi: "1.", "12)", "Câu 3:", "Question 4."
+QUESTION_LINE = re.compile(r"^\s*(?:(?:Câu|Question|Q)\s*)?(\d{1,4})\s*[.):]\s*(.*)$", re.IGNORECASE)
+# Dòng bắt đầu bằng một lựa chọn: "A. ...", "b) ..."
+OPTION_LINE = re.compile(r"^\s*[A-Da-d]\s*[.)]\s+")
+# Tách nhiều lựa chọn trên cùng một dòng: "A. cat   B. dog   C. bird"
+INLINE_OPTION = re.compile(r"(?:^|\s+)([A-Da-d])\s*[.)]\s+")
+# Dòng đáp án: "Answer: B", "Đáp án: c", "Key - D"
+ANSWER_LINE = re.compile(r"^\s*(?:Answer|Ans|Đáp án|Key)\s*[:.\-]?\s*([A-Da-d])\s*[.)]?\s*$", re.IGNORECASE)
+# Tiêu đề bảng đáp án ("Answer key", "Đáp án") và các dòng chỉ gồm cặp "1. A", "2-B"
+ANSWER_KEY_HEADER = re.compile(r"^\s*(?:Answer key|Answers|Đáp án)\s*:?\s*$", re.IGNORECASE)
+ANSWER_KEY_LINE = re.compile(r"^\s*(?:\d{1,4}\s*[.):\-]\s*[A-Da-d]\b[\s,;]*)+$")
+ANSWER_KEY_PAIR = re.compile(r"(\d{1,4})\s*[.):\-]\s*([A-Da-d])\b")
+
+# Đoạn văn bản không có câu hỏi đánh số nhưng dài hơn ngưỡng này sẽ được chuyển cho LLM
+MIN_FALLBACK_CHARS = 200
+
+
+def _split_answer_key(lines: List[str], known_key: Optional[Dict[str, str]] = None) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Tách các bảng đáp án (có thể có nhiều, ví dụ cuối mỗi trang) thành dict số câu -> chữ cái.
+
+    Dòng khớp hoàn toàn với `known_key` cũng được coi là bảng đáp án dù thiếu tiêu đề
+    (phần tiếp theo của một bảng đáp án bị cắt sang chunk khác).
+    """
+    body: List[str] = []
+    answer_key: Dict[str, str] = {}
+    in_key = False
+    for line in lines:
+        if ANSWER_KEY_HEADER.match(line):
+            in_key = True
+            continue
+        if ANSWER_KEY_LINE.match(line):
+            pairs = [(number, letter.upper()) for number, letter in ANSWER_KEY_PAIR.findall(line)]
+            if in_key or (known_key and all(known_key.get(number) == letter for number, letter in pairs)):
+                in_key = True
+                answer_key.update(pairs)
+                continue
+        in_key = in_key and not line.strip()
+        body.append(line)
+    return body, answer_key
+
+
+def extract_answer_key(text: str) -> Dict[str, str]:
+    """
+    Bảng đáp án của cả tài liệu (số câu -> chữ cái).
+
+    Gọi trên toàn bộ văn bản trước khi chia chunk, vì bảng đáp án thường nằm ở cuối
+    tài liệu, khác chunk với các câu hỏi của nó.
+    """
+    return _split_answer_key(text.splitlines())[1]
+
+
+def _split_blocks(lines: List[str]) -> Tuple[List[str], List[Tuple[str, str, List[str]]]]:
+    """Chia các dòng thành phần mở đầu và các khối (số câu, dòng đầu, các dòng tiếp theo)"""
+    preamble: List[str] = []
+    blocks: List[Tuple[str, str, List[str]]] = []
+    for line in lines:
+        match = QUESTION_LINE.match(line)
+        if match:
+            blocks.append((match.group(1), match.group(2).strip(), []))
+        elif blocks:
+            blocks[-1][2].append(line)
+        else:
+            preamble.append(line)
+    return preamble, blocks
+
+
+def parse_block(first_line: str, lines: List[str], answer_letter: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Phân tích một khối câu hỏi trắc nghiệm.
+
+    Returns:
+        Câu hỏi theo định dạng Question, hoặc None nếu không đủ chắc chắn
+        (thiếu lựa chọn, chữ cái không liên tiếp, không có đáp án)
+    """
+    question_parts = [first_line] if first_line else []
+    options: List[Tuple[str, str]] = []
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        answer_match = ANSWER_LINE.match(stripped)
+        if answer_match:
+            answer_letter = answer_match.group(1).upper()
+            continue
+        if OPTION_LINE.match(stripped):
+            parts = INLINE_OPTION.split(stripped)
+            # parts = ["", "A", "text", "B", "text", ...]
+            for letter, option_text in zip(parts[1::2], parts[2::2]):
+                options.append((letter.upper(), option_text.strip()))
+        elif options:
+            # Dòng tiếp theo của lựa chọn cuối cùng
+            letter, option_text = options[-1]
+            options[-1] = (letter, f"{option_text} {stripped}")
+        else:
+            question_parts.append(stripped)
+
+    question_text = " ".join(question_parts).strip()
+    letters = [letter for letter, _ in options]
+    if not question_text or len(options) < 2:
+        return None
+    if letters != [chr(ord("A") + i) for i in range(len(letters))]:
+        return None
+    if answer_letter not in letters or any(not text for _, text in options):
+        return None
+    option_texts = [text for _, text in options]
+    return {
+        "id": 0,
+        "type": "multiple_choice",
+        "question": question_text,
+        "options": option_texts,
+        "answer": option_texts[letters.index(answer_letter)],
+    }
+
+
+def parse_questions(text: str, answer_key: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Phân tích văn bản đề thi theo bố cục "1. câu hỏi / A. B. C. D. / Answer: X" mà không cần LLM.
+
+    Args:
+        text: Văn bản trích xuất từ PDF (toàn bộ hoặc một chunk)
+        answer_key: Bảng đáp án của cả tài liệu (extract_answer_key); bảng đáp án nằm
+            ngay trong `text` được ưu tiên khi cùng số câu
+
+    Returns:
+        (danh sách câu hỏi phân tích được, phần văn bản cần chuyển cho LLM)
+    """
+    body, local_key = _split_answer_key(text.splitlines(), answer_key)
+    answer_key = {**(answer_key or {}), **local_key}
+    preamble, blocks = _split_blocks(body)
+
+    if not blocks:
+        stripped = "\n".join(body).strip()
+        return [], stripped if len(stripped) >= MIN_FALLBACK_CHARS else ""
+
+    questions: List[Dict[str, Any]] = []
+    fallback: List[str] = []
+    # Phần mở đầu chứa lựa chọn hoặc đáp án là dấu hiệu bố cục lạ, cần LLM xử lý
+    if any(OPTION_LINE.match(line) or ANSWER_LINE.match(line) for line in preamble):
+        fallback.append("\n".join(preamble))
+    for number, first_line, lines in blocks:
+        question = parse_block(first_line, lines, answer_key.get(number))
+        if question is not None:
+            questions.append(question)
+        else:
+            fallback.append("\n".join([f"{number}. {first_line}"] + lines))
+    return questions, "\n".join(fallback).strip()
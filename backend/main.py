@@ -1,12 +1,25 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, UploadFile, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional, Union
-from pydantic import BaseModel
-from models import Question, Answer, CheckResult, ExamRequest
-from database import get_random_question, get_question_by_id, get_random_questions, add_question
-from services import check_answer, check_answer_with_explanation
-from openai_helper import generate_explanation, parse_pdf_questions
-import uuid
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from functools import partial
+from typing import List, Optional
+from pydantic import ValidationError
+from models import Question, Answer, CheckResult, ExamRequest, JobStatus, ExamSubmission, ExamResult, VocabEntry, VocabPage, ReviewItem
+from database import get_random_question, get_question_by_id, get_questions_by_ids, get_random_questions, stream_random_questions, add_questions, question_pool, question_store, QUESTION_POOL_ENABLED
+from services import check_answer, check_answers, record_reviews, get_explanation, precompute_explanations, explanation_cache
+from openai_helper import explanation_batcher
+from prompts import list_prompts
+from response_parser import get_stats as get_parse_stats
+from question_dedup import get_stats as get_dedup_stats
+from pdf_pipeline import ingest_pdf, shutdown_executor, get_stats as get_pdf_stats
+from vocab import get_vocabulary
+from spaced_repetition import review_scheduler
+from server import SHUTDOWN_GRACE
+from jobs import job_scheduler, sync_job_scheduler, QueueFullError, JobCancelledError, Job, FINISHED_STATES, SUCCEEDED, FAILED, JOB_CANCEL_WAIT
+from metrics import registry, MetricsMiddleware, METRICS_ENABLED
+import llm_client
+import asyncio
+import json
 
 app = FastAPI(title="Hệ Thống Kiểm Tra Kiến Thức")
 
@@ -18,23 +31,141 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Trạng thái của các thành phần, được đọc mỗi lần Prometheus thu thập /metrics
+registry.callback("question_store_size", "Số câu hỏi trong kho", lambda: question_store.stats()["size"])
+registry.callback("question_store_questions", "Số câu hỏi trong kho theo loại", lambda: question_store.stats()["types"], labels=("type",))
+registry.callback("question_store_topics", "Số chủ đề trong kho", lambda: question_store.stats()["topics"])
+registry.callback(
+    "question_store_lookups_total", "Số lần tra cứu câu hỏi theo kết quả",
+    lambda: {"hit": question_store.hits, "miss": question_store.misses}, labels=("result",), kind="counter",
+)
+registry.callback("question_pool_depth", "Số câu hỏi tạo sẵn theo kho", lambda: question_pool.stats()["pools"], labels=("pool",))
+registry.callback(
+    "question_pool_served_total", "Số câu hỏi phục vụ theo nguồn",
+    lambda: {"pool": question_pool.served_from_pool, "direct": question_pool.served_direct}, labels=("source",), kind="counter",
+)
+registry.callback(
+    "explanation_cache_lookups_total", "Số lần tra cứu bộ đệm lời giải thích theo kết quả",
+    lambda: {key: explanation_cache.stats()[key] for key in ("memory_hits", "disk_hits", "coalesced", "misses")},
+    labels=("result",), kind="counter",
+)
+registry.callback("llm_in_flight", "Số lời gọi LLM đang chạy", lambda: llm_client.get_stats()["in_flight"])
+registry.callback(
+    "llm_explanation_batching_total", "Số yêu cầu giải thích và số lời gọi LLM thực tế sau khi gộp",
+    lambda: {"requests": explanation_batcher.get_stats()["items"], "calls": explanation_batcher.get_stats()["batches"]},
+    labels=("kind",), kind="counter",
+)
+registry.callback("job_queue_size", "Số công việc đang chờ", lambda: job_scheduler.stats()["queue_size"])
+registry.callback("jobs", "Số công việc theo trạng thái", lambda: job_scheduler.stats()["jobs"], labels=("status",))
+registry.callback("sync_job_queue_size", "Số yêu cầu đồng bộ đang chờ", lambda: sync_job_scheduler.stats()["queue_size"])
+registry.callback(
+    "pdf_pipeline_chunks_total", "Số chunk PDF theo cách phân tích",
+    lambda: {"total": get_pdf_stats()["chunks"], "llm_fallback": get_pdf_stats()["llm_fallbacks"]}, labels=("kind",), kind="counter",
+)
+registry.callback(
+    "pdf_pages_total", "Số trang PDF theo nguồn văn bản (bộ đệm, trích xuất, OCR, scan không OCR được)",
+    lambda: {
+        source: get_pdf_stats()[f"pages_{source}"] for source in ("cached", "extracted", "ocr", "ocr_unavailable")
+    },
+    labels=("source",), kind="counter",
+)
+registry.callback(
+    "question_dedup_total", "Số câu hỏi theo kết quả so trùng (mới, bị loại khi sinh, gộp khi nhập)",
+    lambda: {action: get_dedup_stats()[action] for action in ("accepted", "rejected", "merged")},
+    labels=("action",), kind="counter",
+)
+registry.callback("review_learners_in_memory", "Số người học có lịch ôn trong bộ nhớ", lambda: review_scheduler.stats()["learners_in_memory"])
+
+@app.on_event("startup")
+async def on_startup():
+    await llm_client.startup()
+    job_scheduler.start()
+    sync_job_scheduler.start()
+    get_vocabulary()
+    if QUESTION_POOL_ENABLED:
+        question_pool.prefill()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Cho công việc đang chạy thời gian hoàn tất trước khi hủy
+    await asyncio.gather(job_scheduler.shutdown(grace=SHUTDOWN_GRACE), sync_job_scheduler.shutdown(grace=SHUTDOWN_GRACE))
+    await question_pool.shutdown()
+    await explanation_batcher.shutdown()
+    await llm_client.shutdown()
+    shutdown_executor()
+    question_store.close()
+    explanation_cache.close()
+    review_scheduler.close()
+
 @app.get("/")
 def read_root():
     return {"message": "Chào mừng đến với API Kiểm Tra Kiến Thức"}
 
 @app.get("/get-question", response_model=Question)
-async def get_question(question_types: Optional[List[str]] = None, topic: Optional[str] = None):
+async def get_question(question_types: Optional[List[str]] = Query(None), topic: Optional[str] = None):
     question = await get_random_question(question_types=question_types, topic=topic)
     if not question:
         raise HTTPException(status_code=404, detail="Không thể tạo câu hỏi")
     return question
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Chỉ số của tiến trình theo định dạng văn bản của Prometheus"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/pool-stats")
+def get_pool_stats():
+    return question_pool.stats()
+
+@app.get("/explanation-cache-stats")
+def get_explanation_cache_stats():
+    return explanation_cache.stats()
+
+@app.get("/pdf-stats")
+def get_pdf_pipeline_stats():
+    """Thống kê nhập PDF: số trang theo nguồn văn bản, bộ đệm trang và trạng thái OCR"""
+    return get_pdf_stats()
+
+@app.get("/dedup-stats")
+def get_question_dedup_stats():
+    """Số câu hỏi bị loại hoặc gộp vì gần trùng và trạng thái chỉ mục MinHash/LSH"""
+    return get_dedup_stats()
+
+@app.get("/llm-stats")
+def get_llm_stats():
+    """Trạng thái lớp gọi LLM, bộ gộp lời giải thích, phân tích phản hồi và các mẫu prompt đang dùng"""
+    return {
+        **llm_client.get_stats(),
+        "explanation_batching": explanation_batcher.get_stats(),
+        "response_parsing": get_parse_stats(),
+        "prompts": list_prompts(),
+    }
+
 @app.post("/check-answer", response_model=CheckResult)
 async def validate_answer(answer_data: Answer):
     question = get_question_by_id(answer_data.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Không tìm thấy câu hỏi")
     result = check_answer(question, answer_data.answer)
+    if answer_data.learner_id:
+        record_reviews(answer_data.learner_id, [answer_data.question_id], [result])
+    return result
+
+@app.post("/check-exam", response_model=ExamResult)
+async def check_exam(submission: ExamSubmission):
+    """Chấm toàn bộ bài kiểm tra trong một yêu cầu"""
+    if not submission.answers:
+        raise HTTPException(status_code=400, detail="Bài làm không có câu trả lời")
+    question_ids = [answer.question_id for answer in submission.answers]
+    questions = get_questions_by_ids(question_ids)
+    result = check_answers(question_ids, questions, [answer.answer for answer in submission.answers])
+    if submission.learner_id:
+        # Câu hỏi không tìm thấy không được đưa vào lịch ôn tập
+        found = [(detail["question_id"], detail) for detail, question in zip(result["details"], questions) if question]
+        record_reviews(submission.learner_id, [qid for qid, _ in found], [detail for _, detail in found])
     return result
 
 @app.post("/get-explanation", response_model=dict)
@@ -42,13 +173,10 @@ async def get_explanation_endpoint(answer_data: Answer):
     question = get_question_by_id(answer_data.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Không tìm thấy câu hỏi")
-    explanation = await generate_explanation(question)
+    explanation = await get_explanation(question)
     return {"explanation": explanation or "Không có giải thích"}
 
-@app.post("/generate-exam", response_model=List[Question])
-async def generate_exam(exam_request: ExamRequest):
-    if exam_request.num_questions <= 0:
-        raise HTTPException(status_code=400, detail="Số lượng câu hỏi phải lớn hơn 0")
+async def _generate_exam_job(exam_request: ExamRequest, job: Job):
     questions = await get_random_questions(
         num_questions=exam_request.num_questions,
         question_types=exam_request.question_types,
@@ -58,6 +186,66 @@ async def generate_exam(exam_request: ExamRequest):
         raise HTTPException(status_code=404, detail="Không thể tạo bài kiểm tra")
     return questions
 
+async def _upload_exam_job(content: bytes, job: Job):
+    questions = await ingest_pdf(content, on_progress=job.set_progress)
+    
+    if not questions:
+        raise HTTPException(status_code=400, detail="Không thể trích xuất câu hỏi từ PDF")
+    
+    # Lưu các câu hỏi vào database trong một lần ghi (câu gần trùng được gộp vào câu đã có)
+    questions = add_questions(questions)
+    # Tạo trước lời giải thích để người học nhận được ngay khi yêu cầu
+    precompute_explanations(questions)
+    
+    return questions
+
+def _submit_job(kind: str, workload, priority: int) -> Job:
+    try:
+        return job_scheduler.submit(kind, workload, priority=priority)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Hệ thống đang bận, vui lòng thử lại sau")
+
+async def _run_job(kind: str, workload):
+    try:
+        return await sync_job_scheduler.run(kind, workload)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Hệ thống đang bận, vui lòng thử lại sau")
+    except JobCancelledError:
+        raise HTTPException(status_code=409, detail="Công việc đã bị hủy")
+
+@app.post("/generate-exam", response_model=List[Question])
+async def generate_exam(exam_request: ExamRequest):
+    if exam_request.num_questions <= 0:
+        raise HTTPException(status_code=400, detail="Số lượng câu hỏi phải lớn hơn 0")
+    return await _run_job("generate_exam", partial(_generate_exam_job, exam_request))
+
+@app.post("/generate-exam/stream")
+async def generate_exam_stream(exam_request: ExamRequest, format: str = "ndjson"):
+    """
+    Tạo bài kiểm tra và trả về từng câu hỏi ngay khi được sinh ra.
+
+    `format=ndjson` (mặc định): mỗi dòng một câu hỏi JSON; `format=sse`: Server-Sent Events.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="Định dạng không hỗ trợ (ndjson hoặc sse)")
+
+    async def events():
+        async for question in stream_random_questions(
+            num_questions=exam_request.num_questions,
+            question_types=exam_request.question_types,
+            topic=exam_request.topic
+        ):
+            try:
+                payload = json.dumps(Question(**question).model_dump(), ensure_ascii=False)
+            except ValidationError:
+                continue
+            yield f"data: {payload}\n\n" if format == "sse" else payload + "\n"
+        if format == "sse":
+            yield "event: end\ndata: {}\n\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
 @app.post("/upload-exam", response_model=List[Question])
 async def upload_exam(file: UploadFile = File(...)):
     if not file.filename.endswith('.pdf'):
@@ -65,18 +253,87 @@ async def upload_exam(file: UploadFile = File(...)):
     
     # Đọc nội dung PDF
     content = await file.read()
-    questions = await parse_pdf_questions(content)
-    
-    if not questions:
-        raise HTTPException(status_code=400, detail="Không thể trích xuất câu hỏi từ PDF")
-    
-    # Lưu các câu hỏi vào database
-    for question in questions:
-        question["id"] = str(uuid.uuid4())
-        add_question(question)
-    
-    return questions
+    return await _run_job("upload_exam", partial(_upload_exam_job, content))
+
+@app.post("/jobs/generate-exam", response_model=JobStatus, status_code=202)
+async def submit_generate_exam(exam_request: ExamRequest, priority: int = 10):
+    job = _submit_job("generate_exam", partial(_generate_exam_job, exam_request), priority)
+    return job.to_dict()
+
+@app.post("/jobs/upload-exam", response_model=JobStatus, status_code=202)
+async def submit_upload_exam(file: UploadFile = File(...), priority: int = 10):
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Chỉ hỗ trợ tệp PDF")
+    content = await file.read()
+    job = _submit_job("upload_exam", partial(_upload_exam_job, content), priority)
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job_status(job_id: str):
+    job = job_scheduler.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Không tìm thấy công việc")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result", response_model=List[Question])
+async def get_job_result(job_id: str, wait: float = 0):
+    """Lấy kết quả công việc; `wait` > 0 để chờ tối đa `wait` giây nếu công việc chưa xong"""
+    job = await job_scheduler.wait(job_id, timeout=min(wait, 60)) if wait > 0 else job_scheduler.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Không tìm thấy công việc")
+    if job.status == SUCCEEDED:
+        return job.result
+    if job.status == FAILED:
+        raise HTTPException(status_code=job.status_code or 500, detail=job.error)
+    if job.status in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail="Công việc đã bị hủy")
+    # Chưa xong: trả về trạng thái hiện tại với mã 202
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    job = job_scheduler.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Không tìm thấy công việc")
+    if job_scheduler.cancel(job_id):
+        # Công việc đang chạy chỉ dừng ở điểm await tiếp theo: chờ ngắn để trả về trạng thái đã hủy
+        job = await job_scheduler.wait(job_id, timeout=JOB_CANCEL_WAIT) or job
+    return job.to_dict()
+
+@app.get("/job-stats")
+def get_job_stats():
+    return {**job_scheduler.stats(), "sync": sync_job_scheduler.stats()}
+
+@app.get("/vocab/search", response_model=VocabPage)
+def search_vocab(q: str, offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    """Tìm từ theo tiếng Anh hoặc nghĩa tiếng Việt (không phân biệt dấu)"""
+    return get_vocabulary().search(q, offset=offset, limit=limit)
+
+@app.get("/vocab/random", response_model=List[VocabEntry])
+def random_vocab(count: int = Query(10, ge=1, le=100), pos: Optional[str] = None):
+    return get_vocabulary().sample(count, pos=pos)
+
+@app.get("/vocab/pos/{pos}", response_model=VocabPage)
+def vocab_by_pos(pos: str, offset: int = Query(0, ge=0), limit: int = Query(20, ge=1, le=100)):
+    return get_vocabulary().by_pos(pos, offset=offset, limit=limit)
+
+@app.get("/review/next", response_model=List[Question])
+async def next_review_questions(learner_id: str, count: int = Query(10, ge=1, le=100)):
+    """Các câu hỏi đã đến hạn ôn của người học, câu đến hạn sớm nhất trước"""
+    due = review_scheduler.next_due(learner_id, count=count)
+    questions = get_questions_by_ids([item["item_id"] for item in due])
+    return [question for question in questions if question]
+
+@app.get("/review/schedule", response_model=List[ReviewItem])
+async def review_schedule(learner_id: str, count: int = Query(10, ge=1, le=100)):
+    return review_scheduler.next_due(learner_id, count=count)
+
+@app.get("/review-stats")
+async def get_review_stats(learner_id: Optional[str] = None):
+    if learner_id:
+        return review_scheduler.learner_stats(learner_id)
+    return review_scheduler.stats()
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    import server
+    server.run()
\ No newline at end of file
@@ -0,0 +1,376 @@
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pyinstrument là tùy chọn, mặc định dùng cProfile
+    Profiler = None
+
+# Cấu hình đo đạc (có thể ghi đè bằng biến môi trường)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+# Các mốc histogram (giây), từ tra cứu bộ nhớ tới lời gọi LLM dài
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Bộ đếm tăng dần theo nhãn"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+
+
+class Histogram:
+    """Histogram độ trễ theo nhãn (bucket tích lũy theo định dạng Prometheus)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # Mỗi bộ nhãn: [đếm theo bucket..., đếm +Inf, tổng]
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels: Any):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), key + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {state[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Chỉ số được tính tại thời điểm thu thập từ hàm `collect` (ví dụ kích thước kho câu hỏi)"""
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Any], labels: Tuple[str, ...] = (), kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.kind = kind
+        self._collect = collect
+
+    def samples(self) -> List[str]:
+        try:
+            value = self._collect()
+        except Exception as e:
+            print(f"Lỗi khi thu thập chỉ số {self.name}: {str(e)}")
+            return []
+        # collect trả về một số, hoặc dict {giá trị nhãn (chuỗi hoặc tuple): số}
+        if not isinstance(value, dict):
+            return [f"{self.name} {float(value)}"]
+        lines = []
+        for key, sample in value.items():
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {float(sample)}")
+        return lines
+
+
+class Registry:
+    """Tập hợp các chỉ số của tiến trình, xuất theo định dạng văn bản của Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric):
+        # Đăng ký lại cùng tên (ví dụ khi nạp lại module) trả về chỉ số đã có
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def callback(self, name: str, documentation: str, collect: Callable[[], Any], labels: Tuple[str, ...] = (), kind: str = "gauge") -> CallbackMetric:
+        self._metrics[name] = metric = CallbackMetric(name, documentation, collect, labels, kind)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Các chỉ số dùng chung của ứng dụng
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Thời gian xử lý yêu cầu HTTP", ("method", "route", "status")
+)
+operation_seconds = registry.histogram(
+    "operation_duration_seconds", "Thời gian của các thao tác trên đường nóng", ("component", "operation")
+)
+operation_errors = registry.counter(
+    "operation_errors_total", "Số thao tác kết thúc bằng ngoại lệ", ("component", "operation")
+)
+llm_tokens = registry.counter(
+    "llm_tokens_total", "Số token của các lời gọi LLM theo usage do API trả về", ("kind", "prompt")
+)
+llm_calls = registry.counter("llm_calls_total", "Số lời gọi LLM theo mẫu prompt", ("prompt",))
+llm_parse_responses = registry.counter(
+    "llm_parse_responses_total", "Số phản hồi sinh câu hỏi đã phân tích theo kết quả (ok, salvaged, failed)", ("result",)
+)
+llm_parse_questions = registry.counter(
+    "llm_parse_questions_total", "Số câu hỏi lấy được từ phản hồi LLM theo kết quả kiểm tra lược đồ", ("outcome",)
+)
+
+
+def timed(component: str, operation: Optional[str] = None):
+    """
+    Decorator ghi thời gian chạy vào operation_duration_seconds{component, operation}.
+
+    Hỗ trợ hàm thường, coroutine và async generator (đo tới khi generator kết thúc).
+    Khi METRICS_ENABLED=0, hàm được trả về nguyên vẹn.
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        name = operation or func.__name__
+
+        def finish(start: float, failed: bool):
+            operation_seconds.observe(time.perf_counter() - start, component=component, operation=name)
+            if failed:
+                operation_errors.inc(component=component, operation=name)
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def asyncgen_wrapper(*args, **kwargs):
+                start, failed = time.perf_counter(), False
+                generator = func(*args, **kwargs)
+                try:
+                    async for item in generator:
+                        yield item
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    # Đóng generator bên trong ngay khi bên gọi dừng sớm để nó giải phóng tài nguyên
+                    await generator.aclose()
+                    finish(start, failed)
+            return asyncgen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start, failed = time.perf_counter(), False
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    failed = True
+                    raise
+                finally:
+                    finish(start, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start, failed = time.perf_counter(), False
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                finish(start, failed)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timer(component: str, operation: str):
+    """Đo một đoạn mã bên trong hàm (ví dụ bước phân tích JSON)"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    with operation_seconds.time(component=component, operation=operation):
+        yield
+
+
+def record_token_usage(usage: Optional[Dict[str, Any]], prompt: Optional[str] = None):
+    """Đếm lời gọi và cộng dồn token từ trường usage của phản hồi chat completion theo mẫu prompt"""
+    if not METRICS_ENABLED:
+        return
+    prompt = prompt or "other"
+    llm_calls.inc(prompt=prompt)
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            llm_tokens.inc(usage[kind], kind=kind.replace("_tokens", ""), prompt=prompt)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI ghi thời gian mỗi yêu cầu theo route (mẫu đường dẫn, không phải đường dẫn thật).
+
+    Khi PROFILING_ENABLED=1, yêu cầu có header `X-Profile: cprofile` (hoặc `1`) hay
+    `X-Profile: pyinstrument` được chạy dưới profiler; kết quả được ghi vào PROFILE_DIR
+    và tên tệp trả về trong header `X-Profile-File`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Any, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+        mode = self._profile_mode(scope)
+        profile_path = None
+        if mode:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            suffix = "html" if mode == "pyinstrument" else "prof"
+            profile_path = os.path.join(PROFILE_DIR, f"{int(time.time())}-{uuid.uuid4().hex[:8]}.{suffix}")
+
+        # None khi không đo hoặc đã có profiler khác đang chạy: khi đó sẽ không có tệp hồ sơ nào
+        profiler = self._start_profiler(mode)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if profiler is not None:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-file", profile_path.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                self._stop_profiler(profiler, mode, profile_path)
+            http_request_seconds.observe(
+                elapsed, method=scope["method"], route=self._route(scope), status=status["code"]
+            )
+
+    def _route(self, scope) -> str:
+        # Router của Starlette ghi endpoint khớp vào scope; đổi sang mẫu đường dẫn để giới hạn số nhãn
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            app = scope.get("app")
+            for candidate in getattr(app, "routes", []):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            route = self._routes[endpoint] = route or "unknown"
+        return route
+
+    @staticmethod
+    def _profile_mode(scope) -> Optional[str]:
+        if not PROFILING_ENABLED:
+            return None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                value = value.decode().strip().lower()
+                if value == "pyinstrument" and Profiler is not None:
+                    return "pyinstrument"
+                if value in ("1", "true", "cprofile", "pyinstrument"):
+                    return "cprofile"
+        return None
+
+    @staticmethod
+    def _start_profiler(mode: Optional[str]):
+        if mode == "pyinstrument":
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            return profiler
+        if mode == "cprofile":
+            # cProfile đo mọi coroutine chạy trên event loop trong thời gian này, không chỉ yêu cầu được chọn
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Đã có một profiler khác đang chạy (yêu cầu đồng thời)
+                return None
+            return profiler
+        return None
+
+    @staticmethod
+    def _stop_profiler(profiler, mode: str, path: str):
+        try:
+            if mode == "pyinstrument":
+                profiler.stop()
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+            else:
+                profiler.disable()
+                profiler.dump_stats(path)
+        except Exception as e:
+            print(f"Lỗi khi ghi kết quả profile: {str(e)}")
@@ -14,6 +14,7 @@ class Answer(BaseModel):
     """Model cho câu trả lời của người dùng"""
     question_id: str
     answer: Union[str, List[str]]
+    learner_id: Optional[str] = None  # Ghi nhận kết quả vào lịch ôn tập của người học (nếu có)
 
 class CheckResult(BaseModel):
     """Model cho kết quả kiểm tra của 1 câu hỏi"""
@@ -27,9 +28,52 @@ class ExamRequest(BaseModel):
     question_types: Optional[List[str]] = None
     topic: Optional[str] = None  # Thêm trường topic
 
+class ExamSubmission(BaseModel):
+    """Model cho bài làm gồm câu trả lời của tất cả câu hỏi trong bài kiểm tra"""
+    answers: List[Answer]
+    learner_id: Optional[str] = None
+
 class ExamResult(BaseModel):
     """Model cho kết quả bài kiểm tra"""
     total_questions: int
     correct_answers: int
     score: float
-    details: List[Dict[str, Any]]
\ No newline at end of file
+    details: List[Dict[str, Any]]
+
+class JobStatus(BaseModel):
+    """Model cho trạng thái của một công việc chạy nền"""
+    id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    priority: int
+    progress: float
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class VocabEntry(BaseModel):
+    """Model cho một mục từ vựng"""
+    english: str
+    vietnamese: List[str]
+    pos: str
+    pronunciation: Optional[str] = None
+    explanation: Optional[str] = None
+
+class VocabPage(BaseModel):
+    """Model cho một trang kết quả từ vựng"""
+    items: List[VocabEntry]
+    total: int
+    offset: int
+    limit: int
+
+
+class ReviewItem(BaseModel):
+    """Model cho lịch ôn tập của một câu hỏi"""
+    item_id: str
+    due: float
+    interval_days: float
+    ease: float
+    reps: int
+    lapses: int
@@ -1,93 +1,170 @@
-import uuid
+import asyncio
 import os
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 import openai
 from dotenv import load_dotenv
-import json
-from pdf_parser import extract_text_from_pdf
+from llm_client import chat_completion, is_saturated, stream_chat_completion
+from json_stream import JSONObjectStreamParser
+from llm_batcher import RequestBatcher
+from prompts import get_prompt
+from response_parser import extract_objects, parse_questions, record_validation, validate_question
+from question_dedup import reject_duplicates
+from metrics import timed, timer
 
 # Cấu hình API key cho OpenAI
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
 
+# Gộp các yêu cầu giải thích đồng thời thành một lời gọi khi mọi chỗ gọi LLM đều bận (bật bằng
+# LLM_BATCH_EXPLANATIONS=1). Mặc định tắt: mô hình sinh từng token, nên một lời gọi gộp N lời giải thích
+# mất gần bằng N lời gọi nối tiếp và làm tăng độ trễ của từng yêu cầu
+LLM_BATCH_EXPLANATIONS = os.getenv("LLM_BATCH_EXPLANATIONS", "0") == "1"
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))
+LLM_BATCH_WAIT_MS = float(os.getenv("LLM_BATCH_WAIT_MS", "20"))
+
+# Số lần yêu cầu sinh lại phần câu hỏi còn thiếu khi phản hồi bị cắt hoặc hỏng (0 = không sinh lại)
+LLM_REGENERATE_ATTEMPTS = int(os.getenv("LLM_REGENERATE_ATTEMPTS", "1"))
+
+# Phiên bản các prompt giải thích thực sự được dùng (dùng trong khóa bộ đệm); đổi phiên bản thì bộ đệm
+# không trả lời giải thích cũ. Khi gộp lô, lời giải thích đến từ explanation_batch, câu thiếu mới gọi lẻ.
+EXPLANATION_PROMPT_VERSION = ",".join(
+    get_prompt(name).key for name in (("explanation", "explanation_batch") if LLM_BATCH_EXPLANATIONS else ("explanation",))
+)
+
 if not api_key:
     print("OpenAI API key chưa được cấu hình")
 else:
     openai.api_key = api_key
 
-async def generate_explanation(question: Dict[str, Any]) -> Optional[str]:
-    """
-    Sử dụng OpenAI để tạo lời giải thích cho câu hỏi
-    """
+# Tên loại câu hỏi và yêu cầu giải thích riêng của từng loại
+_EXPLANATION_KINDS = {
+    "fill_blank": ("câu hỏi điền vào chỗ trống", "Giải thích tại sao đáp án này là đúng và cung cấp thêm thông tin liên quan."),
+    "multiple_choice": ("câu hỏi trắc nghiệm", "Giải thích tại sao đáp án này là đúng và tại sao các đáp án khác là sai."),
+    "sentence_rearrangement": ("câu hỏi sắp xếp câu", "Giải thích tại sao đây là thứ tự đúng và cung cấp thêm thông tin về cấu trúc câu."),
+}
+
+def _answer_text(answer: Any) -> str:
+    return " ".join(answer) if isinstance(answer, list) else str(answer)
+
+def build_explanation_messages(question: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Tạo danh sách tin nhắn yêu cầu giải thích một câu hỏi"""
+    question_type = question["type"]
+    kind, task = _EXPLANATION_KINDS.get(
+        question_type, ("câu hỏi", "Giải thích tại sao đáp án này là đúng và cung cấp thêm thông tin liên quan.")
+    )
+    if question_type == "multiple_choice":
+        details = "Các lựa chọn:\n" + "\n".join(f"- {opt}" for opt in question.get("options") or []) + "\n\n"
+    elif question_type in _EXPLANATION_KINDS:
+        details = ""
+    else:
+        details = f"Loại câu hỏi: {question_type}\n"
+    return get_prompt("explanation").render(
+        kind=kind, question=question["question"], details=details, answer=_answer_text(question["answer"]), task=task
+    )
+
+def build_explanation_batch_messages(questions: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Tạo danh sách tin nhắn yêu cầu giải thích nhiều câu hỏi, đánh số từ 1"""
+    items = []
+    for index, question in enumerate(questions, 1):
+        lines = [f"{index}. [{question['type']}] {question['question']}"]
+        if question["type"] == "multiple_choice" and question.get("options"):
+            lines.append("Lựa chọn: " + "; ".join(question["options"]))
+        lines.append(f"Đáp án đúng: {_answer_text(question['answer'])}")
+        items.append("\n".join(lines))
+    return get_prompt("explanation_batch").render(count=len(questions), items="\n\n".join(items))
+
+async def _explain_one(question: Dict[str, Any]) -> Optional[str]:
     try:
-        question_text = question["question"]
-        question_type = question["type"]
-        correct_answer = question["answer"]
-
-        if question_type == "fill_blank":
-            prompt = f"""
-            Hãy giải thích chi tiết cho câu hỏi điền vào chỗ trống sau:
-
-            Câu hỏi: {question_text}
-            Đáp án đúng: {correct_answer}
-
-            Giải thích tại sao đáp án này là đúng và cung cấp thêm thông tin liên quan.
-            """
-        elif question_type == "multiple_choice":
-            options = question.get("options", [])
-            options_text = "\n".join([f"- {opt}" for opt in options])
-            prompt = f"""
-            Hãy giải thích chi tiết cho câu hỏi trắc nghiệm sau:
-
-            Câu hỏi: {question_text}
-            Các lựa chọn:
-            {options_text}
-
-            Đáp án đúng: {correct_answer}
-
-            Giải thích tại sao đáp án này là đúng và tại sao các đáp án khác là sai.
-            """
-        elif question_type == "sentence_rearrangement":
-            if isinstance(correct_answer, list):
-                correct_answer_text = " ".join(correct_answer)
-            else:
-                correct_answer_text = str(correct_answer)
-            prompt = f"""
-            Hãy giải thích chi tiết cho câu hỏi sắp xếp câu sau:
-
-            Câu hỏi: {question_text}
-            Đáp án đúng: {correct_answer_text}
-
-            Giải thích tại sao đây là thứ tự đúng và cung cấp thêm thông tin về cấu trúc câu.
-            """
-        else:
-            prompt = f"""
-            Hãy giải thích chi tiết cho câu hỏi sau:
-
-            Câu hỏi: {question_text}
-            Loại câu hỏi: {question_type}
-            Đáp án đúng: {correct_answer}
-
-            Giải thích tại sao đáp án này là đúng và cung cấp thêm thông tin liên quan.
-            """
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Bạn là một trợ lý giáo dục, giúp giải thích các câu hỏi một cách rõ ràng và chi tiết bằng tiếng Việt."},
-                {"role": "user", "content": prompt}
-            ],
+        return await chat_completion(
+            messages=build_explanation_messages(question),
             max_tokens=1000,
-            temperature=0.7
+            temperature=0.7,
+            prompt=get_prompt("explanation").key,
         )
-
-        explanation = response.choices[0].message.content.strip()
-        return explanation
-
     except Exception as e:
         print(f"Lỗi khi gọi OpenAI API: {str(e)}")
         return None
 
+@timed("openai_helper", "explain_batch")
+async def _explain_batch(questions: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Giải thích một lô câu hỏi bằng một lời gọi, trả về lời giải thích theo đúng thứ tự.
+
+    Câu nào không có trong phản hồi (JSON hỏng, bị cắt do max_tokens...) được giải thích
+    lại bằng lời gọi riêng.
+    """
+    if len(questions) == 1:
+        return [await _explain_one(questions[0])]
+
+    explanations: Dict[int, str] = {}
+    try:
+        response_text = await chat_completion(
+            messages=build_explanation_batch_messages(questions),
+            max_tokens=1000 * len(questions),
+            temperature=0.7,
+            prompt=get_prompt("explanation_batch").key,
+        )
+        with timer("openai_helper", "json_parse"):
+            for item in extract_objects(response_text)[0]:
+                if not isinstance(item, dict):
+                    continue
+                index, text = item.get("index"), item.get("explanation")
+                if isinstance(index, int) and 1 <= index <= len(questions) and isinstance(text, str) and text.strip():
+                    explanations[index - 1] = text.strip()
+    except Exception as e:
+        print(f"Lỗi khi gọi OpenAI API để giải thích theo lô: {str(e)}")
+
+    missing = [i for i in range(len(questions)) if i not in explanations]
+    if missing:
+        results = await asyncio.gather(*(_explain_one(questions[i]) for i in missing))
+        explanations.update(zip(missing, results))
+    return [explanations[i] for i in range(len(questions))]
+
+# Bộ gộp dùng chung cho mọi lời gọi generate_explanation
+explanation_batcher = RequestBatcher(_explain_batch, max_batch=LLM_BATCH_SIZE, max_wait=LLM_BATCH_WAIT_MS / 1000)
+
+@timed("openai_helper")
+async def generate_explanation(question: Dict[str, Any]) -> Optional[str]:
+    """
+    Sử dụng OpenAI để tạo lời giải thích cho câu hỏi.
+
+    Khi LLM_BATCH_EXPLANATIONS=1 và mọi chỗ gọi LLM đều bận (lời gọi riêng đằng nào cũng phải chờ),
+    các yêu cầu đến trong cùng cửa sổ LLM_BATCH_WAIT_MS được gộp (tối đa LLM_BATCH_SIZE câu) vào
+    một lời gọi rồi tách kết quả cho từng câu.
+    """
+    if LLM_BATCH_EXPLANATIONS and is_saturated():
+        try:
+            return await explanation_batcher.submit(question)
+        except Exception as e:
+            print(f"Lỗi khi gọi OpenAI API: {str(e)}")
+            return None
+    return await _explain_one(question)
+
+def build_questions_messages(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, str]]:
+    """Tạo danh sách tin nhắn (system + user) yêu cầu OpenAI sinh câu hỏi"""
+    # Nếu không chỉ định loại câu hỏi, mặc định sử dụng tất cả
+    if not question_types:
+        question_types = ["fill_blank", "multiple_choice", "sentence_rearrangement"]
+    topic_line = f"Chủ đề của các câu hỏi là: {topic}." if topic else "Chủ đề có thể là bất kỳ lĩnh vực kiến thức chung nào."
+    return get_prompt("questions").render(
+        num_questions=num_questions, question_types=", ".join(question_types), topic_line=topic_line
+    )
+
+async def _request_questions(num_questions: int, question_types: Optional[List[str]], topic: Optional[str]) -> List[Dict[str, Any]]:
+    """Một lời gọi sinh câu hỏi: trả về các câu hỏi hợp lệ (đã gán ID), không gần trùng câu đã có"""
+    response_text = await chat_completion(
+        messages=build_questions_messages(num_questions, question_types, topic),
+        max_tokens=4000,
+        temperature=0.7,
+        prompt=get_prompt("questions").key
+    )
+    with timer("openai_helper", "json_parse"):
+        result = parse_questions(response_text)
+    if result.salvaged or result.invalid:
+        print(f"Phản hồi sinh câu hỏi không hoàn chỉnh: giữ {len(result.questions)}/{num_questions} câu, loại {result.invalid} câu sai lược đồ")
+    return reject_duplicates(result.questions)
+
+@timed("openai_helper")
 async def generate_questions(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Sử dụng OpenAI để tạo danh sách câu hỏi theo số lượng và loại yêu cầu
@@ -98,164 +175,104 @@ async def generate_questions(num_questions: int, question_types: Optional[List[s
         topic: Chủ đề của câu hỏi (nếu có)
 
     Returns:
-        Danh sách các câu hỏi theo định dạng tương tự questions_data
+        Danh sách các câu hỏi theo định dạng tương tự questions_data. Nếu phản hồi hỏng
+        hoặc bị cắt, các câu hợp lệ vẫn được giữ và chỉ phần còn thiếu được yêu cầu lại
+        (tối đa LLM_REGENERATE_ATTEMPTS lần). Câu gần trùng với câu đã có bị bỏ và cũng
+        được tính vào phần còn thiếu.
     """
     try:
-        # Nếu không chỉ định loại câu hỏi, mặc định sử dụng tất cả
-        if not question_types:
-            question_types = ["fill_blank", "multiple_choice", "sentence_rearrangement"]
-
-        # Chuẩn bị prompt cho OpenAI
-        prompt = f"""
-        Bạn là một trợ lý giáo dục, hãy tạo câu hỏi kiểm tra kiến thức theo định dạng JSON.
-        SỐ LƯỢNG CÂU HỎI CẦN TẠO RA: {num_questions} 
-        Các câu hỏi phải thuộc các loại sau: {', '.join(question_types)}.
-        {(f"Chủ đề của các câu hỏi là: {topic}." if topic else "Chủ đề có thể là bất kỳ lĩnh vực kiến thức chung nào.")}
-        
-        Mỗi câu hỏi phải có cấu trúc JSON như sau:
-        - id: số nguyên (tạm thời đặt là 0, sẽ được gán sau)
-        - type: loại câu hỏi (fill_blank, multiple_choice, hoặc sentence_rearrangement)
-        - question: nội dung câu hỏi (chuỗi)
-        - options: danh sách các lựa chọn (cho multiple_choice hoặc sentence_rearrangement, để null cho fill_blank)
-        - answer: đáp án đúng (chuỗi cho fill_blank và multiple_choice, danh sách chuỗi cho sentence_rearrangement)
-
-        Ví dụ:
-        [
-            {{
-                "id": 0,
-                "type": "fill_blank",
-                "question": "The capital of Vietnam is _____.",
-                "options": null,
-                "answer": "Hanoi"
-            }},
-            {{
-                "id": 0,
-                "type": "multiple_choice",
-                "question": "Which is the largest planet in the Solar System?",
-                "options": ["Earth", "Mars", "Jupiter", "Saturn"],
-                "answer": "Jupiter"
-            }},
-            {{
-                "id": 0,
-                "type": "sentence_rearrangement",
-                "question": "Rearrange the following words to form a complete sentence.",
-                "options": ["studying", "I", "university", "am", "at", "a"],
-                "answer": ["I", "am", "studying", "at", "a", "university"]
-            }}
-        ]
-
-        Trả về một mảng JSON chứa {num_questions} câu hỏi, đảm bảo phân bố đều các loại câu hỏi nếu có nhiều loại.
-        Đáp án phải chính xác và câu hỏi phải rõ ràng, phù hợp để kiểm tra kiến thức.
-        """
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Bạn là một trợ lý giáo dục, tạo câu hỏi kiểm tra kiến thức theo định dạng JSON chính xác."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=4000,
-            temperature=0.7
-        )
+        questions = await _request_questions(num_questions, question_types, topic)
+    except Exception as e:
+        print(f"Lỗi khi gọi OpenAI API để tạo câu hỏi: {str(e)}")
+        return []
 
-        # Phân tích phản hồi từ OpenAI
-        response_text = response.choices[0].message.content.strip()
-        
-        # Xử lý để đảm bảo phản hồi là JSON hợp lệ
+    # Chỉ yêu cầu sinh lại phần còn thiếu (phản hồi bị cắt, có câu sai lược đồ...), không sinh lại cả lô
+    for _ in range(LLM_REGENERATE_ATTEMPTS):
+        missing = num_questions - len(questions)
+        if missing <= 0:
+            break
         try:
-            # Loại bỏ các ký tự markdown như ```json nếu có
-            if response_text.startswith("```json"):
-                response_text = response_text[7:-3].strip()
-            questions = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            print(f"Lỗi khi phân tích JSON từ OpenAI: {str(e)}")
-            return []
-
-        # Gán ID duy nhất cho các câu hỏi
-        for question in questions:
-            question["id"] = str(uuid.uuid4())
-
-        return questions
+            questions.extend((await _request_questions(missing, question_types, topic))[:missing])
+        except Exception as e:
+            print(f"Lỗi khi gọi OpenAI API để tạo bổ sung {missing} câu hỏi: {str(e)}")
+            break
+    return questions
+
+@timed("openai_helper")
+async def stream_questions(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Giống generate_questions nhưng nhận phản hồi theo stream và trả về từng câu hỏi
+    ngay khi đối tượng JSON của nó hoàn chỉnh và đúng lược đồ (đã gán ID).
 
+    Args:
+        num_questions: Số lượng câu hỏi cần tạo
+        question_types: Danh sách loại câu hỏi (fill_blank, multiple_choice, sentence_rearrangement)
+        topic: Chủ đề của câu hỏi (nếu có)
+    """
+    parser = JSONObjectStreamParser()
+    emitted = invalid = 0
+    deltas = stream_chat_completion(
+        messages=build_questions_messages(num_questions, question_types, topic),
+        max_tokens=4000,
+        temperature=0.7,
+        prompt=get_prompt("questions").key
+    )
+    try:
+        async for delta in deltas:
+            for item in parser.feed(delta):
+                question = validate_question(item)
+                if question is None:
+                    invalid += 1
+                    continue
+                if not reject_duplicates([question]):
+                    continue
+                yield question
+                emitted += 1
+                if emitted >= num_questions:
+                    return
     except Exception as e:
-        print(f"Lỗi khi gọi OpenAI API để tạo câu hỏi: {str(e)}")
-        return []
+        print(f"Lỗi khi gọi OpenAI API để tạo câu hỏi (stream): {str(e)}")
+    finally:
+        # Đóng stream ngay để giải phóng kết nối và chỗ trong giới hạn đồng thời
+        await deltas.aclose()
+        record_validation(emitted, invalid)
+
+    # Stream kết thúc sớm, có câu sai lược đồ hoặc gần trùng: chỉ yêu cầu thêm phần còn thiếu
+    missing = num_questions - emitted
+    if missing > 0 and LLM_REGENERATE_ATTEMPTS > 0:
+        try:
+            for question in (await _request_questions(missing, question_types, topic))[:missing]:
+                yield question
+        except Exception as e:
+            print(f"Lỗi khi gọi OpenAI API để tạo bổ sung {missing} câu hỏi: {str(e)}")
 
-async def parse_pdf_questions(pdf_content: bytes) -> List[Dict[str, Any]]:
+@timed("openai_helper")
+async def parse_text_questions(pdf_text: str) -> List[Dict[str, Any]]:
     """
-    Phân tích nội dung PDF và chuyển đổi thành danh sách câu hỏi JSON sử dụng OpenAI.
+    Phân tích một đoạn văn bản trích từ PDF thành danh sách câu hỏi JSON sử dụng OpenAI.
 
     Args:
-        pdf_content: Nội dung PDF dưới dạng bytes
+        pdf_text: Văn bản (toàn bộ hoặc một phần) trích xuất từ PDF
 
     Returns:
         Danh sách các câu hỏi theo định dạng Question
     """
     try:
-        # Trích xuất văn bản từ PDF
-        pdf_text = extract_text_from_pdf(pdf_content)
-        if not pdf_text:
-            print("Không thể trích xuất văn bản từ PDF")
-            return []
-
-        # Chuẩn bị prompt cho OpenAI để phân tích văn bản
-        prompt = f"""
-        Bạn là một trợ lý giáo dục, hãy phân tích văn bản sau đây từ một tệp PDF chứa danh sách các câu hỏi trắc nghiệm và chuyển đổi chúng thành định dạng JSON theo cấu trúc được chỉ định. Văn bản có thể chứa các câu hỏi trắc nghiệm với câu hỏi, các lựa chọn, và đáp án đúng.
-
-        Văn bản PDF:
-        ```
-        {pdf_text}
-        ```
-
-        Mỗi câu hỏi phải có cấu trúc JSON như sau:
-        - id: số nguyên (tạm thời đặt là 0, sẽ được gán sau)
-        - type: loại câu hỏi (chỉ sử dụng "multiple_choice" cho các câu hỏi trắc nghiệm)
-        - question: nội dung câu hỏi (chuỗi)
-        - options: danh sách các lựa chọn (mảng chuỗi, ví dụ ["A", "B", "C", "D"])
-        - answer: đáp án đúng (chuỗi, ví dụ "A")
-
-        Ví dụ đầu ra:
-        [
-            {{
-                "id": 0,
-                "type": "multiple_choice",
-                "question": "Which is the largest planet in the Solar System?",
-                "options": ["Earth", "Mars", "Jupiter", "Saturn"],
-                "answer": "Jupiter"
-            }}
-        ]
-
-        Lưu ý:
-        - Chỉ xử lý các câu hỏi trắc nghiệm.
-        - Nếu văn bản không rõ ràng, cố gắng suy ra cấu trúc câu hỏi và đáp án.
-        - Loại bỏ các ký tự không cần thiết hoặc định dạng thừa.
-        - Nếu không tìm thấy đáp án đúng, đặt answer là chuỗi rỗng ("").
-        - Trả về mảng JSON chứa tất cả các câu hỏi trích xuất được.
-
-        Trả về: Một mảng JSON chứa các câu hỏi trắc nghiệm.
-        """
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Bạn là một trợ lý giáo dục, phân tích văn bản và tạo câu hỏi trắc nghiệm theo định dạng JSON chính xác."},
-                {"role": "user", "content": prompt}
-            ],
+        template = get_prompt("pdf_questions")
+        response_text = await chat_completion(
+            messages=template.render(pdf_text=pdf_text),
             max_tokens=4000,
-            temperature=0.7
+            temperature=0.7,
+            prompt=template.key
         )
 
-        # Phân tích phản hồi từ OpenAI
-        response_text = response.choices[0].message.content.strip()
-
-        # Xử lý để đảm bảo phản hồi là JSON hợp lệ
-        try:
-            if response_text.startswith("```json"):
-                response_text = response_text[7:-3].strip()
-            questions = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            print(f"Lỗi khi phân tích JSON từ OpenAI: {str(e)}")
-            return []
-
-        return questions
+        # Giữ mọi câu hỏi hợp lệ kể cả khi mảng JSON bị cắt hoặc có lời dẫn xung quanh,
+        # cùng lời giải thích có sẵn trong đề
+        with timer("openai_helper", "json_parse"):
+            result = parse_questions(response_text, keep_explanation=True)
+        if result.salvaged or result.invalid:
+            print(f"Phản hồi phân tích PDF không hoàn chỉnh: giữ {len(result.questions)} câu, loại {result.invalid} câu sai lược đồ")
+        return result.questions
 
     except Exception as e:
         print(f"Lỗi khi phân tích câu hỏi từ PDF: {str(e)}")
@@ -0,0 +1,135 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from sqlite_db import SQLiteDB
+
+# Tăng khi thay đổi cách trích xuất (thư viện, OCR...) để không dùng lại văn bản cũ
+PAGE_CACHE_VERSION = "1"
+
+
+def file_digest(pdf_content: bytes) -> str:
+    """Băm toàn bộ tệp PDF, dùng để nhận ra ngay một tệp đã tải lên trước đó"""
+    return hashlib.sha256(pdf_content).hexdigest()
+
+
+class _DiskTier:
+    """Tầng lưu văn bản trang trên SQLite, giữ lại sau khi khởi động lại và dùng chung giữa các worker"""
+
+    def __init__(self, path: str):
+        self._db = SQLiteDB(
+            path,
+            "CREATE TABLE IF NOT EXISTS pdf_pages (key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)",
+        )
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found = {}
+        # Giới hạn số tham số của một câu lệnh SQLite
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._db.query(f"SELECT key, text FROM pdf_pages WHERE key IN ({placeholders})", batch))
+        return found
+
+    def set_many(self, items: Dict[str, str]):
+        now = time.time()
+        self._db.write_many(
+            "INSERT OR REPLACE INTO pdf_pages (key, text, created_at) VALUES (?, ?, ?)",
+            [(key, text, now) for key, text in items.items()],
+        )
+
+    def close(self):
+        self._db.close()
+
+
+class PageTextCache:
+    """
+    Bộ đệm văn bản đã trích xuất của từng trang PDF, theo dấu vân tay nội dung trang.
+
+    - Tầng bộ nhớ LRU (`capacity` trang), tầng đĩa SQLite tùy chọn (`disk_path`)
+    - Ghi nhớ danh sách dấu vân tay của các tệp đã gặp (`file_capacity` tệp), nên tải lại
+      đúng tệp cũ không cần mở PDF
+    """
+
+    def __init__(self, capacity: int = 20_000, file_capacity: int = 1_000, disk_path: Optional[str] = None):
+        self.capacity = capacity
+        self.file_capacity = file_capacity
+        self._pages: "OrderedDict[str, str]" = OrderedDict()
+        self._files: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(fingerprint: str) -> str:
+        return f"{PAGE_CACHE_VERSION}:{fingerprint}"
+
+    def get_fingerprints(self, digest: str) -> Optional[List[str]]:
+        fingerprints = self._files.get(digest)
+        if fingerprints is not None:
+            self._files.move_to_end(digest)
+        return fingerprints
+
+    def set_fingerprints(self, digest: str, fingerprints: List[str]):
+        self._files[digest] = fingerprints
+        self._files.move_to_end(digest)
+        while len(self._files) > self.file_capacity:
+            self._files.popitem(last=False)
+
+    def get_many(self, fingerprints: List[str]) -> Dict[str, str]:
+        """Tra cứu nhiều trang cùng lúc, trả về {dấu vân tay: văn bản} của các trang đã có"""
+        found = {}
+        missing = []
+        for fingerprint in set(fingerprints):
+            text = self._pages.get(self._key(fingerprint))
+            if text is None:
+                missing.append(fingerprint)
+            else:
+                self._pages.move_to_end(self._key(fingerprint))
+                found[fingerprint] = text
+        self.hits += len(found)
+        if missing and self._disk is not None:
+            stored = self._disk.get_many([self._key(fingerprint) for fingerprint in missing])
+            for fingerprint in missing:
+                text = stored.get(self._key(fingerprint))
+                if text is not None:
+                    found[fingerprint] = text
+                    self._remember(self._key(fingerprint), text)
+                    self.disk_hits += 1
+        self.misses += len(set(fingerprints)) - len(found)
+        return found
+
+    def set_many(self, texts: Dict[str, str]):
+        if not texts:
+            return
+        keyed = {self._key(fingerprint): text for fingerprint, text in texts.items()}
+        for key, text in keyed.items():
+            self._remember(key, text)
+        if self._disk is not None:
+            self._disk.set_many(keyed)
+
+    def _remember(self, key: str, text: str):
+        self._pages[key] = text
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.capacity:
+            self._pages.popitem(last=False)
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "pages": len(self._pages),
+            "files": len(self._files),
+            "capacity": self.capacity,
+            "disk": self._disk is not None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.disk_hits) / total, 4) if total else 0.0,
+        }
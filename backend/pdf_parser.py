@@ -1,6 +1,24 @@
+import hashlib
 import PyPDF2
 from io import BytesIO
+from typing import List, Optional, Tuple, Union
+from metrics import timed
 
+# OCR cho trang chỉ có ảnh (bản scan) cần pytesseract, Pillow và chương trình tesseract
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+_ocr_available: Optional[bool] = None
+
+# Tệp PDF (đường dẫn) mà tiến trình trích xuất đang đọc: các nhóm trang của cùng một tệp
+# dùng lại PdfReader thay vì nhận lại toàn bộ nội dung PDF qua pickle ở mỗi tác vụ
+_open_document: Tuple[Optional[str], Optional[PyPDF2.PdfReader]] = (None, None)
+
+@timed("pdf_parser")
 def extract_text_from_pdf(pdf_content: bytes) -> str:
     """
     Trích xuất văn bản từ nội dung PDF.
@@ -13,12 +31,121 @@ def extract_text_from_pdf(pdf_content: bytes) -> str:
     """
     try:
         pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_content))
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        return text.strip()
+        texts = [page.extract_text() for page in pdf_reader.pages]
+        return "\n".join(text for text in texts if text).strip()
     except Exception as e:
         print(f"Lỗi khi trích xuất văn bản từ PDF: {str(e)}")
-        return ""
\ No newline at end of file
+        return ""
+
+def open_pdf(source: Union[bytes, str]) -> PyPDF2.PdfReader:
+    """
+    Mở PDF từ nội dung (bytes) hoặc đường dẫn tệp.
+
+    Với đường dẫn, PdfReader của tệp gần nhất được giữ lại trong tiến trình; đường dẫn
+    phải đặt theo nội dung tệp (pdf_pipeline đặt tên theo mã băm) để không đọc nhầm tệp cũ.
+    """
+    global _open_document
+    if isinstance(source, bytes):
+        return PyPDF2.PdfReader(BytesIO(source))
+    if _open_document[0] != source:
+        with open(source, "rb") as f:
+            _open_document = (source, PyPDF2.PdfReader(BytesIO(f.read())))
+    return _open_document[1]
+
+def ocr_available() -> bool:
+    """Kiểm tra (một lần) xem có thể OCR hay không: đã cài pytesseract, Pillow và tesseract"""
+    global _ocr_available
+    if _ocr_available is None:
+        if pytesseract is None:
+            _ocr_available = False
+        else:
+            try:
+                pytesseract.get_tesseract_version()
+                _ocr_available = True
+            except Exception:
+                _ocr_available = False
+    return _ocr_available
+
+def _page_fingerprint(page) -> str:
+    """
+    Băm nội dung của một trang: luồng nội dung, phông chữ và dữ liệu ảnh mà trang dùng.
+
+    Hai trang có cùng dấu vân tay cho cùng văn bản, kể cả khi nằm trong hai tệp khác nhau.
+    """
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    resources = page.get("/Resources")
+    resources = resources.get_object() if resources is not None else {}
+    fonts = resources.get("/Font")
+    for name, ref in sorted((fonts.get_object() if fonts is not None else {}).items()):
+        font = ref.get_object()
+        digest.update(f"{name}:{font.get('/BaseFont')}:{font.get('/Subtype')}".encode())
+        to_unicode = font.get("/ToUnicode")
+        if to_unicode is not None:
+            digest.update(to_unicode.get_object().get_data())
+    xobjects = resources.get("/XObject")
+    for name, ref in sorted((xobjects.get_object() if xobjects is not None else {}).items()):
+        digest.update(name.encode())
+        digest.update(ref.get_object().get_data())
+    return digest.hexdigest()
+
+def _has_images(page) -> bool:
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is None:
+        return False
+    return any(ref.get_object().get("/Subtype") == "/Image" for ref in xobjects.get_object().values())
+
+@timed("pdf_parser")
+def page_fingerprints(pdf_source: Union[bytes, str]) -> List[str]:
+    """Dấu vân tay nội dung của từng trang (rẻ hơn nhiều so với trích xuất văn bản)"""
+    try:
+        return [_page_fingerprint(page) for page in open_pdf(pdf_source).pages]
+    except Exception as e:
+        print(f"Lỗi khi đọc PDF: {str(e)}")
+        return []
+
+@timed("pdf_parser")
+def extract_page_texts(pdf_source: Union[bytes, str], indices: List[int], collect_images: bool = False) -> List[Tuple[int, str, Optional[List[bytes]]]]:
+    """
+    Trích xuất văn bản các trang theo danh sách chỉ số.
+
+    Args:
+        pdf_source: Nội dung PDF (bytes) hoặc đường dẫn tệp PDF
+        indices: Chỉ số các trang cần trích xuất
+        collect_images: Lấy kèm ảnh của các trang không có văn bản để OCR
+
+    Returns:
+        Danh sách (chỉ số trang, văn bản, ảnh cần OCR hoặc None). Ảnh là danh sách rỗng
+        nếu trang chỉ có ảnh nhưng không lấy được ảnh (collect_images=False).
+    """
+    try:
+        pages = open_pdf(pdf_source).pages
+        results = []
+        for index in indices:
+            page = pages[index]
+            text = page.extract_text() or ""
+            images = None
+            if not text.strip() and _has_images(page):
+                images = []
+                if collect_images:
+                    try:
+                        images = [image.data for image in page.images]
+                    except Exception as e:
+                        print(f"Lỗi khi lấy ảnh trang {index} để OCR: {str(e)}")
+            results.append((index, text, images))
+        return results
+    except Exception as e:
+        print(f"Lỗi khi trích xuất văn bản từ PDF: {str(e)}")
+        return [(index, "", None) for index in indices]
+
+@timed("pdf_parser")
+def ocr_images(images: List[bytes], lang: str = "eng") -> str:
+    """Nhận dạng văn bản trong các ảnh của một trang (chạy trong pool OCR)"""
+    texts = []
+    for data in images:
+        with Image.open(BytesIO(data)) as image:
+            texts.append(pytesseract.image_to_string(image, lang=lang))
+    return "\n".join(text.strip() for text in texts if text.strip())
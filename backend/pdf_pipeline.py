@@ -0,0 +1,325 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from local_pdf_parser import extract_answer_key, parse_questions
+from openai_helper import parse_text_questions
+from pdf_page_cache import PageTextCache, file_digest
+from pdf_parser import extract_page_texts, ocr_available, ocr_images, page_fingerprints
+from metrics import timed
+
+# Cấu hình pipeline nhập đề thi từ PDF
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "10"))
+PDF_CHUNK_CHARS = int(os.getenv("PDF_CHUNK_CHARS", "6000"))
+PDF_PARSE_CONCURRENCY = int(os.getenv("PDF_PARSE_CONCURRENCY", "8"))
+PDF_LOCAL_PARSER = os.getenv("PDF_LOCAL_PARSER", "1") == "1"
+PDF_PAGE_CACHE_CAPACITY = int(os.getenv("PDF_PAGE_CACHE_CAPACITY", "20000"))
+PDF_PAGE_CACHE_PATH = os.getenv("PDF_PAGE_CACHE_PATH") or None
+PDF_OCR_ENABLED = os.getenv("PDF_OCR_ENABLED", "1") == "1"
+PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", "2"))
+PDF_OCR_LANG = os.getenv("PDF_OCR_LANG", "eng")
+# Không fork từ tiến trình asyncio nhiều luồng: tiến trình con có thể kế thừa khóa đang bị giữ
+PDF_START_METHOD = os.getenv(
+    "PDF_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+PDF_SPOOL_DIR = os.getenv("PDF_SPOOL_DIR") or tempfile.gettempdir()
+
+# Vị trí bắt đầu một câu hỏi: "1.", "12)", "Câu 3:", "Question 4."
+QUESTION_START = re.compile(r"^\s*(?:(?:Câu|Question|Q)\s*)?\d{1,4}\s*[.):]", re.IGNORECASE | re.MULTILINE)
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Số lượt nhập đang dùng mỗi tệp PDF tạm (cùng tệp tải lên đồng thời dùng chung một tệp tạm)
+_spool_refs: Dict[str, int] = {}
+# Pool OCR giới hạn số trang được nhận dạng đồng thời; mỗi luồng chờ một tiến trình tesseract
+_ocr_executor: Optional[ThreadPoolExecutor] = None
+
+# Văn bản đã trích xuất theo dấu vân tay trang: tải lại cùng tệp (hoặc tệp có trang trùng) không phải trích xuất lại
+page_cache = PageTextCache(capacity=PDF_PAGE_CACHE_CAPACITY, disk_path=PDF_PAGE_CACHE_PATH)
+
+# Bộ đếm của pipeline: số chunk, số câu hỏi phân tích cục bộ và số chunk phải chuyển cho LLM,
+# số trang lấy từ bộ đệm, phải trích xuất, phải OCR và số trang scan không OCR được
+_stats = {
+    "chunks": 0, "local_questions": 0, "llm_questions": 0, "llm_fallbacks": 0,
+    "pages": 0, "pages_cached": 0, "pages_extracted": 0, "pages_ocr": 0, "pages_ocr_unavailable": 0,
+}
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Pool tiến trình dùng chung cho việc trích xuất văn bản PDF (tốn CPU)"""
+    global _executor
+    if _executor is None:
+        context = multiprocessing.get_context(PDF_START_METHOD)
+        if PDF_START_METHOD == "forkserver":
+            context.set_forkserver_preload(["pdf_parser"])
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+    return _executor
+
+
+def get_ocr_executor() -> ThreadPoolExecutor:
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ThreadPoolExecutor(max_workers=PDF_OCR_WORKERS, thread_name_prefix="pdf-ocr")
+    return _ocr_executor
+
+
+def shutdown_executor():
+    global _executor, _ocr_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _ocr_executor is not None:
+        _ocr_executor.shutdown(wait=False, cancel_futures=True)
+        _ocr_executor = None
+    page_cache.close()
+
+
+class _SpooledPDF:
+    """
+    Tệp PDF tạm cho pool trích xuất, chỉ ghi khi cần (lần đầu đọc `path`).
+
+    Tác vụ chỉ nhận đường dẫn thay vì toàn bộ nội dung PDF qua pickle; mỗi tiến trình
+    đọc tệp một lần và dùng lại cho mọi nhóm trang (pdf_parser.open_pdf). Tên tệp theo
+    mã băm nội dung nên không bao giờ trỏ tới nội dung khác.
+    """
+
+    def __init__(self, pdf_content: bytes, digest: str):
+        self._content = pdf_content
+        self._path = os.path.join(PDF_SPOOL_DIR, f"pdf-{os.getpid()}-{digest}.pdf")
+        self._acquired = False
+
+    @property
+    def path(self) -> str:
+        if not self._acquired:
+            if not _spool_refs.get(self._path):
+                partial_path = f"{self._path}.tmp"
+                with open(partial_path, "wb") as f:
+                    f.write(self._content)
+                os.replace(partial_path, self._path)
+            _spool_refs[self._path] = _spool_refs.get(self._path, 0) + 1
+            self._acquired = True
+        return self._path
+
+    def close(self):
+        if not self._acquired:
+            return
+        self._acquired = False
+        _spool_refs[self._path] -= 1
+        if not _spool_refs[self._path]:
+            del _spool_refs[self._path]
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+
+
+async def stream_pages(pdf_content: bytes, on_page_count: Optional[Callable[[int], None]] = None) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Trả về lần lượt (chỉ số trang, văn bản) theo đúng thứ tự trang. Nếu có on_page_count,
+    hàm được gọi một lần với tổng số trang trước khi trả về trang đầu tiên.
+
+    Trang đã gặp (theo dấu vân tay nội dung) lấy từ bộ đệm; các trang còn lại được
+    trích xuất song song trong pool tiến trình, mỗi nội dung trang chỉ một lần. Trang chỉ
+    có ảnh (bản scan) được chuyển sang pool OCR nếu OCR khả dụng.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    digest = file_digest(pdf_content)
+    spool = _SpooledPDF(pdf_content, digest)
+    futures: List[asyncio.Future] = []
+    ocr_futures: Dict[str, asyncio.Future] = {}
+    try:
+        fingerprints = page_cache.get_fingerprints(digest)
+        if fingerprints is None:
+            fingerprints = await loop.run_in_executor(executor, page_fingerprints, spool.path)
+            if fingerprints:
+                page_cache.set_fingerprints(digest, fingerprints)
+        if on_page_count is not None:
+            on_page_count(len(fingerprints))
+
+        texts = page_cache.get_many(fingerprints)
+        _stats["pages"] += len(fingerprints)
+        _stats["pages_cached"] += sum(1 for fingerprint in fingerprints if fingerprint in texts)
+
+        # Mỗi nội dung trang chưa có trong bộ đệm chỉ được trích xuất một lần (trang lặp lại trong cùng tệp)
+        first_index: Dict[str, int] = {}
+        for index, fingerprint in enumerate(fingerprints):
+            if fingerprint not in texts:
+                first_index.setdefault(fingerprint, index)
+        missing = sorted(first_index.values())
+        collect_images = PDF_OCR_ENABLED and ocr_available()
+        groups = [missing[i:i + PDF_PAGES_PER_TASK] for i in range(0, len(missing), PDF_PAGES_PER_TASK)]
+        futures.extend(loop.run_in_executor(executor, extract_page_texts, spool.path, group, collect_images) for group in groups)
+        group_of = {index: number for number, group in enumerate(groups) for index in group}
+        processed = set()
+
+        def process(number: int):
+            """Ghi kết quả của một nhóm trang vào bộ đệm, chuyển các trang scan sang pool OCR"""
+            processed.add(number)
+            extracted = {}
+            for index, text, images in futures[number].result():
+                fingerprint = fingerprints[index]
+                if images is None:
+                    extracted[fingerprint] = text
+                elif images:
+                    ocr_futures[fingerprint] = loop.run_in_executor(get_ocr_executor(), ocr_images, images, PDF_OCR_LANG)
+                else:
+                    # Trang scan nhưng không OCR được: không lưu để lần sau (khi có OCR) còn trích xuất lại
+                    _stats["pages_ocr_unavailable"] += 1
+                    texts[fingerprint] = ""
+            _stats["pages_extracted"] += len(extracted)
+            texts.update(extracted)
+            page_cache.set_many(extracted)
+
+        for index, fingerprint in enumerate(fingerprints):
+            if fingerprint not in texts and fingerprint not in ocr_futures:
+                number = group_of[first_index[fingerprint]]
+                await futures[number]
+                # Xử lý luôn các nhóm khác đã xong để OCR của chúng bắt đầu sớm
+                for other, future in enumerate(futures):
+                    if other not in processed and (other == number or future.done()):
+                        process(other)
+            if fingerprint in ocr_futures:
+                try:
+                    text = await ocr_futures.pop(fingerprint)
+                    page_cache.set_many({fingerprint: text})
+                    _stats["pages_ocr"] += 1
+                except Exception as e:
+                    print(f"Lỗi khi OCR trang {index}: {str(e)}")
+                    text = ""
+                texts[fingerprint] = text
+            yield index, texts[fingerprint]
+    finally:
+        for future in futures + list(ocr_futures.values()):
+            future.cancel()
+        spool.close()
+
+
+def split_chunk(buffer: str, max_chars: int) -> Tuple[str, str]:
+    """
+    Cắt phần đầu của buffer thành một chunk không quá max_chars, tại ranh giới
+    bắt đầu câu hỏi gần nhất để không tách rời một câu hỏi.
+
+    Returns:
+        (chunk, phần còn lại)
+    """
+    cut = 0
+    for match in QUESTION_START.finditer(buffer, 0, max_chars + 1):
+        if match.start() > 0:
+            cut = match.start()
+    if cut == 0:
+        # Không có ranh giới câu hỏi, cắt tại dòng cuối cùng trong giới hạn
+        cut = buffer.rfind("\n", 0, max_chars) + 1 or max_chars
+    return buffer[:cut], buffer[cut:]
+
+
+async def iter_chunks(pages: AsyncIterator[Tuple[int, str]], max_chars: int = PDF_CHUNK_CHARS) -> AsyncIterator[str]:
+    """Gom văn bản các trang thành những chunk căn theo ranh giới câu hỏi"""
+    buffer = ""
+    async for _, text in pages:
+        if not text:
+            continue
+        buffer += text + "\n"
+        while len(buffer) > max_chars:
+            chunk, buffer = split_chunk(buffer, max_chars)
+            if chunk.strip():
+                yield chunk
+    if buffer.strip():
+        yield buffer
+
+
+def _dedup_key(question: Dict[str, Any]) -> Tuple:
+    text = " ".join(str(question.get("question", "")).lower().split())
+    options = tuple(" ".join(str(opt).lower().split()) for opt in (question.get("options") or []))
+    return text, options
+
+
+def merge_questions(chunk_results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Gộp kết quả các chunk theo thứ tự, loại bỏ câu hỏi trùng lặp (ví dụ nằm ở ranh giới chunk)"""
+    seen = set()
+    merged = []
+    for questions in chunk_results:
+        for question in questions:
+            if not isinstance(question, dict) or not question.get("question"):
+                continue
+            key = _dedup_key(question)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(question)
+    return merged
+
+
+@timed("pdf_pipeline")
+async def ingest_pdf(pdf_content: bytes, on_progress: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Nhập đề thi từ PDF: trích xuất trang song song -> chia chunk theo câu hỏi -> đọc bảng đáp án
+    của cả tài liệu -> phân tích các chunk (cục bộ, phần còn lại bằng LLM đồng thời, giới hạn
+    PDF_PARSE_CONCURRENCY) -> gộp và khử trùng lặp.
+
+    Args:
+        pdf_content: Nội dung PDF dưới dạng bytes
+        on_progress: Hàm nhận (số phần đã xong, tổng số phần). Mỗi trang tính một phần khi trích xuất
+            và một phần khi phân tích (chia theo số chunk đã xong), nên tổng không đổi và tiến độ không giảm
+
+    Returns:
+        Danh sách các câu hỏi theo định dạng Question
+    """
+    semaphore = asyncio.Semaphore(PDF_PARSE_CONCURRENCY)
+
+    async def parse_chunk(chunk: str) -> List[Dict[str, Any]]:
+        _stats["chunks"] += 1
+        questions, rest = parse_questions(chunk, answer_key) if PDF_LOCAL_PARSER else ([], chunk)
+        _stats["local_questions"] += len(questions)
+        if rest:
+            # Chỉ những phần không phân tích chắc chắn được mới cần gọi LLM
+            _stats["llm_fallbacks"] += 1
+            async with semaphore:
+                fallback_questions = await parse_text_questions(rest)
+            _stats["llm_questions"] += len(fallback_questions)
+            questions.extend(fallback_questions)
+        completed[0] += 1
+        report(page_count[0] + completed[0] * page_count[0] // len(tasks))
+        return questions
+
+    def report(done: int):
+        if on_progress is not None and page_count[0]:
+            on_progress(done, 2 * page_count[0])
+
+    def set_page_count(count: int):
+        page_count[0] = count
+
+    async def pages() -> AsyncIterator[Tuple[int, str]]:
+        async for index, text in stream_pages(pdf_content, on_page_count=set_page_count):
+            report(index + 1)
+            yield index, text
+
+    tasks = []
+    completed = [0]
+    page_count = [0]
+    try:
+        chunks = [chunk async for chunk in iter_chunks(pages())]
+        # Bảng đáp án thường nằm cuối tài liệu, khác chunk với câu hỏi, nên phải đọc xong cả tài liệu
+        # trước khi phân tích; việc trích xuất trang vẫn song song trong pool tiến trình
+        answer_key = extract_answer_key("".join(chunks)) if PDF_LOCAL_PARSER else {}
+        tasks = [asyncio.create_task(parse_chunk(chunk)) for chunk in chunks]
+        results = await asyncio.gather(*tasks)
+    except Exception as e:
+        for task in tasks:
+            task.cancel()
+        print(f"Lỗi khi nhập đề thi từ PDF: {str(e)}")
+        return []
+    return merge_questions(results)
+
+
+def get_stats() -> Dict[str, Any]:
+    """Trả về các bộ đếm của pipeline nhập PDF và bộ đệm trang"""
+    stats = dict(_stats)
+    stats["fallback_rate"] = round(_stats["llm_fallbacks"] / _stats["chunks"], 4) if _stats["chunks"] else 0.0
+    stats["ocr_available"] = PDF_OCR_ENABLED and ocr_available()
+    stats["page_cache"] = page_cache.stats()
+    return stats
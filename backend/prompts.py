@@ -0,0 +1,208 @@
+import os
+from typing import Dict, List, Optional
+
+
+class PromptTemplate:
+    """
+    Một mẫu prompt có phiên bản: tin nhắn system và user với các chỗ giữ chỗ kiểu str.format.
+
+    Dấu ngoặc nhọn thật trong mẫu (ví dụ ví dụ JSON) phải được viết thành {{ }}.
+    """
+
+    def __init__(self, name: str, version: str, system: str, user: str):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.user = user
+
+    @property
+    def key(self) -> str:
+        """Tên kèm phiên bản, dùng làm nhãn khi thống kê token"""
+        return f"{self.name}@{self.version}"
+
+    def render(self, **params) -> List[Dict[str, str]]:
+        """Tạo danh sách tin nhắn (system + user) gửi cho mô hình"""
+        return [
+            {"role": "system", "content": self.system.format(**params)},
+            {"role": "user", "content": self.user.format(**params)},
+        ]
+
+
+# Sổ đăng ký mẫu prompt: tên -> phiên bản -> mẫu
+_REGISTRY: Dict[str, Dict[str, PromptTemplate]] = {}
+# Phiên bản dùng mặc định của từng mẫu (ghi đè bằng biến môi trường PROMPT_<TÊN>_VERSION)
+_DEFAULT_VERSIONS: Dict[str, str] = {}
+
+
+def register(template: PromptTemplate, default: bool = False) -> PromptTemplate:
+    """Đăng ký một phiên bản mẫu prompt; `default=True` để dùng phiên bản này khi không chỉ định"""
+    _REGISTRY.setdefault(template.name, {})[template.version] = template
+    if default or template.name not in _DEFAULT_VERSIONS:
+        _DEFAULT_VERSIONS[template.name] = template.version
+    return template
+
+
+def get_prompt(name: str, version: Optional[str] = None) -> PromptTemplate:
+    """
+    Lấy mẫu prompt theo tên và phiên bản.
+
+    Khi không chỉ định phiên bản, dùng biến môi trường PROMPT_<TÊN>_VERSION
+    (ví dụ PROMPT_QUESTIONS_VERSION=1) hoặc phiên bản mặc định đã đăng ký.
+    """
+    versions = _REGISTRY.get(name)
+    if not versions:
+        raise KeyError(f"Không có mẫu prompt '{name}'")
+    version = version or os.getenv(f"PROMPT_{name.upper()}_VERSION") or _DEFAULT_VERSIONS[name]
+    if version not in versions:
+        raise KeyError(f"Mẫu prompt '{name}' không có phiên bản '{version}'")
+    return versions[version]
+
+
+def list_prompts() -> Dict[str, Dict[str, object]]:
+    """Trả về các mẫu đã đăng ký, phiên bản đang dùng và độ dài (ký tự) của từng phiên bản"""
+    result = {}
+    for name, versions in _REGISTRY.items():
+        result[name] = {
+            "active": get_prompt(name).version,
+            "versions": {v: len(t.system) + len(t.user) for v, t in versions.items()},
+        }
+    return result
+
+
+# Sinh câu hỏi, phiên bản 1: prompt ban đầu với ba ví dụ đầy đủ (~1 KB mỗi lời gọi)
+register(PromptTemplate(
+    "questions", "1",
+    system="Bạn là một trợ lý giáo dục, tạo câu hỏi kiểm tra kiến thức theo định dạng JSON chính xác.",
+    user="""
+    Bạn là một trợ lý giáo dục, hãy tạo câu hỏi kiểm tra kiến thức theo định dạng JSON.
+    SỐ LƯỢNG CÂU HỎI CẦN TẠO RA: {num_questions}
+    Các câu hỏi phải thuộc các loại sau: {question_types}.
+    {topic_line}
+
+    Mỗi câu hỏi phải có cấu trúc JSON như sau:
+    - id: số nguyên (tạm thời đặt là 0, sẽ được gán sau)
+    - type: loại câu hỏi (fill_blank, multiple_choice, hoặc sentence_rearrangement)
+    - question: nội dung câu hỏi (chuỗi)
+    - options: danh sách các lựa chọn (cho multiple_choice hoặc sentence_rearrangement, để null cho fill_blank)
+    - answer: đáp án đúng (chuỗi cho fill_blank và multiple_choice, danh sách chuỗi cho sentence_rearrangement)
+
+    Ví dụ:
+    [
+        {{
+            "id": 0,
+            "type": "fill_blank",
+            "question": "The capital of Vietnam is _____.",
+            "options": null,
+            "answer": "Hanoi"
+        }},
+        {{
+            "id": 0,
+            "type": "multiple_choice",
+            "question": "Which is the largest planet in the Solar System?",
+            "options": ["Earth", "Mars", "Jupiter", "Saturn"],
+            "answer": "Jupiter"
+        }},
+        {{
+            "id": 0,
+            "type": "sentence_rearrangement",
+            "question": "Rearrange the following words to form a complete sentence.",
+            "options": ["studying", "I", "university", "am", "at", "a"],
+            "answer": ["I", "am", "studying", "at", "a", "university"]
+        }}
+    ]
+
+    Trả về một mảng JSON chứa {num_questions} câu hỏi, đảm bảo phân bố đều các loại câu hỏi nếu có nhiều loại.
+    Đáp án phải chính xác và câu hỏi phải rõ ràng, phù hợp để kiểm tra kiến thức.
+    """,
+))
+
+# Sinh câu hỏi, phiên bản 2: lược đồ gọn trong system (không đổi giữa các lời gọi nên
+# hưởng được bộ đệm prompt của nhà cung cấp), phần user chỉ còn tham số
+register(PromptTemplate(
+    "questions", "2",
+    system=(
+        "Bạn tạo câu hỏi kiểm tra kiến thức. Chỉ trả về một mảng JSON, mỗi phần tử có dạng "
+        '{{"id":0,"type":"fill_blank|multiple_choice|sentence_rearrangement","question":"...","options":[...]|null,"answer":...}}.\n'
+        'fill_blank: options null, chỗ trống là "_____", answer là chuỗi.\n'
+        "multiple_choice: 4 lựa chọn, answer là một trong các lựa chọn.\n"
+        "sentence_rearrangement: options là các từ đã xáo trộn, answer là mảng các từ theo thứ tự đúng.\n"
+        "Phân bố đều các loại được yêu cầu; câu hỏi rõ ràng, đáp án chính xác."
+    ),
+    user="SỐ LƯỢNG CÂU HỎI CẦN TẠO RA: {num_questions}\nLoại: {question_types}\n{topic_line}",
+), default=True)
+
+# Giải thích một câu hỏi, phiên bản 1: prompt ban đầu viết trực tiếp trong openai_helper;
+# {details} là phần lựa chọn/loại câu hỏi, {task} là yêu cầu theo loại
+register(PromptTemplate(
+    "explanation", "1",
+    system="Bạn là một trợ lý giáo dục, giúp giải thích các câu hỏi một cách rõ ràng và chi tiết bằng tiếng Việt.",
+    user="""
+    Hãy giải thích chi tiết cho {kind} sau:
+
+    Câu hỏi: {question}
+    {details}Đáp án đúng: {answer}
+
+    {task}
+    """,
+))
+
+# Giải thích một câu hỏi, phiên bản 2: cùng nội dung, bỏ thụt lề và dòng trống thừa
+register(PromptTemplate(
+    "explanation", "2",
+    system="Bạn là một trợ lý giáo dục, giúp giải thích các câu hỏi một cách rõ ràng và chi tiết bằng tiếng Việt.",
+    user="Hãy giải thích chi tiết cho {kind} sau:\n\nCâu hỏi: {question}\n{details}Đáp án đúng: {answer}\n\n{task}",
+), default=True)
+
+# Giải thích nhiều câu hỏi trong một lời gọi; kết quả là mảng JSON theo số thứ tự
+register(PromptTemplate(
+    "explanation_batch", "1",
+    system="Bạn là một trợ lý giáo dục, giúp giải thích các câu hỏi một cách rõ ràng và chi tiết bằng tiếng Việt.",
+    user=(
+        "Giải thích chi tiết từng câu hỏi dưới đây: vì sao đáp án đúng là đúng, vì sao các lựa chọn khác sai (nếu có), "
+        "kèm thông tin liên quan.\n"
+        "SỐ LƯỢNG LỜI GIẢI THÍCH: {count}\n"
+        'Chỉ trả về một mảng JSON theo đúng thứ tự: [{{"index":1,"explanation":"..."}}, ...]\n\n'
+        "{items}"
+    ),
+))
+
+# Trích câu hỏi trắc nghiệm từ văn bản PDF
+register(PromptTemplate(
+    "pdf_questions", "1",
+    system="Bạn là một trợ lý giáo dục, phân tích văn bản và tạo câu hỏi trắc nghiệm theo định dạng JSON chính xác.",
+    user="""
+        Bạn là một trợ lý giáo dục, hãy phân tích văn bản sau đây từ một tệp PDF chứa danh sách các câu hỏi trắc nghiệm và chuyển đổi chúng thành định dạng JSON theo cấu trúc được chỉ định. Văn bản có thể chứa các câu hỏi trắc nghiệm với câu hỏi, các lựa chọn, và đáp án đúng.
+
+        Văn bản PDF:
+        ```
+        {pdf_text}
+        ```
+
+        Mỗi câu hỏi phải có cấu trúc JSON như sau:
+        - id: số nguyên (tạm thời đặt là 0, sẽ được gán sau)
+        - type: loại câu hỏi (chỉ sử dụng "multiple_choice" cho các câu hỏi trắc nghiệm)
+        - question: nội dung câu hỏi (chuỗi)
+        - options: danh sách các lựa chọn (mảng chuỗi, ví dụ ["A", "B", "C", "D"])
+        - answer: đáp án đúng (chuỗi, ví dụ "A")
+
+        Ví dụ đầu ra:
+        [
+            {{
+                "id": 0,
+                "type": "multiple_choice",
+                "question": "Which is the largest planet in the Solar System?",
+                "options": ["Earth", "Mars", "Jupiter", "Saturn"],
+                "answer": "Jupiter"
+            }}
+        ]
+
+        Lưu ý:
+        - Chỉ xử lý các câu hỏi trắc nghiệm.
+        - Nếu văn bản không rõ ràng, cố gắng suy ra cấu trúc câu hỏi và đáp án.
+        - Loại bỏ các ký tự không cần thiết hoặc định dạng thừa.
+        - Nếu không tìm thấy đáp án đúng, đặt answer là chuỗi rỗng ("").
+        - Trả về mảng JSON chứa tất cả các câu hỏi trích xuất được.
+
+        Trả về: Một mảng JSON chứa các câu hỏi trắc nghiệm.
+        """,
+))
@@ -0,0 +1,310 @@
+import os
+import re
+import threading
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import timed
+
+# Cấu hình phát hiện câu hỏi gần trùng (có thể ghi đè bằng biến môi trường)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))
+DEDUP_CAPACITY = int(os.getenv("DEDUP_CAPACITY", "100000"))
+DEDUP_NUM_HASHES = int(os.getenv("DEDUP_NUM_HASHES", "32"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "8"))
+
+_NON_WORD = re.compile(r"[\W_]+")
+# Đánh dấu khóa dải quá phổ biến (thường là lời dẫn chung như "Choose the correct word"), không còn phân biệt được câu hỏi
+_SATURATED = -1
+
+
+def normalize_question(question: Dict[str, Any]) -> str:
+    """Văn bản dùng để so trùng: câu hỏi và các lựa chọn (đã sắp xếp), chữ thường, bỏ dấu câu"""
+    parts = [str(question.get("question") or "")]
+    parts.extend(sorted(str(option) for option in question.get("options") or ()))
+    return _NON_WORD.sub(" ", " ".join(parts).lower()).strip()
+
+
+def _answer_key(question: Dict[str, Any]) -> Tuple[Any, str]:
+    """Loại câu hỏi và đáp án đã chuẩn hóa: hai câu chỉ được coi là trùng khi khớp cả hai"""
+    answer = question.get("answer")
+    if isinstance(answer, list):
+        answer = " ".join(map(str, answer))
+    return question.get("type"), _NON_WORD.sub(" ", str(answer or "").lower()).strip()
+
+
+def _answer_hash(question: Dict[str, Any]) -> int:
+    question_type, answer = _answer_key(question)
+    return zlib.crc32(f"{question_type}\x1f{answer}".encode("utf-8"))
+
+
+class NearDuplicateIndex:
+    """
+    Chỉ mục MinHash/LSH để nhận ra câu hỏi gần trùng (cùng nội dung, chỉ khác cách diễn đạt).
+
+    - Mỗi câu hỏi được chia thành các shingle (`shingle_size` byte liên tiếp của văn bản đã chuẩn hóa,
+      mã hóa UTF-8); chữ ký MinHash gồm `num_hashes` giá trị, ước lượng độ tương đồng Jaccard
+    - Chữ ký được chia thành `bands` dải; hai câu chung ít nhất một dải là ứng viên, ứng viên được
+      xác nhận khi tỉ lệ giá trị trùng của chữ ký đạt `threshold` và cùng loại, cùng đáp án
+      (câu hỏi về từ đồng nghĩa và trái nghĩa của cùng một từ gần như giống hệt về chữ)
+    - Thêm và tra cứu tăng dần, chi phí không phụ thuộc số câu hỏi đã có: khóa dải nào đã có
+      `max_bucket` câu thì bị bỏ qua, nên số ứng viên mỗi lần tra cứu có giới hạn
+    - Giữ tối đa `capacity` câu hỏi, câu cũ nhất bị loại trước (FIFO)
+    """
+
+    def __init__(self, capacity: int = 100_000, threshold: float = 0.6, num_hashes: int = 32, bands: int = 8,
+                 shingle_size: int = 5, max_bucket: int = 32):
+        if num_hashes % bands:
+            raise ValueError("num_hashes phải chia hết cho bands")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.num_hashes = num_hashes
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.shingle_size = shingle_size
+        self.max_bucket = max_bucket
+        # Chữ ký lưu liền nhau trong một mảng 32 bit (vị trí i chiếm num_hashes phần tử), dùng như vòng đệm
+        self._signatures = array("I")
+        self._ids: List[Optional[str]] = []
+        # CRC32 của (loại, đáp án) theo từng vị trí
+        self._answers = array("I")
+        self._next = 0
+        # Mỗi dải: khóa dải -> vị trí (hoặc danh sách vị trí khi nhiều câu chung khóa)
+        self._buckets: List[Dict[int, Any]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.size = 0
+        self.evictions = 0
+        self.checks = 0
+        self.candidates = 0
+        self.duplicates = 0
+        self.saturated = 0
+
+    def signature(self, question: Dict[str, Any]) -> Optional[List[int]]:
+        """
+        Chữ ký MinHash của câu hỏi, None nếu câu hỏi không có nội dung.
+
+        Dùng một hàm băm duy nhất (one permutation hashing): giá trị băm của các shingle được chia
+        vào `num_hashes` ngăn theo phần dư, mỗi ngăn giữ giá trị nhỏ nhất. Chỉ cần băm mỗi shingle
+        một lần thay vì `num_hashes` lần; ngăn rỗng (văn bản ngắn) mượn giá trị của ngăn kế tiếp.
+
+        Hàm băm là CRC32 (không dùng hash() có muối riêng cho từng tiến trình), nên chữ ký giống nhau
+        giữa các worker và giữa các lần khởi động.
+        """
+        text = normalize_question(question)
+        if not text:
+            return None
+        size = self.shingle_size
+        num_hashes = self.num_hashes
+        data = text.encode("utf-8")
+        shingles = {data[i:i + size] for i in range(max(len(data) - size + 1, 1))}
+        # Duyệt giá trị giảm dần nên giá trị ghi sau cùng vào mỗi ngăn là giá trị nhỏ nhất
+        bins = {value % num_hashes: value for value in sorted(map(zlib.crc32, shingles), reverse=True)}
+        if len(bins) == num_hashes:
+            return [bins[i] for i in range(num_hashes)]
+        signature = []
+        for i in range(num_hashes):
+            step = 0
+            while (i + step) % num_hashes not in bins:
+                step += 1
+            signature.append(bins[(i + step) % num_hashes])
+        return signature
+
+    def _band_keys(self, signature) -> List[int]:
+        # hash() của tuple số nguyên không có muối ngẫu nhiên, nên khóa dải ổn định giữa các tiến trình
+        rows = self.rows
+        return [hash(tuple(signature[start:start + rows])) for start in range(0, self.num_hashes, rows)]
+
+    def _find(self, signature: List[int], band_keys: List[int], answer: int) -> Tuple[Optional[str], float]:
+        candidates = set()
+        for bucket, key in zip(self._buckets, band_keys):
+            slots = bucket.get(key)
+            if slots is None or slots == _SATURATED:
+                continue
+            if isinstance(slots, list):
+                candidates.update(slots)
+            else:
+                candidates.add(slots)
+        self.checks += 1
+        self.candidates += len(candidates)
+        best_id, best_score = None, 0.0
+        num_hashes = self.num_hashes
+        answers = self._answers
+        for slot in candidates:
+            if answers[slot] != answer:
+                continue
+            stored = self._signatures[slot * num_hashes:(slot + 1) * num_hashes]
+            score = sum(map(int.__eq__, signature, stored)) / num_hashes
+            if score > best_score:
+                best_id, best_score = self._ids[slot], score
+        return best_id, best_score
+
+    def _insert(self, question_id: str, signature: List[int], band_keys: List[int], answer: int):
+        num_hashes = self.num_hashes
+        if self.size < self.capacity:
+            slot = self.size
+            self._signatures.extend(signature)
+            self._ids.append(question_id)
+            self._answers.append(answer)
+            self.size += 1
+        else:
+            # Vòng đệm đầy: ghi đè câu hỏi cũ nhất
+            slot = self._next
+            self._unlink(slot)
+            self._signatures[slot * num_hashes:(slot + 1) * num_hashes] = array("I", signature)
+            self._ids[slot] = question_id
+            self._answers[slot] = answer
+            self.evictions += 1
+        self._next = (slot + 1) % self.capacity
+        for bucket, key in zip(self._buckets, band_keys):
+            slots = bucket.get(key)
+            if slots is None:
+                bucket[key] = slot
+            elif isinstance(slots, list):
+                if len(slots) < self.max_bucket:
+                    slots.append(slot)
+                else:
+                    bucket[key] = _SATURATED
+                    self.saturated += 1
+            elif slots != _SATURATED:
+                bucket[key] = [slots, slot]
+
+    def _unlink(self, slot: int):
+        stored = self._signatures[slot * self.num_hashes:(slot + 1) * self.num_hashes]
+        for bucket, key in zip(self._buckets, self._band_keys(stored)):
+            slots = bucket.get(key)
+            if isinstance(slots, list):
+                if slot in slots:
+                    slots.remove(slot)
+                if len(slots) == 1:
+                    bucket[key] = slots[0]
+            elif slots == slot:
+                del bucket[key]
+
+    def best_match(self, question: Dict[str, Any]) -> Tuple[Optional[str], float]:
+        """Câu giống nhất (cùng loại và đáp án) trong các ứng viên LSH và độ tương đồng ước lượng, không xét ngưỡng"""
+        signature = self.signature(question)
+        if signature is None or self.capacity <= 0:
+            return None, 0.0
+        with self._lock:
+            return self._find(signature, self._band_keys(signature), _answer_hash(question))
+
+    def find(self, question: Dict[str, Any]) -> Optional[str]:
+        """ID của câu hỏi gần trùng đã có trong chỉ mục, hoặc None"""
+        duplicate_id, score = self.best_match(question)
+        return duplicate_id if score >= self.threshold else None
+
+    def check_and_add(self, question: Dict[str, Any]) -> Optional[str]:
+        """
+        Tra cứu rồi thêm câu hỏi trong một bước.
+
+        Trả về ID của câu hỏi gần trùng đã có (câu hỏi mới không được thêm),
+        hoặc None nếu câu hỏi là mới (đã được thêm vào chỉ mục).
+        """
+        signature = self.signature(question)
+        if signature is None or self.capacity <= 0:
+            return None
+        band_keys = self._band_keys(signature)
+        answer = _answer_hash(question)
+        with self._lock:
+            duplicate_id, score = self._find(signature, band_keys, answer)
+            if score >= self.threshold:
+                self.duplicates += 1
+                return duplicate_id
+            self._insert(question["id"], signature, band_keys, answer)
+        return None
+
+    def add(self, question: Dict[str, Any]):
+        """Thêm câu hỏi vào chỉ mục mà không kiểm tra trùng"""
+        signature = self.signature(question)
+        if signature is None or self.capacity <= 0:
+            return
+        with self._lock:
+            self._insert(question["id"], signature, self._band_keys(signature), _answer_hash(question))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "num_hashes": self.num_hashes,
+            "bands": self.bands,
+            "evictions": self.evictions,
+            "checks": self.checks,
+            "duplicates": self.duplicates,
+            "saturated_buckets": self.saturated,
+            "avg_candidates": round(self.candidates / self.checks, 3) if self.checks else 0.0,
+        }
+
+
+# Chỉ mục dùng chung cho câu hỏi sinh bởi LLM và câu hỏi nhập từ PDF (riêng cho từng tiến trình worker)
+question_index = NearDuplicateIndex(
+    capacity=DEDUP_CAPACITY if DEDUP_ENABLED else 0,
+    threshold=DEDUP_THRESHOLD,
+    num_hashes=DEDUP_NUM_HASHES,
+    bands=DEDUP_BANDS,
+)
+
+# Số câu hỏi theo kết quả: mới, bị loại khi sinh (rejected), gộp vào câu đã có khi nhập (merged)
+_stats_lock = threading.Lock()
+_stats = {"accepted": 0, "rejected": 0, "merged": 0}
+
+
+def _count(**amounts: int):
+    with _stats_lock:
+        for key, amount in amounts.items():
+            _stats[key] += amount
+
+
+@timed("question_dedup")
+def reject_duplicates(questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Bỏ các câu hỏi vừa sinh gần trùng (cùng loại, cùng đáp án) với câu đã có hoặc với câu trước đó trong cùng lô.
+
+    Câu hỏi mới được thêm vào chỉ mục. Dùng cho câu hỏi do LLM sinh: bên gọi sinh bổ sung phần bị bỏ.
+    """
+    unique = [question for question in questions if question_index.check_and_add(question) is None]
+    _count(accepted=len(unique), rejected=len(questions) - len(unique))
+    return unique
+
+
+@timed("question_dedup")
+def merge_duplicates(questions: List[Dict[str, Any]], lookup) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Gộp các câu hỏi nhập vào (đề thi PDF) với câu trùng đã có trong kho.
+
+    `lookup(ids)` trả về các câu hỏi đã lưu theo ID (None nếu không còn). Chỉ gộp khi câu đã lưu có
+    cùng nội dung sau chuẩn hóa (chữ thường, bỏ dấu câu, thứ tự lựa chọn), cùng loại và cùng đáp án:
+    câu chỉ gần giống (ví dụ câu do LLM sinh) không được thay cho câu người dùng tải lên. Các câu trong
+    cùng một đề không được so với nhau (người soạn đề có thể cố ý đặt các câu giống nhau).
+
+    Trả về (danh sách kết quả, mỗi câu nhập vào một phần tử theo đúng thứ tự; các câu hỏi mới cần lưu).
+    Câu trùng giữ nguyên văn bản đã tải lên nhưng dùng lại ID của câu đã lưu và không được lưu lại.
+    """
+    match_ids = [question_index.find(question) for question in questions]
+    known_ids = [qid for qid in match_ids if qid is not None]
+    known = {qid: question for qid, question in zip(known_ids, lookup(known_ids)) if question is not None}
+    results, new_questions = [], []
+    for question, match_id in zip(questions, match_ids):
+        existing = known.get(match_id)
+        if (
+            existing is not None
+            and _answer_key(existing) == _answer_key(question)
+            and normalize_question(existing) == normalize_question(question)
+        ):
+            results.append(dict(question, id=existing["id"]))
+            continue
+        question_index.add(question)
+        new_questions.append(question)
+        results.append(question)
+    _count(accepted=len(new_questions), merged=len(questions) - len(new_questions))
+    return results, new_questions
+
+
+def get_stats() -> Dict[str, Any]:
+    """Số câu hỏi mới/bị loại/được gộp và trạng thái chỉ mục"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["enabled"] = DEDUP_ENABLED
+    stats["index"] = question_index.stats()
+    return stats
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+ALL_QUESTION_TYPES = ("fill_blank", "multiple_choice", "sentence_rearrangement")
+
+PoolKey = Tuple[Tuple[str, ...], Optional[str]]
+Generator = Callable[..., Awaitable[List[Dict[str, Any]]]]
+
+
+class QuestionPool:
+    """
+    Kho câu hỏi tạo sẵn, phân theo (tập loại câu hỏi, chủ đề).
+
+    Yêu cầu lấy câu hỏi được phục vụ ngay từ kho. Khi số câu hỏi còn lại của
+    một kho xuống dưới ngưỡng `low_watermark`, một tác vụ nền gọi LLM để bổ sung
+    theo lô `batch_size`. Nếu kho không đủ câu hỏi, phần còn thiếu được tạo trực tiếp.
+
+    - Kho khai báo qua `prefill` (ví dụ kho mặc định lúc khởi động) được bổ sung tới `target`
+    - Kho khác chỉ được bổ sung khi đã được yêu cầu ít nhất `min_requests` lần, và chỉ tới
+      số câu hỏi đã được yêu cầu (tối đa `target`), nên chủ đề tùy ý hỏi một lần không kéo
+      theo hàng chục câu hỏi LLM sinh ra mà không ai dùng
+    """
+
+    def __init__(
+        self,
+        generate: Generator,
+        low_watermark: int = 10,
+        batch_size: int = 20,
+        target: int = 40,
+        max_keys: int = 256,
+        min_requests: int = 2,
+    ):
+        self._generate = generate
+        self.low_watermark = low_watermark
+        self.batch_size = batch_size
+        self.target = max(target, low_watermark)
+        self.max_keys = max_keys
+        self.min_requests = min_requests
+        self._pools: "OrderedDict[PoolKey, Deque[Dict[str, Any]]]" = OrderedDict()
+        # Số lần yêu cầu và tổng số câu hỏi đã yêu cầu của từng kho
+        self._demand: Dict[PoolKey, List[int]] = {}
+        self._configured: Set[PoolKey] = set()
+        self._refills: Dict[PoolKey, asyncio.Task] = {}
+        self.served_from_pool = 0
+        self.served_direct = 0
+        self.refills = 0
+        self.refill_failures = 0
+        self.generated = 0
+        self.refill_seconds = 0.0
+
+    @staticmethod
+    def make_key(question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> PoolKey:
+        types = tuple(sorted(set(question_types))) if question_types else ALL_QUESTION_TYPES
+        return types, (topic or None)
+
+    async def take(self, num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lấy num_questions câu hỏi, ưu tiên câu hỏi có sẵn trong kho"""
+        key = self.make_key(question_types, topic)
+        questions = self.take_available(num_questions, question_types, topic)
+        missing = num_questions - len(questions)
+        if missing > 0:
+            fresh = await self._generate(num_questions=missing, question_types=list(key[0]), topic=key[1])
+            fresh = fresh[:missing]
+            self.served_direct += len(fresh)
+            questions.extend(fresh)
+        return questions
+
+    def take_available(self, num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lấy tối đa num_questions câu hỏi đang có sẵn trong kho, không gọi LLM"""
+        key = self.make_key(question_types, topic)
+        pool = self._get_pool(key)
+        questions = [pool.popleft() for _ in range(min(num_questions, len(pool)))]
+        self.served_from_pool += len(questions)
+        demand = self._demand.setdefault(key, [0, 0])
+        demand[0] += 1
+        demand[1] += num_questions
+        self._start_refill(key)
+        return questions
+
+    def prefill(self, question_types: Optional[List[str]] = None, topic: Optional[str] = None):
+        """Khai báo một kho luôn được giữ đầy tới `target` và khởi động bổ sung nếu đang dưới ngưỡng"""
+        key = self.make_key(question_types, topic)
+        self._configured.add(key)
+        self._start_refill(key)
+
+    def _wanted(self, key: PoolKey) -> int:
+        """Số câu hỏi cần giữ sẵn trong kho"""
+        if key in self._configured:
+            return self.target
+        requests, questions = self._demand.get(key, (0, 0))
+        return min(self.target, questions) if requests >= self.min_requests else 0
+
+    def _start_refill(self, key: PoolKey):
+        pool = self._get_pool(key)
+        task = self._refills.get(key)
+        if len(pool) < min(self.low_watermark, self._wanted(key)) and (task is None or task.done()):
+            self._refills[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill(self, key: PoolKey):
+        pool = self._get_pool(key)
+        started = time.perf_counter()
+        self.refills += 1
+        try:
+            while len(pool) < self._wanted(key):
+                count = min(self.batch_size, self._wanted(key) - len(pool))
+                batch = await self._generate(num_questions=count, question_types=list(key[0]), topic=key[1])
+                if not batch:
+                    self.refill_failures += 1
+                    break
+                pool.extend(batch)
+                self.generated += len(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.refill_failures += 1
+            print(f"Lỗi khi bổ sung kho câu hỏi: {str(e)}")
+        finally:
+            self.refill_seconds += time.perf_counter() - started
+
+    def _get_pool(self, key: PoolKey) -> Deque[Dict[str, Any]]:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = deque()
+            # Giới hạn số kho để chủ đề tùy ý không làm tăng bộ nhớ vô hạn
+            while len(self._pools) > self.max_keys:
+                old_key, _ = self._pools.popitem(last=False)
+                self._demand.pop(old_key, None)
+                task = self._refills.pop(old_key, None)
+                if task is not None:
+                    task.cancel()
+        else:
+            self._pools.move_to_end(key)
+        return pool
+
+    def stats(self) -> Dict[str, Any]:
+        """Trả về độ sâu của từng kho và tốc độ bổ sung"""
+        return {
+            "pools": {
+                f"{'+'.join(types)}|{topic or '*'}": len(pool)
+                for (types, topic), pool in self._pools.items()
+            },
+            "refilling": sum(1 for task in self._refills.values() if not task.done()),
+            "served_from_pool": self.served_from_pool,
+            "served_direct": self.served_direct,
+            "refills": self.refills,
+            "refill_failures": self.refill_failures,
+            "generated": self.generated,
+            "refill_rate": round(self.generated / self.refill_seconds, 2) if self.refill_seconds else 0.0,
+        }
+
+    async def shutdown(self):
+        """Hủy các tác vụ bổ sung đang chạy"""
+        tasks = [task for task in self._refills.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
@@ -0,0 +1,143 @@
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class QuestionStore:
+    """
+    Kho câu hỏi trong bộ nhớ, tra cứu theo ID với độ phức tạp O(1).
+
+    - Chỉ mục phụ theo loại câu hỏi (`type`) và chủ đề (`topic`)
+    - Giới hạn dung lượng, loại bỏ câu hỏi ít dùng nhất (LRU) khi đầy
+    - TTL tính từ lần truy cập gần nhất (0 = không hết hạn)
+    - Bộ đếm hits, misses, evictions
+    """
+
+    def __init__(self, capacity: int = 100_000, ttl: float = 0):
+        self.capacity = capacity
+        self.ttl = ttl
+        # id -> (câu hỏi, chủ đề, thời điểm truy cập gần nhất), sắp theo thứ tự LRU
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Chỉ mục phụ: khóa -> {id: None} (dict giữ thứ tự và xóa O(1))
+        self._by_type: Dict[str, Dict[str, None]] = {}
+        self._by_topic: Dict[str, Dict[str, None]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._entries
+
+    def add(self, question: Dict[str, Any], topic: Optional[str] = None) -> Dict[str, Any]:
+        """Thêm (hoặc ghi đè) một câu hỏi, loại bỏ câu hỏi cũ nếu vượt dung lượng"""
+        question_id = question["id"]
+        if question_id in self._entries:
+            self._remove(question_id)
+        now = time.monotonic()
+        self._entries[question_id] = (question, topic, now)
+        self._by_type.setdefault(question.get("type"), {})[question_id] = None
+        if topic:
+            self._by_topic.setdefault(topic, {})[question_id] = None
+        self._purge_expired(now)
+        while len(self._entries) > self.capacity:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+        return question
+
+    def add_many(self, questions: Iterable[Dict[str, Any]], topic: Optional[str] = None) -> int:
+        """Thêm một lô câu hỏi, trả về số câu hỏi đã thêm"""
+        count = 0
+        for question in questions:
+            self.add(question, topic=topic)
+            count += 1
+        return count
+
+    def get(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Lấy câu hỏi theo ID, trả về None nếu không có hoặc đã hết hạn"""
+        entry = self._entries.get(question_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        question, topic, accessed_at = entry
+        now = time.monotonic()
+        if self.ttl and now - accessed_at > self.ttl:
+            self._remove(question_id)
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries[question_id] = (question, topic, now)
+        self._entries.move_to_end(question_id)
+        self.hits += 1
+        return question
+
+    def get_many(self, question_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Lấy nhiều câu hỏi theo ID, giữ nguyên thứ tự (None cho ID không tồn tại)"""
+        return [self.get(question_id) for question_id in question_ids]
+
+    def ids_by_type(self, question_type: str) -> List[str]:
+        """Danh sách ID câu hỏi thuộc một loại"""
+        return list(self._by_type.get(question_type, ()))
+
+    def ids_by_topic(self, topic: str) -> List[str]:
+        """Danh sách ID câu hỏi thuộc một chủ đề"""
+        return list(self._by_topic.get(topic, ()))
+
+    def sample(self, num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lấy ngẫu nhiên tối đa num_questions câu hỏi đã lưu theo loại và chủ đề"""
+        if question_types:
+            candidates = [qid for t in question_types for qid in self._by_type.get(t, ())]
+        else:
+            candidates = list(self._entries)
+        if topic:
+            topic_ids = self._by_topic.get(topic, {})
+            candidates = [qid for qid in candidates if qid in topic_ids]
+        chosen = random.sample(candidates, min(num_questions, len(candidates)))
+        return [question for question in map(self.get, chosen) if question is not None]
+
+    def stats(self) -> Dict[str, Any]:
+        """Trả về các bộ đếm và kích thước hiện tại của kho"""
+        return {
+            "backend": "memory",
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "types": {key: len(ids) for key, ids in self._by_type.items()},
+            "topics": len(self._by_topic),
+        }
+
+    def close(self):
+        """Không có tài nguyên cần giải phóng (cùng giao diện với SQLiteQuestionStore)"""
+
+    def _remove(self, question_id: str):
+        question, topic, _ = self._entries.pop(question_id)
+        self._discard_index(self._by_type, question.get("type"), question_id)
+        if topic:
+            self._discard_index(self._by_topic, topic, question_id)
+
+    def _purge_expired(self, now: float):
+        # Các mục đầu OrderedDict là mục truy cập lâu nhất nên chỉ cần kiểm tra từ đầu
+        if not self.ttl:
+            return
+        while self._entries:
+            oldest_id, (_, _, accessed_at) = next(iter(self._entries.items()))
+            if now - accessed_at <= self.ttl:
+                break
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    @staticmethod
+    def _discard_index(index: Dict[str, Dict[str, None]], key: Optional[str], question_id: str):
+        ids = index.get(key)
+        if ids is None:
+            return
+        ids.pop(question_id, None)
+        if not ids:
+            del index[key]
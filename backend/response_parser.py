@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from metrics import llm_parse_questions, llm_parse_responses
+from models import Question
+
+# Bộ kiểm tra dựng sẵn một lần: cả mảng (đường nhanh) và từng câu (khi mảng có câu sai)
+_question_adapter = TypeAdapter(Question)
+_questions_adapter = TypeAdapter(List[Question])
+_decoder = json.JSONDecoder()
+
+
+class ParseResult:
+    """Kết quả phân tích một phản hồi: câu hỏi hợp lệ và cách chúng được lấy ra"""
+
+    __slots__ = ("questions", "candidates", "invalid", "salvaged")
+
+    def __init__(self, questions: List[Dict[str, Any]], candidates: int, invalid: int, salvaged: bool):
+        self.questions = questions
+        self.candidates = candidates  # Số đối tượng JSON tìm thấy trong phản hồi
+        self.invalid = invalid  # Số đối tượng không đúng lược đồ Question
+        self.salvaged = salvaged  # True nếu phản hồi không phải JSON hợp lệ và phải cứu từng đối tượng
+
+
+# Thống kê trong tiến trình cho /llm-stats (chỉ số Prometheus nằm trong metrics.py)
+_lock = threading.Lock()
+_stats = {"responses": 0, "salvaged": 0, "failed": 0, "questions": 0, "invalid": 0}
+
+
+def _unwrap(value: Any) -> Optional[List[Any]]:
+    """Lấy danh sách câu hỏi từ giá trị JSON cấp ngoài cùng (mảng, hoặc đối tượng bọc mảng)"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        for key in ("questions", "items", "data"):
+            if isinstance(value.get(key), list):
+                return value[key]
+        return [value]
+    return None
+
+
+def extract_objects(text: str) -> Tuple[List[Any], bool]:
+    """
+    Lấy các phần tử JSON từ phản hồi của mô hình, bỏ qua rào ```json và lời dẫn xung quanh.
+
+    Đường nhanh: phân tích một lần đoạn từ dấu ngoặc mở đầu tiên (`[` hoặc `{`, tùy dấu nào đứng
+    trước) tới dấu ngoặc đóng tương ứng cuối cùng. Nếu thất bại (mảng bị cắt, thiếu dấu phẩy, lời dẫn
+    có ngoặc...) hoặc kết quả không phải các đối tượng, quét lại văn bản và cứu mọi đối tượng `{...}`
+    hoàn chỉnh. Trả về (danh sách phần tử, có phải cứu hay không).
+    """
+    starts = [position for position in (text.find("["), text.find("{")) if position != -1]
+    if starts:
+        start = min(starts)
+        end = text.rfind("]" if text[start] == "[" else "}")
+        if end > start:
+            try:
+                items = _unwrap(json.loads(text[start:end + 1]))
+            except json.JSONDecodeError:
+                items = None
+            if items is not None and all(isinstance(item, dict) for item in items):
+                return items, False
+
+    return _salvage(text), True
+
+
+def _salvage(text: str) -> List[Any]:
+    """
+    Cứu các đối tượng JSON hoàn chỉnh từ văn bản hỏng.
+
+    Thử giải mã tại mỗi dấu `{`; đối tượng giải mã được thì bỏ qua toàn bộ phần của nó,
+    nếu không (đối tượng bị cắt, đối tượng bọc ngoài bị hỏng) thì thử tiếp ở dấu `{` sau,
+    nhờ đó vẫn lấy được các câu hỏi nằm bên trong một đối tượng bọc ngoài bị cắt.
+    """
+    objects = []
+    position = text.find("{")
+    while position != -1:
+        try:
+            value, end = _decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            position = text.find("{", position + 1)
+            continue
+        objects.extend(_unwrap(value) or [])
+        position = text.find("{", end)
+    return objects
+
+
+def _new_ids(count: int) -> List[str]:
+    """Sinh `count` UUID phiên bản 4 từ một lần đọc os.urandom (nhanh hơn gọi uuid4 từng lần)"""
+    data = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=data[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def _accept(question: Question, keep_explanation: bool = False) -> Optional[Dict[str, Any]]:
+    """Kiểm tra ngữ nghĩa ngoài lược đồ và chuyển về dạng dict dùng trong kho câu hỏi"""
+    if not question.question.strip() or (question.type == "multiple_choice" and not question.options):
+        return None
+    data = {
+        "id": question.id,
+        "type": question.type,
+        "question": question.question,
+        "options": question.options,
+        "answer": question.answer,
+    }
+    # Chỉ giữ lời giải thích có sẵn trong đề PDF; lời giải thích ngắn LLM viết kèm câu hỏi sinh ra
+    # không thay được lời giải thích chi tiết của prompt explanation
+    if keep_explanation and question.explanation:
+        data["explanation"] = question.explanation
+    return data
+
+
+def validate_question(item: Any, question_id: Optional[str] = None, keep_explanation: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Kiểm tra một đối tượng theo lược đồ Question và gán ID mới.
+
+    Trả về câu hỏi đã chuẩn hóa, hoặc None nếu đối tượng không hợp lệ
+    (sai loại, thiếu trường, câu trắc nghiệm không có lựa chọn...).
+    """
+    if not isinstance(item, dict):
+        return None
+    try:
+        question = _question_adapter.validate_python({**item, "id": question_id or str(uuid.uuid4())})
+    except ValidationError:
+        return None
+    return _accept(question, keep_explanation)
+
+
+def validate_questions(items: List[Any], keep_explanation: bool = False) -> List[Dict[str, Any]]:
+    """Kiểm tra cả danh sách trong một lần gọi; nếu có phần tử sai thì kiểm tra lại từng phần tử"""
+    ids = _new_ids(len(items))
+    if all(isinstance(item, dict) for item in items):
+        try:
+            questions = _questions_adapter.validate_python(
+                [{**item, "id": question_id} for item, question_id in zip(items, ids)]
+            )
+        except ValidationError:
+            pass
+        else:
+            return [data for data in (_accept(question, keep_explanation) for question in questions) if data is not None]
+    results = (validate_question(item, question_id, keep_explanation) for item, question_id in zip(items, ids))
+    return [data for data in results if data is not None]
+
+
+def record_validation(valid: int, invalid: int):
+    """Ghi số câu hỏi hợp lệ/không hợp lệ (dùng cho phản hồi stream, được kiểm tra từng câu)"""
+    with _lock:
+        _stats["questions"] += valid
+        _stats["invalid"] += invalid
+    if valid:
+        llm_parse_questions.inc(valid, outcome="valid")
+    if invalid:
+        llm_parse_questions.inc(invalid, outcome="invalid")
+
+
+def parse_questions(text: str, keep_explanation: bool = False) -> ParseResult:
+    """
+    Phân tích phản hồi sinh câu hỏi: lấy các đối tượng JSON, kiểm tra lược đồ trong một lượt.
+
+    `keep_explanation` giữ trường explanation của từng câu (dùng khi phân tích đề PDF kèm lời giải).
+    """
+    items, salvaged = extract_objects(text)
+    questions = validate_questions(items, keep_explanation)
+    result = ParseResult(questions, len(items), len(items) - len(questions), salvaged)
+
+    outcome = "failed" if not questions else ("salvaged" if salvaged else "ok")
+    with _lock:
+        _stats["responses"] += 1
+        _stats["salvaged"] += outcome == "salvaged"
+        _stats["failed"] += outcome == "failed"
+    llm_parse_responses.inc(result=outcome)
+    record_validation(len(questions), result.invalid)
+    return result
+
+
+def get_stats() -> Dict[str, Any]:
+    """Số phản hồi đã phân tích, tỉ lệ phải cứu từng đối tượng và số câu hỏi bị loại"""
+    with _lock:
+        stats = dict(_stats)
+    stats["salvage_rate"] = round(stats["salvaged"] / stats["responses"], 4) if stats["responses"] else 0.0
+    return stats
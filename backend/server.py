@@ -0,0 +1,67 @@
+"""
+Chạy backend với một hoặc nhiều tiến trình worker.
+
+    python server.py --workers 4 --port 8000
+
+Khi có nhiều worker, trạng thái cần dùng chung (kho câu hỏi, bộ đệm lời giải thích,
+lịch ôn tập, bộ đệm văn bản trang PDF, công việc nền) được chuyển sang SQLite trong SHARED_STATE_DIR
+để câu hỏi do worker này tạo vẫn được worker khác chấm điểm.
+"""
+import argparse
+import os
+from typing import Dict
+
+import uvicorn
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cấu hình triển khai (có thể ghi đè bằng biến môi trường hoặc tham số dòng lệnh)
+WORKERS = int(os.getenv("WORKERS", "1"))
+SHUTDOWN_GRACE = float(os.getenv("SHUTDOWN_GRACE", "10"))
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", BACKEND_DIR)
+
+
+def shared_state_env(workers: int, state_dir: str = SHARED_STATE_DIR) -> Dict[str, str]:
+    """
+    Biến môi trường cần đặt để các worker dùng chung trạng thái.
+
+    Chỉ áp dụng khi workers > 1 và chỉ cho các biến chưa được đặt.
+    """
+    if workers <= 1:
+        return {}
+    defaults = {
+        "QUESTION_STORE_BACKEND": "sqlite",
+        "QUESTION_DB_PATH": os.path.join(state_dir, "questions.db"),
+        "EXPLANATION_CACHE_PATH": os.path.join(state_dir, "explanations.db"),
+        "SRS_DB_PATH": os.path.join(state_dir, "reviews.db"),
+        "PDF_PAGE_CACHE_PATH": os.path.join(state_dir, "pdf_pages.db"),
+        # Công việc nền /jobs tra cứu và hủy được từ bất kỳ worker nào
+        "JOB_DB_PATH": os.path.join(state_dir, "jobs.db"),
+        # Không giữ lịch ôn trong bộ nhớ vì worker khác có thể đã cập nhật
+        "SRS_CACHE_LEARNERS": "0",
+    }
+    return {name: value for name, value in defaults.items() if not os.getenv(name)}
+
+
+def run(host: str = "0.0.0.0", port: int = 8000, workers: int = WORKERS):
+    """Khởi động uvicorn, tự cấu hình trạng thái dùng chung khi chạy nhiều worker"""
+    os.environ.update(shared_state_env(workers))
+    if workers > 1 and os.getenv("QUESTION_STORE_BACKEND") == "memory":
+        print("Cảnh báo: QUESTION_STORE_BACKEND=memory, các worker sẽ không dùng chung câu hỏi")
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        app_dir=BACKEND_DIR,
+        timeout_graceful_shutdown=SHUTDOWN_GRACE,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+    run(args.host, args.port, args.workers)
@@ -1,7 +1,41 @@
-from typing import Dict, Any, List, Union
-import asyncio
-from openai_helper import generate_explanation
+from typing import Dict, Any, List, Optional, Union
+import os
+from openai_helper import generate_explanation, EXPLANATION_PROMPT_VERSION
+from explanation_cache import ExplanationCache
+from llm_client import is_saturated
+from spaced_repetition import review_scheduler
+from metrics import timed
 
+# Bộ đệm lời giải thích theo nội dung câu hỏi (tầng đĩa bật khi đặt EXPLANATION_CACHE_PATH)
+explanation_cache = ExplanationCache(
+    prompt_version=EXPLANATION_PROMPT_VERSION,
+    capacity=int(os.getenv("EXPLANATION_CACHE_CAPACITY", "10000")),
+    disk_path=os.getenv("EXPLANATION_CACHE_PATH") or None,
+    warm_concurrency=int(os.getenv("EXPLANATION_WARM_CONCURRENCY", "2")),
+    is_busy=is_saturated,
+)
+
+@timed("services")
+async def get_explanation(question: Dict[str, Any]) -> Optional[str]:
+    """
+    Lấy lời giải thích cho câu hỏi, dùng bộ đệm nếu đã có
+    
+    Args:
+        question: Câu hỏi cần giải thích
+        
+    Returns:
+        Lời giải thích hoặc None nếu không tạo được
+    """
+    # Đề PDF kèm lời giải: dùng luôn lời giải có sẵn (chỉ câu hỏi nhập từ PDF mới giữ trường này)
+    if question.get("explanation"):
+        return question["explanation"]
+    return await explanation_cache.get_or_create(question, generate_explanation)
+
+def precompute_explanations(questions: List[Dict[str, Any]]):
+    """Tạo trước lời giải thích trong nền cho các câu hỏi chưa có sẵn lời giải thích"""
+    explanation_cache.warm([q for q in questions if not q.get("explanation")], generate_explanation)
+
+@timed("services")
 async def check_answer_with_explanation(question: Dict[str, Any], user_answer: Union[str, List[str]]) -> Dict[str, Any]:
     """
     Kiểm tra câu trả lời của người dùng và tạo lời giải thích bằng OpenAI
@@ -16,13 +50,14 @@ async def check_answer_with_explanation(question: Dict[str, Any], user_answer: U
     # Kiểm tra đáp án
     result = check_answer(question, user_answer)
     
-    # Tạo lời giải thích bằng OpenAI
-    explanation = await generate_explanation(question)
+    # Tạo lời giải thích bằng OpenAI (qua bộ đệm)
+    explanation = await get_explanation(question)
     if explanation:
         result["explanation"] = explanation
     
     return result
 
+@timed("services")
 def check_answer(question: Dict[str, Any], user_answer: Union[str, List[str]]) -> Dict[str, Any]:
     """
     Kiểm tra câu trả lời của người dùng
@@ -34,6 +69,10 @@ def check_answer(question: Dict[str, Any], user_answer: Union[str, List[str]]) -
     Returns:
         Dict chứa kết quả kiểm tra (đúng/sai) và lời giải thích
     """
+    return _check_answer(question, user_answer)
+
+def _check_answer(question: Dict[str, Any], user_answer: Union[str, List[str]]) -> Dict[str, Any]:
+    # Quy tắc chấm dùng chung cho check_answer và check_answers (không đo thời gian từng câu)
     question_type = question["type"]
     correct_answer = question["answer"]
     explanation = question.get("explanation", "")
@@ -82,4 +121,58 @@ def normalize_answer(answer: Union[str, List[str]]) -> Union[str, List[str]]:
         return answer.strip().lower()
     elif isinstance(answer, list):
         return [item.strip().lower() if isinstance(item, str) else item for item in answer]
-    return answer 
\ No newline at end of file
+    return answer 
+
+@timed("services")
+def check_answers(question_ids: List[str], questions: List[Optional[Dict[str, Any]]], user_answers: List[Union[str, List[str]]]) -> Dict[str, Any]:
+    """
+    Chấm cả bài kiểm tra trong một lượt, cùng quy tắc với check_answer
+    
+    Args:
+        question_ids: ID các câu hỏi theo thứ tự bài làm
+        questions: Câu hỏi tương ứng (None nếu không tìm thấy)
+        user_answers: Câu trả lời của người dùng tương ứng
+        
+    Returns:
+        Dict theo định dạng ExamResult, details giữ thứ tự bài làm
+    """
+    details = []
+    correct_count = 0
+    for question_id, question, user_answer in zip(question_ids, questions, user_answers):
+        if question is None:
+            details.append({
+                "question_id": question_id,
+                "correct": False,
+                "explanation": "Không tìm thấy câu hỏi",
+                "correct_answer": None
+            })
+            continue
+        
+        result = _check_answer(question, user_answer)
+        correct_count += result["correct"]
+        details.append({"question_id": question_id, **result})
+    
+    total = len(details)
+    return {
+        "total_questions": total,
+        "correct_answers": correct_count,
+        "score": round(correct_count / total * 100, 2) if total else 0.0,
+        "details": details
+    }
+
+@timed("services")
+def record_reviews(learner_id: str, question_ids: List[str], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ghi kết quả của check_answer / check_answers vào lịch ôn tập của người học
+    
+    Args:
+        learner_id: ID người học
+        question_ids: ID các câu hỏi đã chấm
+        results: Kết quả tương ứng (có trường "correct")
+        
+    Returns:
+        Lịch ôn mới của từng câu hỏi
+    """
+    return review_scheduler.record_many(
+        learner_id, [(question_id, result["correct"]) for question_id, result in zip(question_ids, results)]
+    )
@@ -0,0 +1,307 @@
+import heapq
+import os
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlite_db import SQLiteDB
+
+DAY = 86400.0
+# Hệ số dễ ban đầu và tối thiểu của SM-2
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# Câu trả lời sai được hỏi lại sau khoảng thời gian này (giây)
+RELEARN_DELAY = 600.0
+# Điểm chất lượng SM-2 (0-5) tương ứng với kết quả đúng/sai của check_answer
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    learner_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    due REAL NOT NULL,
+    interval REAL NOT NULL,
+    ease REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    PRIMARY KEY (learner_id, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reviews_due ON reviews (learner_id, due);
+"""
+
+_UPSERT = "INSERT OR REPLACE INTO reviews (learner_id, item_id, due, interval, ease, reps, lapses) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SELECT_LEARNER = "SELECT item_id, due, interval, ease, reps, lapses FROM reviews WHERE learner_id = ?"
+_SELECT_DUE = _SELECT_LEARNER + " AND due <= ? ORDER BY due LIMIT ?"
+_LEARNER_STATS = "SELECT COUNT(*), COALESCE(SUM(due <= ?), 0), COALESCE(SUM(lapses), 0) FROM reviews WHERE learner_id = ?"
+# Số tham số tối đa trong một câu IN (...) để không vượt giới hạn biến của SQLite
+_MAX_PARAMS = 500
+
+
+def sm2(interval: float, ease: float, reps: int, quality: int) -> Tuple[float, float, int]:
+    """
+    Một bước của thuật toán SM-2.
+
+    Returns:
+        (khoảng cách mới tính bằng ngày, hệ số dễ mới, số lần nhớ liên tiếp mới);
+        khoảng cách 0 nghĩa là cần học lại ngay trong phiên
+    """
+    if quality >= 3:
+        if reps == 0:
+            interval = 1.0
+        elif reps == 1:
+            interval = 6.0
+        else:
+            interval = interval * ease
+        reps += 1
+    else:
+        interval = 0.0
+        reps = 0
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return interval, ease, reps
+
+
+class _LearnerState:
+    """
+    Lịch ôn tập của một người học, lưu dạng mảng song song (mỗi mục một vị trí).
+    ID mục chỉ được giữ trong `item_ids` của người học, nên loại bỏ người học khỏi bộ nhớ
+    là giải phóng toàn bộ dữ liệu của họ.
+
+    Heap (due, vị trí) được cập nhật kiểu lười: khi một mục được xếp lịch lại,
+    phần tử cũ trong heap bị bỏ qua lúc lấy ra vì due không còn khớp.
+    """
+
+    __slots__ = ("slots", "item_ids", "due", "interval", "ease", "reps", "lapses", "heap")
+
+    def __init__(self):
+        self.slots: Dict[str, int] = {}
+        self.item_ids: List[str] = []
+        self.due = array("d")
+        self.interval = array("f")
+        self.ease = array("f")
+        self.reps = array("H")
+        self.lapses = array("H")
+        self.heap: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def set(self, item_id: str, due: float, interval: float, ease: float, reps: int, lapses: int) -> int:
+        slot = self.slots.get(item_id)
+        if slot is None:
+            slot = self.slots[item_id] = len(self.item_ids)
+            self.item_ids.append(item_id)
+            self.due.append(due)
+            self.interval.append(interval)
+            self.ease.append(ease)
+            self.reps.append(min(reps, 0xFFFF))
+            self.lapses.append(min(lapses, 0xFFFF))
+        else:
+            self.due[slot] = due
+            self.interval[slot] = interval
+            self.ease[slot] = ease
+            self.reps[slot] = min(reps, 0xFFFF)
+            self.lapses[slot] = min(lapses, 0xFFFF)
+        heapq.heappush(self.heap, (due, slot))
+        # Dựng lại heap khi phần tử cũ chiếm quá nửa
+        if len(self.heap) > 2 * len(self.item_ids) + 16:
+            self.heap = [(d, s) for s, d in enumerate(self.due)]
+            heapq.heapify(self.heap)
+        return slot
+
+    def pop_due(self, now: float, count: int) -> List[int]:
+        """Các vị trí đến hạn sớm nhất (tối đa count), không xóa khỏi lịch"""
+        heap, due = self.heap, self.due
+        taken: List[Tuple[float, int]] = []
+        seen = set()
+        while heap and len(taken) < count:
+            entry_due, slot = heap[0]
+            if entry_due != due[slot] or slot in seen:
+                heapq.heappop(heap)
+                continue
+            seen.add(slot)
+            if entry_due > now:
+                break
+            taken.append(heapq.heappop(heap))
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [slot for _, slot in taken]
+
+
+class _ReviewDB:
+    """Lưu lịch ôn tập trên SQLite, mỗi (người học, mục) một dòng"""
+
+    def __init__(self, path: str):
+        self._db = SQLiteDB(path, _SCHEMA)
+
+    def load(self, learner_id: str, item_ids: Optional[List[str]] = None) -> List[Tuple[str, float, float, float, int, int]]:
+        """Các dòng của người học; chỉ các mục trong `item_ids` nếu có"""
+        if item_ids is None:
+            return self._db.query(_SELECT_LEARNER, (learner_id,))
+        rows = []
+        for start in range(0, len(item_ids), _MAX_PARAMS):
+            chunk = item_ids[start:start + _MAX_PARAMS]
+            rows += self._db.query(
+                _SELECT_LEARNER + f" AND item_id IN ({','.join('?' * len(chunk))})", (learner_id, *chunk)
+            )
+        return rows
+
+    def load_due(self, learner_id: str, now: float, count: int) -> List[Tuple[str, float, float, float, int, int]]:
+        """Tối đa `count` dòng đã đến hạn của người học, đến hạn sớm nhất trước"""
+        return self._db.query(_SELECT_DUE, (learner_id, now, count))
+
+    def learner_stats(self, learner_id: str, now: float) -> Tuple[int, int, int]:
+        """(số mục, số mục đến hạn, tổng số lần quên) của người học"""
+        return self._db.query_one(_LEARNER_STATS, (now, learner_id))
+
+    def save_many(self, rows: List[Tuple[str, str, float, float, float, int, int]]):
+        self._db.write_many(_UPSERT, rows)
+
+    def count(self) -> int:
+        return self._db.query_one("SELECT COUNT(*) FROM reviews")[0]
+
+    def close(self):
+        self._db.close()
+
+
+class SpacedRepetition:
+    """
+    Lập lịch ôn tập ngắt quãng (SM-2) theo từng người học.
+
+    - Ghi nhận kết quả đúng/sai của check_answer và tính lần ôn tiếp theo
+    - Lấy mục đến hạn tiếp theo của một người học trong O(log n) qua heap theo thời điểm đến hạn
+    - Với `db_path`, mọi thay đổi được ghi ngay xuống SQLite; chỉ tối đa `capacity`
+      người học được giữ trong bộ nhớ (LRU), người học khác được nạp lại khi cần
+    - Không có `db_path`, cũng chỉ giữ tối đa `capacity` người học (`0` = không giới hạn);
+      lịch ôn của người học bị loại sẽ mất
+    - Với `db_path` và `capacity=0` (nhiều worker dùng chung SQLite), không giữ gì trong bộ nhớ:
+      mỗi thao tác chỉ đọc/ghi các dòng liên quan thay vì nạp cả lịch sử của người học
+    """
+
+    def __init__(self, capacity: int = 10_000, db_path: Optional[str] = None):
+        self.capacity = capacity
+        self._db = _ReviewDB(db_path) if db_path else None
+        self._learners: "OrderedDict[str, _LearnerState]" = OrderedDict()
+        self.reviews = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def record(self, learner_id: str, item_id: str, correct: bool, now: Optional[float] = None) -> Dict[str, Any]:
+        """Ghi nhận một kết quả và trả về lịch ôn mới của mục"""
+        return self.record_many(learner_id, [(item_id, correct)], now=now)[0]
+
+    def record_many(self, learner_id: str, outcomes: Iterable[Tuple[str, bool]], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Ghi nhận nhiều kết quả của cùng một người học (ví dụ cả bài kiểm tra) trong một lần ghi"""
+        now = time.time() if now is None else now
+        outcomes = list(outcomes)
+        state = self._get_state(learner_id, [item_id for item_id, _ in outcomes])
+        results: List[Dict[str, Any]] = []
+        rows = []
+        for item_id, correct in outcomes:
+            slot = state.slots.get(item_id)
+            if slot is None:
+                interval, ease, reps, lapses = 0.0, DEFAULT_EASE, 0, 0
+            else:
+                interval, ease, reps, lapses = state.interval[slot], state.ease[slot], state.reps[slot], state.lapses[slot]
+            interval, ease, reps = sm2(interval, ease, reps, QUALITY_CORRECT if correct else QUALITY_INCORRECT)
+            if not correct:
+                lapses += 1
+            due = now + (interval * DAY if interval else RELEARN_DELAY)
+            slot = state.set(item_id, due, interval, ease, reps, lapses)
+            results.append(self._record_dict(state, slot))
+            rows.append((learner_id, item_id, due, interval, ease, reps, lapses))
+        self.reviews += len(rows)
+        if self._db is not None and rows:
+            self._db.save_many(rows)
+        return results
+
+    def next_due(self, learner_id: str, count: int = 1, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Các mục đã đến hạn ôn của người học, mục đến hạn sớm nhất trước"""
+        now = time.time() if now is None else now
+        if self._uncached:
+            self.loads += 1
+            state = self._state_from_rows(self._db.load_due(learner_id, now, count))
+        else:
+            state = self._get_state(learner_id)
+        return [self._record_dict(state, slot) for slot in state.pop_due(now, count)]
+
+    def learner_stats(self, learner_id: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Số mục đã học, số mục đến hạn và số lần quên của người học"""
+        now = time.time() if now is None else now
+        if self._uncached:
+            items, due, lapses = self._db.learner_stats(learner_id, now)
+            return {"learner_id": learner_id, "items": items, "due": due, "lapses": lapses}
+        state = self._get_state(learner_id)
+        return {
+            "learner_id": learner_id,
+            "items": len(state),
+            "due": sum(1 for due in state.due if due <= now),
+            "lapses": sum(state.lapses),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite" if self._db is not None else "memory",
+            "learners_in_memory": len(self._learners),
+            "items_in_memory": sum(len(state) for state in self._learners.values()),
+            "reviews": self.reviews,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+    @property
+    def _uncached(self) -> bool:
+        return self._db is not None and self.capacity <= 0
+
+    def _get_state(self, learner_id: str, item_ids: Optional[List[str]] = None) -> _LearnerState:
+        if self._uncached:
+            # Không giữ người học trong bộ nhớ: chỉ nạp các mục sắp được cập nhật
+            self.loads += 1
+            return self._state_from_rows(self._db.load(learner_id, item_ids))
+        state = self._learners.get(learner_id)
+        if state is not None:
+            self._learners.move_to_end(learner_id)
+            return state
+        if self._db is not None:
+            self.loads += 1
+            state = self._state_from_rows(self._db.load(learner_id))
+        else:
+            state = _LearnerState()
+        self._learners[learner_id] = state
+        # Có SQLite thì người học bị loại được nạp lại khi cần; chỉ lưu trong bộ nhớ thì lịch ôn của
+        # người học lâu không hoạt động bị mất, đổi lại bộ nhớ không tăng vô hạn
+        while 0 < self.capacity < len(self._learners):
+            self._learners.popitem(last=False)
+            self.evictions += 1
+        return state
+
+    @staticmethod
+    def _state_from_rows(rows) -> _LearnerState:
+        state = _LearnerState()
+        for item_id, due, interval, ease, reps, lapses in rows:
+            state.set(item_id, due, interval, ease, reps, lapses)
+        return state
+
+    def _record_dict(self, state: _LearnerState, slot: int) -> Dict[str, Any]:
+        return {
+            "item_id": state.item_ids[slot],
+            "due": state.due[slot],
+            "interval_days": round(state.interval[slot], 4),
+            "ease": round(state.ease[slot], 4),
+            "reps": state.reps[slot],
+            "lapses": state.lapses[slot],
+        }
+
+
+# Lịch ôn tập dùng chung của ứng dụng, mặc định lưu trong srs.db cạnh mã nguồn backend
+# (đặt SRS_DB_PATH rỗng để chỉ lưu trong bộ nhớ, giới hạn SRS_CACHE_LEARNERS người học)
+SRS_DB_PATH = os.getenv("SRS_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "srs.db"))
+review_scheduler = SpacedRepetition(
+    capacity=int(os.getenv("SRS_CACHE_LEARNERS", "10000")),
+    db_path=SRS_DB_PATH or None,
+)
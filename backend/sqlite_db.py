@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Sequence
+
+# Thời gian chờ khóa ghi của SQLite mỗi lần thử và số lần thử lại. Các lời gọi chạy đồng bộ trên event loop,
+# nên giữ ngắn: khi nhiều worker cùng ghi, một worker bị chặn tối đa khoảng
+# SQLITE_BUSY_TIMEOUT_MS * (SQLITE_BUSY_RETRIES + 1) rồi báo lỗi thay vì treo tới 30 giây
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "200"))
+SQLITE_BUSY_RETRIES = int(os.getenv("SQLITE_BUSY_RETRIES", "2"))
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class SQLiteDB:
+    """
+    Kết nối SQLite ở chế độ WAL dùng chung giữa các thread và các tiến trình worker.
+
+    - Nhiều tiến trình đọc song song trong khi một tiến trình ghi
+    - Thời gian chờ khóa ngắn, thử lại khi cơ sở dữ liệu đang bận (`SQLITE_BUSY_*`)
+    - `write_many` ghi một lô trong một transaction, lỗi thì ROLLBACK
+    """
+
+    def __init__(self, path: str, schema: Optional[str] = None):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000
+        )
+        self._lock = threading.Lock()
+        self._retry(self._conn.execute, "PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if schema:
+            self._retry(self._conn.executescript, schema)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """Tất cả các dòng của một truy vấn"""
+        with self._lock:
+            return self._retry(lambda: self._conn.execute(sql, params).fetchall())
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        """Dòng đầu tiên của một truy vấn, None nếu không có"""
+        with self._lock:
+            return self._retry(lambda: self._conn.execute(sql, params).fetchone())
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Chạy một câu lệnh ghi (tự commit), trả về số dòng bị ảnh hưởng"""
+        with self._lock:
+            return self._retry(lambda: self._conn.execute(sql, params).rowcount)
+
+    def write_many(self, sql: str, rows: Iterable[Sequence[Any]]):
+        """Ghi một lô dòng trong một transaction"""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            self._retry(self._write_many, sql, rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write_many(self, sql: str, rows: List[Sequence[Any]]):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(sql, rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _retry(fn, *args):
+        for attempt in range(SQLITE_BUSY_RETRIES + 1):
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == SQLITE_BUSY_RETRIES:
+                    raise
+                time.sleep(0.005 * (attempt + 1))
@@ -0,0 +1,119 @@
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlite_db import SQLiteDB
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    topic TEXT,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_type ON questions(type);
+CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions(topic);
+"""
+
+_INSERT = "INSERT OR REPLACE INTO questions (id, type, topic, data, created_at) VALUES (?, ?, ?, ?, ?)"
+_SELECT_BY_ID = "SELECT data FROM questions WHERE id = ?"
+
+
+class SQLiteQuestionStore:
+    """
+    Kho câu hỏi lưu bền vững trên SQLite, dùng chung được giữa nhiều worker.
+
+    Cùng giao diện với QuestionStore. Kết nối đi qua SQLiteDB (chế độ WAL, chờ khóa ngắn
+    rồi thử lại); mỗi lô câu hỏi được ghi trong một transaction duy nhất.
+    """
+
+    def __init__(self, path: str = "questions.db"):
+        self.path = path
+        self._db = SQLiteDB(path, _SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._db.query_one("SELECT COUNT(*) FROM questions")[0]
+
+    def __contains__(self, question_id: str) -> bool:
+        return self._db.query_one("SELECT 1 FROM questions WHERE id = ?", (question_id,)) is not None
+
+    def add(self, question: Dict[str, Any], topic: Optional[str] = None) -> Dict[str, Any]:
+        """Thêm (hoặc ghi đè) một câu hỏi"""
+        self.add_many([question], topic=topic)
+        return question
+
+    def add_many(self, questions: Iterable[Dict[str, Any]], topic: Optional[str] = None) -> int:
+        """Thêm một lô câu hỏi trong một transaction, trả về số câu hỏi đã ghi"""
+        now = time.time()
+        rows = [
+            (q["id"], q.get("type", ""), topic, json.dumps(q, ensure_ascii=False), now)
+            for q in questions
+        ]
+        self._db.write_many(_INSERT, rows)
+        return len(rows)
+
+    def get(self, question_id: str) -> Optional[Dict[str, Any]]:
+        """Lấy câu hỏi theo ID, trả về None nếu không có"""
+        row = self._db.query_one(_SELECT_BY_ID, (question_id,))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def get_many(self, question_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Lấy nhiều câu hỏi theo ID trong một truy vấn, giữ nguyên thứ tự (None cho ID không tồn tại)"""
+        found: Dict[str, Dict[str, Any]] = {}
+        unique_ids = list(dict.fromkeys(question_ids))
+        # SQLite giới hạn số tham số mỗi truy vấn nên chia thành từng lô
+        for start in range(0, len(unique_ids), 500):
+            batch = unique_ids[start:start + 500]
+            rows = self._db.query(f"SELECT id, data FROM questions WHERE id IN ({', '.join('?' for _ in batch)})", batch)
+            found.update((question_id, json.loads(data)) for question_id, data in rows)
+        self.hits += sum(1 for question_id in question_ids if question_id in found)
+        self.misses += sum(1 for question_id in question_ids if question_id not in found)
+        return [found.get(question_id) for question_id in question_ids]
+
+    def ids_by_type(self, question_type: str) -> List[str]:
+        """Danh sách ID câu hỏi thuộc một loại"""
+        rows = self._db.query("SELECT id FROM questions WHERE type = ?", (question_type,))
+        return [row[0] for row in rows]
+
+    def ids_by_topic(self, topic: str) -> List[str]:
+        """Danh sách ID câu hỏi thuộc một chủ đề"""
+        rows = self._db.query("SELECT id FROM questions WHERE topic = ?", (topic,))
+        return [row[0] for row in rows]
+
+    def sample(self, num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lấy ngẫu nhiên tối đa num_questions câu hỏi đã lưu theo loại và chủ đề"""
+        clauses, params = [], []
+        if question_types:
+            clauses.append(f"type IN ({', '.join('?' for _ in question_types)})")
+            params.extend(question_types)
+        if topic:
+            clauses.append("topic = ?")
+            params.append(topic)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(num_questions)
+        rows = self._db.query(f"SELECT data FROM questions {where} ORDER BY RANDOM() LIMIT ?", params)
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Trả về các bộ đếm và kích thước hiện tại của kho"""
+        types = dict(self._db.query("SELECT type, COUNT(*) FROM questions GROUP BY type"))
+        topics = self._db.query_one("SELECT COUNT(DISTINCT topic) FROM questions")[0]
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "size": sum(types.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "types": types,
+            "topics": topics,
+        }
+
+    def close(self):
+        self._db.close()
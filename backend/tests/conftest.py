@@ -0,0 +1,8 @@
+"""Cấu hình chung cho pytest: thêm thư mục backend vào sys.path (các module nằm phẳng trong backend)"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
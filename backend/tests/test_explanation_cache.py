@@ -0,0 +1,85 @@
+import asyncio
+
+from explanation_cache import ExplanationCache
+
+
+def make_questions(count):
+    return [{"type": "fill_blank", "question": f"Question {i} ___", "options": None, "answer": str(i)} for i in range(count)]
+
+
+def test_warm_runs_at_most_warm_concurrency_producers():
+    async def scenario():
+        cache = ExplanationCache(prompt_version="test", warm_concurrency=2)
+        running, peak = 0, 0
+
+        async def producer(question):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return "explanation " + question["answer"]
+
+        questions = make_questions(10)
+        cache.warm(questions, producer)
+        assert cache.stats()["warming"] == 10
+        while cache.stats()["warming"]:
+            await asyncio.sleep(0.001)
+        assert peak == 2
+        assert all(cache.get(question) for question in questions)
+
+    asyncio.run(scenario())
+
+
+def test_warm_is_skipped_while_llm_is_busy():
+    async def scenario():
+        busy = True
+        cache = ExplanationCache(prompt_version="test", warm_concurrency=1, is_busy=lambda: busy)
+        calls = []
+
+        async def producer(question):
+            calls.append(question)
+            return "explanation"
+
+        cache.warm(make_questions(3), producer)
+        assert cache.stats()["warming"] == 0
+        assert cache.warm_skipped == 3
+
+        busy = False
+        cache.warm(make_questions(3), producer)
+        busy = True
+        while cache.stats()["warming"]:
+            await asyncio.sleep(0.001)
+        assert not calls
+        assert cache.warm_skipped == 6
+
+    asyncio.run(scenario())
+
+
+def test_waiters_regenerate_when_the_owner_is_cancelled():
+    async def scenario():
+        cache = ExplanationCache(prompt_version="test")
+        question = make_questions(1)[0]
+        calls = 0
+        first_started = asyncio.Event()
+
+        async def producer(question):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                first_started.set()
+                await asyncio.sleep(10)
+            return "explanation"
+
+        owner = asyncio.create_task(cache.get_or_create(question, producer))
+        await first_started.wait()
+        waiters = [asyncio.create_task(cache.get_or_create(question, producer)) for _ in range(3)]
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        assert await asyncio.gather(*waiters) == ["explanation"] * 3
+        assert owner.cancelled()
+        # Chỉ một người chờ tạo lại, số còn lại dùng chung kết quả của nó
+        assert calls == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+
+import main
+from jobs import JobScheduler
+
+QUESTION = {"id": "q1", "type": "fill_blank", "question": "I ___ here.", "options": None, "answer": "am"}
+
+
+class BlockingGenerator:
+    """Thay cho get_random_questions: mọi lời gọi chờ tới khi release()"""
+
+    def __init__(self):
+        self.started = 0
+        self._release = asyncio.Event()
+
+    async def __call__(self, num_questions, question_types=None, topic=None):
+        self.started += 1
+        await self._release.wait()
+        return [QUESTION]
+
+    def release(self):
+        self._release.set()
+
+
+def client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test", timeout=10)
+
+
+async def wait_until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+def test_generate_exam_returns_503_when_the_sync_queue_is_full(monkeypatch):
+    async def scenario():
+        scheduler = JobScheduler(workers=1, max_queue=1)
+        generator = BlockingGenerator()
+        monkeypatch.setattr(main, "sync_job_scheduler", scheduler)
+        monkeypatch.setattr(main, "get_random_questions", generator)
+        async with client() as http:
+            running = asyncio.create_task(http.post("/generate-exam", json={"num_questions": 1}))
+            await wait_until(lambda: generator.started == 1)
+            queued = asyncio.create_task(http.post("/generate-exam", json={"num_questions": 1}))
+            await wait_until(lambda: scheduler.stats()["queue_size"] == 1)
+
+            rejected = await http.post("/generate-exam", json={"num_questions": 1})
+            assert rejected.status_code == 503
+
+            generator.release()
+            assert [(await task).status_code for task in (running, queued)] == [200, 200]
+            assert [question["id"] for question in (await running).json()] == ["q1"]
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_delete_running_job_returns_cancelled_status(monkeypatch):
+    async def scenario():
+        scheduler = JobScheduler(workers=1)
+        generator = BlockingGenerator()
+        monkeypatch.setattr(main, "job_scheduler", scheduler)
+        monkeypatch.setattr(main, "get_random_questions", generator)
+        async with client() as http:
+            job = (await http.post("/jobs/generate-exam", json={"num_questions": 1})).json()
+            await wait_until(lambda: generator.started == 1)
+            assert (await http.get(f"/jobs/{job['id']}")).json()["status"] == "running"
+
+            cancelled = await http.delete(f"/jobs/{job['id']}")
+            assert cancelled.status_code == 200
+            assert cancelled.json()["status"] == "cancelled"
+            assert (await http.get(f"/jobs/{job['id']}/result")).status_code == 409
+            assert (await http.delete("/jobs/missing")).status_code == 404
+        await scheduler.shutdown()
+
+    asyncio.run(scenario())
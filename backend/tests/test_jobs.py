@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from jobs import CANCELLED, FAILED, SUCCEEDED, JobCancelledError, JobScheduler, QueueFullError
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_run_returns_workload_result():
+    async def scenario():
+        scheduler = JobScheduler(workers=1)
+
+        async def workload(job):
+            job.set_progress(1, 2)
+            return 42
+
+        assert await scheduler.run("test", workload) == 42
+        await scheduler.shutdown()
+
+    run(scenario())
+
+
+def test_run_reraises_workload_exception():
+    async def scenario():
+        scheduler = JobScheduler(workers=1)
+
+        async def workload(job):
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await scheduler.run("test", workload)
+        await scheduler.shutdown()
+
+    run(scenario())
+
+
+def test_run_raises_job_cancelled_error_when_job_is_cancelled():
+    async def scenario():
+        scheduler = JobScheduler(workers=1)
+        started = asyncio.Event()
+
+        async def workload(job):
+            started.set()
+            await asyncio.sleep(10)
+
+        runner = asyncio.create_task(scheduler.run("test", workload))
+        await started.wait()
+        job = next(job for job in scheduler._jobs.values())
+        assert scheduler.cancel(job.id)
+        with pytest.raises(JobCancelledError):
+            await runner
+        assert job.status == CANCELLED
+        await scheduler.shutdown()
+
+    run(scenario())
+
+
+def test_submit_raises_when_queue_is_full():
+    async def scenario():
+        scheduler = JobScheduler(workers=1, max_queue=1)
+        blocker = asyncio.Event()
+
+        async def workload(job):
+            await blocker.wait()
+
+        scheduler.submit("test", workload)
+        await asyncio.sleep(0)
+        scheduler.submit("test", workload)
+        with pytest.raises(QueueFullError):
+            scheduler.submit("test", workload)
+        await scheduler.shutdown()
+
+    run(scenario())
+
+
+def test_lower_priority_value_runs_first_and_states_are_recorded():
+    async def scenario():
+        scheduler = JobScheduler(workers=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker(job):
+            await gate.wait()
+
+        def record(name):
+            async def workload(job):
+                order.append(name)
+                if name == "bad":
+                    raise RuntimeError("failed")
+            return workload
+
+        scheduler.submit("test", blocker)
+        await asyncio.sleep(0)
+        low = scheduler.submit("test", record("low"), priority=20)
+        bad = scheduler.submit("test", record("bad"), priority=5)
+        high = scheduler.submit("test", record("high"), priority=1)
+        gate.set()
+        for job in (low, bad, high):
+            await job.wait(timeout=1)
+        assert order == ["high", "bad", "low"]
+        assert (high.status, bad.status, bad.error) == (SUCCEEDED, FAILED, "failed")
+        assert high.progress == 1.0
+        await scheduler.shutdown()
+
+    run(scenario())
+
+
+def test_finished_jobs_beyond_retention_are_trimmed():
+    async def scenario():
+        scheduler = JobScheduler(workers=1, retention=2)
+
+        async def workload(job):
+            return None
+
+        jobs = [scheduler.submit("test", workload) for _ in range(4)]
+        await jobs[-1].wait(timeout=1)
+        scheduler.submit("test", workload)
+        assert scheduler.get(jobs[0].id) is None
+        await scheduler.shutdown()
+
+    run(scenario())
+
+
+def test_jobs_are_visible_and_cancellable_from_another_scheduler_sharing_the_db(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        owner = JobScheduler(workers=1, db_path=path, sync_interval=0.01)
+        other = JobScheduler(workers=1, db_path=path, sync_interval=0.01)
+        started = asyncio.Event()
+
+        async def quick(job):
+            return [{"id": "q1"}]
+
+        async def slow(job):
+            job.set_progress(1, 4)
+            started.set()
+            await asyncio.sleep(10)
+
+        done = owner.submit("test", quick)
+        finished = await other.wait(done.id, timeout=1)
+        assert (finished.status, finished.result, finished.progress) == (SUCCEEDED, [{"id": "q1"}], 1.0)
+
+        running = owner.submit("test", slow)
+        await started.wait()
+        await asyncio.sleep(0.05)
+        assert other.get(running.id).progress == 0.25
+        assert other.cancel(running.id)
+        assert (await other.wait(running.id, timeout=1)).status == CANCELLED
+        assert running.status == CANCELLED
+        assert not other.cancel(running.id)
+        assert other.get("missing") is None
+        await owner.shutdown()
+        await other.shutdown()
+
+    run(scenario())
+
+
+def test_failed_job_keeps_http_status_code_in_the_shared_db(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        owner = JobScheduler(workers=1, db_path=path)
+        other = JobScheduler(workers=1, db_path=path)
+
+        async def workload(job):
+            error = ValueError("bad pdf")
+            error.status_code = 400
+            raise error
+
+        job = owner.submit("test", workload)
+        await job.wait(timeout=1)
+        snapshot = other.get(job.id)
+        assert (snapshot.status, snapshot.status_code, snapshot.error) == (FAILED, 400, "bad pdf")
+        await owner.shutdown()
+
+    run(scenario())
+
+
+def test_finished_jobs_beyond_retention_are_trimmed_from_the_shared_db(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        owner = JobScheduler(workers=1, retention=2, db_path=path)
+        other = JobScheduler(workers=1, db_path=path)
+
+        async def workload(job):
+            return None
+
+        jobs = [owner.submit("test", workload) for _ in range(4)]
+        await jobs[-1].wait(timeout=1)
+        assert other.get(jobs[0].id) is None
+        assert other.get(jobs[-1].id).status == SUCCEEDED
+        await owner.shutdown()
+
+    run(scenario())
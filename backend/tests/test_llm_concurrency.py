@@ -0,0 +1,66 @@
+import asyncio
+import socket
+import time
+import uuid
+
+import httpx
+import openai
+
+import llm_client
+import main
+from benchmarks.fake_llm_server import start_server
+from database import add_questions
+
+# Độ trễ của máy chủ LLM giả lập: mọi lời gọi giải thích bị chặn trong suốt khoảng này
+LLM_LATENCY = 2.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_questions(count):
+    return [
+        {"id": 0, "type": "fill_blank", "question": f"Sentence {uuid.uuid4().hex} needs a ___ word.", "options": None, "answer": "blank"}
+        for _ in range(count)
+    ]
+
+
+def test_check_answer_keeps_responding_while_llm_calls_are_blocked(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(openai, "api_key", "fake")
+    monkeypatch.setattr(openai, "api_base", f"http://127.0.0.1:{port}/v1")
+    # Semaphore của lớp gọi LLM gắn với event loop của từng lần chạy
+    monkeypatch.setattr(llm_client, "_semaphore", None)
+
+    async def scenario():
+        runner = await start_server(port=port, latency=LLM_LATENCY)
+        await llm_client.startup()
+        try:
+            questions = add_questions(make_questions(20))
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+                explanations = [
+                    asyncio.create_task(client.post("/get-explanation", json={"question_id": q["id"], "answer": q["answer"]}))
+                    for q in questions
+                ]
+                await asyncio.sleep(0.2)
+
+                latencies = []
+                for _ in range(10):
+                    started = time.perf_counter()
+                    response = await client.post("/check-answer", json={"question_id": questions[0]["id"], "answer": "blank"})
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 200 and response.json()["correct"]
+
+                assert not any(task.done() for task in explanations), "các lời gọi LLM phải còn đang bị chặn"
+                assert max(latencies) < LLM_LATENCY / 4
+                responses = await asyncio.gather(*explanations)
+                assert [response.status_code for response in responses] == [200] * len(questions)
+        finally:
+            await llm_client.shutdown()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+import asyncio
+import os
+
+import metrics
+from metrics import MetricsMiddleware
+
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def profile_header(middleware):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"x-profile", b"cprofile")]}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"]).get(b"x-profile-file")
+
+
+def test_profile_header_points_to_written_profile(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+    path = profile_header(MetricsMiddleware(app))
+    assert path is not None and os.path.exists(path.decode())
+
+
+def test_no_profile_header_when_profiler_did_not_start(monkeypatch, tmp_path):
+    # Ví dụ đã có một profiler khác đang chạy (yêu cầu đồng thời)
+    monkeypatch.setattr(metrics, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(MetricsMiddleware, "_start_profiler", staticmethod(lambda mode: None))
+    assert profile_header(MetricsMiddleware(app)) is None
+    assert os.listdir(tmp_path) == []
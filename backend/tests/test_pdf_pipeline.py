@@ -0,0 +1,129 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pdf_pipeline
+from benchmarks.pdf_fixtures import build_text_pdf
+from local_pdf_parser import extract_answer_key, parse_questions
+from pdf_page_cache import PageTextCache
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def exam_page(first: int, count: int) -> str:
+    return "\n".join(
+        f"{number}. Choose the word number {number} that fits the sentence best.\nA. apple{number}\nB. banana{number}\nC. cherry{number}"
+        for number in range(first, first + count)
+    )
+
+
+def answer_key_page(first: int, count: int) -> str:
+    letters = "ABC"
+    return "Answer key\n" + "\n".join(f"{number}. {letters[number % 3]}" for number in range(first, first + count))
+
+
+def test_answer_key_at_document_end_applies_to_questions_in_earlier_chunks():
+    text = exam_page(1, 3) + "\n"
+    key = extract_answer_key(text + answer_key_page(1, 3))
+    assert key == {"1": "B", "2": "C", "3": "A"}
+
+    # Chunk không chứa bảng đáp án: không có khóa thì phải chuyển cho LLM
+    assert parse_questions(text)[0] == []
+    questions, rest = parse_questions(text, key)
+    assert [question["answer"] for question in questions] == ["banana1", "cherry2", "apple3"]
+    assert rest == ""
+
+
+def test_answer_key_inside_the_chunk_wins_over_document_key():
+    text = exam_page(1, 1) + "\nAnswer key\n1. C\n"
+    questions, _ = parse_questions(text, {"1": "A"})
+    assert questions[0]["answer"] == "cherry1"
+
+
+def test_ingest_pdf_uses_answer_key_from_the_last_page(monkeypatch):
+    pages = [exam_page(1 + page * 40, 40) for page in range(3)] + [answer_key_page(1, 120)]
+    fallback_texts = []
+
+    async def fake_stream_pages(pdf_content, on_page_count=None):
+        on_page_count(len(pages))
+        for index, text in enumerate(pages):
+            yield index, text
+
+    async def fake_parse_text_questions(text):
+        fallback_texts.append(text)
+        return []
+
+    monkeypatch.setattr(pdf_pipeline, "stream_pages", fake_stream_pages)
+    monkeypatch.setattr(pdf_pipeline, "parse_text_questions", fake_parse_text_questions)
+    progress = []
+
+    questions = run(pdf_pipeline.ingest_pdf(b"%PDF", on_progress=lambda done, total: progress.append((done, total))))
+
+    assert len(progress) > len(pages) + 2, "the exam should span several chunks"
+    # Tổng không đổi (trang trích xuất + trang phân tích) và tiến độ không bao giờ giảm
+    assert {total for _, total in progress} == {2 * len(pages)}
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert progress[-1] == (2 * len(pages), 2 * len(pages))
+    assert len(questions) == 120
+    assert questions[0]["answer"] == "banana1" and questions[-1]["answer"] == "apple120"
+    assert fallback_texts == []
+
+
+async def collect_chunks(pages, max_chars):
+    async def stream():
+        for index, text in enumerate(pages):
+            yield index, text
+
+    return [chunk async for chunk in pdf_pipeline.iter_chunks(stream(), max_chars=max_chars)]
+
+
+def test_iter_chunks_cuts_at_question_starts_within_the_limit():
+    pages = [exam_page(1, 10), "", exam_page(11, 10)]
+    chunks = run(collect_chunks(pages, max_chars=400))
+
+    assert len(chunks) > 3
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert all(pdf_pipeline.QUESTION_START.match(chunk) for chunk in chunks)
+    # Không mất hoặc lặp văn bản, trang rỗng bị bỏ qua
+    assert "".join(chunks) == pages[0] + "\n" + pages[2] + "\n"
+
+
+def test_iter_chunks_cuts_at_line_end_without_question_starts():
+    lines = [f"Line {number} of a reading passage without numbered questions." for number in range(20)]
+    chunks = run(collect_chunks(["\n".join(lines)], max_chars=200))
+
+    assert all(len(chunk) <= 200 and chunk.endswith("\n") for chunk in chunks)
+    assert "".join(chunks).splitlines() == lines
+
+
+def test_stream_pages_extracts_each_distinct_page_once_and_caches_it(monkeypatch):
+    pages = [exam_page(1, 2).splitlines(), exam_page(3, 2).splitlines()]
+    pdf_content = build_text_pdf([pages[0], pages[1], pages[0]])
+    cache = PageTextCache(capacity=100)
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(pdf_pipeline, "page_cache", cache)
+    monkeypatch.setattr(pdf_pipeline, "_executor", executor)
+    monkeypatch.setattr(pdf_pipeline, "PDF_OCR_ENABLED", False)
+    monkeypatch.setattr(pdf_pipeline, "PDF_PAGES_PER_TASK", 1)
+    monkeypatch.setattr(pdf_pipeline, "_stats", dict.fromkeys(pdf_pipeline._stats, 0))
+
+    async def collect():
+        counts = []
+        result = [page async for page in pdf_pipeline.stream_pages(pdf_content, on_page_count=counts.append)]
+        return counts, result
+
+    try:
+        counts, first = run(collect())
+        assert counts == [3]
+        assert [index for index, _ in first] == [0, 1, 2]
+        assert "apple1" in first[0][1] and "apple3" in first[1][1]
+        assert first[2][1] == first[0][1]
+        assert pdf_pipeline._stats["pages_extracted"] == 2
+
+        _, second = run(collect())
+        assert second == first
+        assert pdf_pipeline._stats["pages_cached"] == 3
+        assert pdf_pipeline._stats["pages_extracted"] == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,130 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import question_dedup
+from question_dedup import NearDuplicateIndex, merge_duplicates, reject_duplicates
+
+
+def make(question_id, text, options=("go", "goes", "went", "gone"), answer="goes"):
+    return {"id": question_id, "type": "multiple_choice", "question": text, "options": list(options), "answer": answer}
+
+
+ORIGINAL = make("q1", "Choose the correct word: She ___ to school every day.")
+REWORDED = make("q2", "choose the correct word - she ___ to school every day!", options=("goes", "go", "gone", "went"))
+DIFFERENT = make("q3", "What is the capital city of France?", options=("Paris", "Rome", "Berlin", "Madrid"), answer="Paris")
+
+
+@pytest.fixture
+def index(monkeypatch):
+    fresh = NearDuplicateIndex(capacity=100)
+    monkeypatch.setattr(question_dedup, "question_index", fresh)
+    return fresh
+
+
+def test_reworded_question_is_near_duplicate():
+    index = NearDuplicateIndex(capacity=10)
+    assert index.check_and_add(ORIGINAL) is None
+    assert index.check_and_add(REWORDED) == "q1"
+    assert index.check_and_add(DIFFERENT) is None
+    assert index.size == 2
+
+
+def test_find_does_not_insert():
+    index = NearDuplicateIndex(capacity=10)
+    assert index.find(ORIGINAL) is None
+    assert index.size == 0
+
+
+def test_empty_question_is_ignored():
+    index = NearDuplicateIndex(capacity=10)
+    assert index.signature({"question": " ?! ", "options": None}) is None
+    assert index.check_and_add({"id": "x", "question": "", "options": None}) is None
+    assert index.size == 0
+
+
+def test_capacity_evicts_oldest_first():
+    index = NearDuplicateIndex(capacity=2)
+    index.check_and_add(ORIGINAL)
+    index.check_and_add(DIFFERENT)
+    index.check_and_add(make("q4", "Rearrange the words: university / am / I / at / studying"))
+    assert index.evictions == 1
+    assert index.find(REWORDED) is None
+    assert index.find(DIFFERENT) == "q3"
+
+
+def test_signature_is_stable_across_processes():
+    script = (
+        "import json, sys; sys.path.insert(0, %r);"
+        "from question_dedup import NearDuplicateIndex;"
+        "index = NearDuplicateIndex(capacity=1); signature = index.signature(%r);"
+        "print(json.dumps([signature, index._band_keys(signature)]))"
+    ) % (os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ORIGINAL)
+    outputs = {
+        subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                       env=dict(os.environ, PYTHONHASHSEED=seed)).stdout.strip().splitlines()[-1]
+        for seed in ("1", "2")
+    }
+    assert len(outputs) == 1
+    assert json.loads(outputs.pop())[0] == NearDuplicateIndex(capacity=1).signature(ORIGINAL)
+
+
+def test_reject_duplicates_drops_batch_repeats(index):
+    assert reject_duplicates([ORIGINAL, REWORDED, DIFFERENT]) == [ORIGINAL, DIFFERENT]
+
+
+def test_merge_keeps_one_entry_per_input_in_order(index):
+    stored = {}
+    lookup = lambda ids: [stored.get(question_id) for question_id in ids]
+
+    results, new_questions = merge_duplicates([dict(ORIGINAL)], lookup)
+    stored.update({question["id"]: question for question in new_questions})
+    assert new_questions == [ORIGINAL]
+
+    upload = [dict(REWORDED, id="u1"), dict(DIFFERENT, id="u2"), dict(REWORDED, id="u3")]
+    results, new_questions = merge_duplicates(upload, lookup)
+    assert [question["id"] for question in results] == ["q1", "u2", "q1"]
+    assert [question["id"] for question in new_questions] == ["u2"]
+
+
+def test_merge_requires_same_answer(index):
+    stored = {"q1": ORIGINAL}
+    index.add(ORIGINAL)
+    results, new_questions = merge_duplicates([dict(REWORDED, id="u1", answer="went")], lambda ids: [stored.get(i) for i in ids])
+    assert [question["id"] for question in results] == ["u1"]
+    assert len(new_questions) == 1
+
+
+def test_merge_stores_again_when_match_was_evicted_from_store(index):
+    index.add(ORIGINAL)
+    results, new_questions = merge_duplicates([dict(REWORDED, id="u1")], lambda ids: [None for _ in ids])
+    assert [question["id"] for question in results] == ["u1"]
+    assert new_questions == results
+
+
+def test_similar_wording_with_different_answer_is_not_a_duplicate(index):
+    synonym = make("s1", "Choose the synonym of 'happy'", options=("glad", "sad", "angry", "tired"), answer="glad")
+    antonym = make("a1", "Choose the antonym of 'happy'", options=("glad", "sad", "angry", "tired"), answer="sad")
+    assert reject_duplicates([synonym, antonym]) == [synonym, antonym]
+    assert reject_duplicates([dict(synonym, id="s2")]) == []
+
+
+def test_merge_does_not_replace_uploaded_question_with_reworded_stored_one(index):
+    generated = make("g1", "Select the right word to fill in the blank: She ___ to school every day.")
+    stored = {"g1": generated}
+    index.add(generated)
+    uploaded = dict(ORIGINAL, id="u1")
+    results, new_questions = merge_duplicates([uploaded], lambda ids: [stored.get(i) for i in ids])
+    assert results == [uploaded]
+    assert new_questions == [uploaded]
+
+
+def test_merge_keeps_uploaded_text_and_reuses_stored_id(index):
+    stored = {"q1": ORIGINAL}
+    index.add(ORIGINAL)
+    results, new_questions = merge_duplicates([dict(REWORDED, id="u1")], lambda ids: [stored.get(i) for i in ids])
+    assert results == [dict(REWORDED, id="q1")]
+    assert new_questions == []
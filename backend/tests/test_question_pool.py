@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+
+from question_pool import QuestionPool
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.calls = []
+        self._ids = itertools.count()
+
+    async def __call__(self, num_questions, question_types, topic):
+        self.calls.append((num_questions, topic))
+        await asyncio.sleep(0)
+        return [{"id": str(next(self._ids)), "topic": topic} for _ in range(num_questions)]
+
+
+async def settle(pool):
+    while pool.stats()["refilling"]:
+        await asyncio.sleep(0.001)
+
+
+def test_configured_pool_is_filled_to_target_and_served_first():
+    async def scenario():
+        generate = FakeGenerator()
+        pool = QuestionPool(generate, low_watermark=5, batch_size=10, target=20)
+        pool.prefill()
+        await settle(pool)
+        assert generate.calls == [(10, None), (10, None)]
+
+        questions = await pool.take(25)
+        assert len(questions) == 25
+        assert (pool.served_from_pool, pool.served_direct) == (20, 5)
+        await settle(pool)
+        assert pool.stats()["pools"]["fill_blank+multiple_choice+sentence_rearrangement|*"] == 20
+        await pool.shutdown()
+
+    run(scenario())
+
+
+def test_one_off_topic_does_not_trigger_background_refill():
+    async def scenario():
+        generate = FakeGenerator()
+        pool = QuestionPool(generate, low_watermark=10, batch_size=20, target=40)
+        for topic in ("space", "cooking", "music"):
+            assert len(await pool.take(5, topic=topic)) == 5
+        await settle(pool)
+        # Chỉ tạo trực tiếp phần được yêu cầu, không bổ sung nền 40 câu cho mỗi chủ đề
+        assert generate.calls == [(5, "space"), (5, "cooking"), (5, "music")]
+        await pool.shutdown()
+
+    run(scenario())
+
+
+def test_repeated_topic_refills_only_up_to_observed_demand():
+    async def scenario():
+        generate = FakeGenerator()
+        pool = QuestionPool(generate, low_watermark=10, batch_size=20, target=40)
+        await pool.take(3, topic="travel")
+        await pool.take(4, topic="travel")
+        await settle(pool)
+        assert generate.calls == [(3, "travel"), (4, "travel"), (7, "travel")]
+
+        # Yêu cầu tiếp theo được phục vụ từ kho
+        assert len(await pool.take(7, topic="travel")) == 7
+        assert pool.served_from_pool == 7
+        await settle(pool)
+        assert generate.calls[-1] == (14, "travel")
+        await pool.shutdown()
+
+    run(scenario())
+
+
+def test_evicted_pool_cancels_its_refill_and_forgets_demand():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow_generate(num_questions, question_types, topic):
+            started.set()
+            await asyncio.sleep(10)
+            return []
+
+        pool = QuestionPool(slow_generate, max_keys=1, min_requests=1)
+        pool.take_available(5, topic="first")
+        await started.wait()
+        task = pool._refills[pool.make_key(None, "first")]
+        pool.take_available(5, topic="second")
+        await asyncio.sleep(0)
+        assert task.cancelled()
+        assert pool.make_key(None, "first") not in pool._demand
+        await pool.shutdown()
+
+    run(scenario())
@@ -0,0 +1,103 @@
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import question_store as question_store_module
+from question_store import QuestionStore
+from sqlite_store import SQLiteQuestionStore
+
+
+def make(question_id, question_type="fill_blank"):
+    return {"id": question_id, "type": question_type, "question": f"Question {question_id}", "options": None, "answer": "a"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = QuestionStore() if request.param == "memory" else SQLiteQuestionStore(str(tmp_path / "questions.db"))
+    yield store
+    store.close()
+
+
+def test_add_and_get(store):
+    assert store.add_many([make("q1"), make("q2", "multiple_choice")], topic="grammar") == 2
+    assert store.get("q1") == make("q1")
+    assert store.get("missing") is None
+    assert "q2" in store and "missing" not in store
+    assert len(store) == 2
+    assert (store.stats()["hits"], store.stats()["misses"]) == (1, 1)
+
+
+def test_add_overwrites_existing_id(store):
+    store.add(make("q1"))
+    store.add(dict(make("q1"), answer="b"))
+    assert len(store) == 1
+    assert store.get("q1")["answer"] == "b"
+
+
+def test_get_many_keeps_order_and_reports_missing(store):
+    store.add_many([make("q1"), make("q2")])
+    assert [q and q["id"] for q in store.get_many(["q2", "missing", "q1", "q2"])] == ["q2", None, "q1", "q2"]
+
+
+def test_secondary_indexes_and_sample(store):
+    store.add_many([make("q1"), make("q2", "multiple_choice")], topic="grammar")
+    store.add(make("q3"), topic="vocab")
+    assert sorted(store.ids_by_type("fill_blank")) == ["q1", "q3"]
+    assert sorted(store.ids_by_topic("grammar")) == ["q1", "q2"]
+    assert [q["id"] for q in store.sample(5, question_types=["fill_blank"], topic="grammar")] == ["q1"]
+    assert len(store.sample(2)) == 2
+    assert store.sample(5, topic="unknown") == []
+    assert store.stats()["types"] == {"fill_blank": 2, "multiple_choice": 1}
+
+
+def test_sqlite_store_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "questions.db")
+    writer, reader = SQLiteQuestionStore(path), SQLiteQuestionStore(path)
+    writer.add(make("q1"))
+    assert reader.get("q1") == make("q1")
+    writer.close()
+    reader.close()
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = QuestionStore(capacity=2)
+    store.add_many([make("q1"), make("q2")], topic="grammar")
+    store.get("q1")
+    store.add(make("q3"))
+    assert store.get("q2") is None
+    assert store.ids_by_topic("grammar") == ["q1"]
+    assert store.stats()["evictions"] == 1
+
+
+def test_memory_store_expires_entries_after_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(question_store_module, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    store = QuestionStore(ttl=10)
+    store.add(make("q1"))
+    clock[0] += 5
+    assert store.get("q1") is not None
+    clock[0] += 9
+    assert store.get("q1") is not None
+    clock[0] += 11
+    assert store.get("q1") is None
+    assert store.ids_by_type("fill_blank") == []
+
+
+def test_sqlite_store_gives_up_quickly_when_another_writer_holds_the_lock(tmp_path):
+    path = str(tmp_path / "questions.db")
+    writer = SQLiteQuestionStore(path)
+    other = SQLiteQuestionStore(path)
+    writer._db._conn.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        with pytest.raises(sqlite3.OperationalError):
+            other.add(make("q1"))
+        # Chờ khóa ngắn rồi thử lại, không chặn event loop tới 30 giây
+        assert time.perf_counter() - started < 5
+    finally:
+        writer._db._conn.execute("ROLLBACK")
+    assert other.add_many([make("q1")]) == 1
+    writer.close()
+    other.close()
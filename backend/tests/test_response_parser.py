@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import openai_helper
+import services
+from response_parser import extract_objects, parse_questions
+
+QUESTION = {"id": 0, "type": "multiple_choice", "question": "Q?", "options": ["a", "b", "c"], "answer": "a"}
+
+
+def test_bare_object_is_parsed_without_salvage():
+    result = parse_questions(json.dumps(QUESTION))
+    assert len(result.questions) == 1
+    assert result.questions[0]["options"] == ["a", "b", "c"]
+    assert result.candidates == 1
+    assert not result.salvaged
+
+
+def test_object_wrapped_in_prose():
+    result = parse_questions("Đây là câu hỏi của bạn: " + json.dumps(QUESTION) + " Chúc học tốt!")
+    assert [q["question"] for q in result.questions] == ["Q?"]
+
+
+def test_object_in_code_fence():
+    result = parse_questions("```json\n" + json.dumps(QUESTION) + "\n```")
+    assert len(result.questions) == 1
+    assert not result.salvaged
+
+
+def test_array_in_code_fence():
+    result = parse_questions("```json\n" + json.dumps([QUESTION, dict(QUESTION, question="Q2?")]) + "\n```")
+    assert [q["question"] for q in result.questions] == ["Q?", "Q2?"]
+    assert not result.salvaged
+
+
+def test_wrapped_questions_key():
+    items, salvaged = extract_objects(json.dumps({"questions": [QUESTION]}))
+    assert items == [QUESTION]
+    assert not salvaged
+
+
+def test_truncated_array_salvages_complete_objects():
+    text = json.dumps([QUESTION, dict(QUESTION, question="Q2?"), dict(QUESTION, question="Q3?")])
+    result = parse_questions(text[:-30])
+    assert [q["question"] for q in result.questions] == ["Q?", "Q2?"]
+    assert result.salvaged
+
+
+def test_array_of_non_objects_falls_back_to_salvage():
+    items, salvaged = extract_objects('Các lựa chọn ["a", "b"] và câu hỏi ' + json.dumps(QUESTION))
+    assert items == [QUESTION]
+    assert salvaged
+
+
+def test_invalid_questions_are_dropped_and_ids_assigned():
+    result = parse_questions(json.dumps([QUESTION, {"type": "unknown", "question": "x", "answer": "y"},
+                                         dict(QUESTION, options=None)]))
+    assert len(result.questions) == 1
+    assert result.invalid == 2
+    assert result.questions[0]["id"] != 0 and len(result.questions[0]["id"]) == 36
+
+
+def test_explanation_is_kept_only_when_requested():
+    text = json.dumps([dict(QUESTION, explanation="Vì a đúng.")])
+    assert parse_questions(text, keep_explanation=True).questions[0]["explanation"] == "Vì a đúng."
+    assert "explanation" not in parse_questions(text).questions[0]
+    assert "explanation" not in parse_questions(json.dumps([QUESTION]), keep_explanation=True).questions[0]
+
+
+def test_generated_questions_get_the_detailed_explanation_and_pdf_questions_keep_theirs(monkeypatch):
+    generated = dict(QUESTION, question="Generated: pick the colour of the sky?", explanation="Ngắn.")
+    from_pdf = dict(QUESTION, question="From PDF: pick the colour of grass?", explanation="Lời giải trong đề.")
+    responses = iter([json.dumps([generated]), json.dumps([from_pdf])])
+
+    async def fake_chat_completion(**kwargs):
+        return next(responses)
+
+    async def fake_generate_explanation(question):
+        return "Lời giải thích chi tiết."
+
+    monkeypatch.setattr(openai_helper, "chat_completion", fake_chat_completion)
+    monkeypatch.setattr(services, "generate_explanation", fake_generate_explanation)
+
+    async def scenario():
+        generated_question = (await openai_helper._request_questions(1, None, None))[0]
+        pdf_question = (await openai_helper.parse_text_questions("1. From PDF"))[0]
+        return await services.get_explanation(generated_question), await services.get_explanation(pdf_question)
+
+    assert asyncio.run(scenario()) == ("Lời giải thích chi tiết.", "Lời giải trong đề.")
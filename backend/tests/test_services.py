@@ -0,0 +1,25 @@
+from services import check_answer, check_answers
+
+QUESTIONS = [
+    {"id": "f", "type": "fill_blank", "question": "I ___ happy.", "options": None, "answer": " Am "},
+    {"id": "m", "type": "multiple_choice", "question": "Pick", "options": ["a", "b"], "answer": "a"},
+    {"id": "s", "type": "sentence_rearrangement", "question": "Order", "options": None, "answer": ["I", "Am", "Here"]},
+    {"id": "u", "type": "essay", "question": "Write", "options": None, "answer": "x"},
+]
+ANSWERS = ["am", "A", ["i", "am ", "HERE"], "x"]
+
+
+def test_check_answers_matches_check_answer_for_every_question():
+    result = check_answers([q["id"] for q in QUESTIONS], QUESTIONS, ANSWERS)
+    expected = [dict(check_answer(q, a), question_id=q["id"]) for q, a in zip(QUESTIONS, ANSWERS)]
+    assert result["details"] == expected
+    assert [detail["correct"] for detail in result["details"]] == [True, False, True, False]
+    assert (result["total_questions"], result["correct_answers"], result["score"]) == (4, 2, 50.0)
+
+
+def test_check_answers_reports_missing_question_with_null_answer():
+    result = check_answers(["missing", "m"], [None, QUESTIONS[1]], ["a", "a"])
+    assert result["details"][0] == {
+        "question_id": "missing", "correct": False, "explanation": "Không tìm thấy câu hỏi", "correct_answer": None,
+    }
+    assert result["score"] == 50.0
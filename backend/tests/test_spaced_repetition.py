@@ -0,0 +1,90 @@
+import pytest
+
+from spaced_repetition import DAY, DEFAULT_EASE, RELEARN_DELAY, SpacedRepetition, sm2
+
+NOW = 1_000_000.0
+
+
+def test_sm2_intervals_grow_and_reset_on_failure():
+    interval, ease, reps = sm2(0.0, DEFAULT_EASE, 0, 4)
+    assert (interval, reps) == (1.0, 1)
+    interval, ease, reps = sm2(interval, ease, reps, 4)
+    assert (interval, reps) == (6.0, 2)
+    interval, ease, reps = sm2(interval, ease, reps, 4)
+    assert interval == pytest.approx(6.0 * ease)
+    interval, ease, reps = sm2(interval, ease, reps, 1)
+    assert (interval, reps) == (0.0, 0)
+
+
+def test_record_schedules_correct_and_incorrect_answers():
+    scheduler = SpacedRepetition()
+    correct = scheduler.record("alice", "q1", True, now=NOW)
+    wrong = scheduler.record("alice", "q2", False, now=NOW)
+    assert correct["due"] == NOW + DAY
+    assert (wrong["due"], wrong["lapses"]) == (NOW + RELEARN_DELAY, 1)
+
+
+def test_next_due_returns_earliest_due_items_only():
+    scheduler = SpacedRepetition()
+    scheduler.record_many("alice", [("q1", True), ("q2", False), ("q3", False)], now=NOW)
+    scheduler.record("alice", "q3", False, now=NOW + 10)
+    due = scheduler.next_due("alice", count=5, now=NOW + RELEARN_DELAY + 5)
+    assert [item["item_id"] for item in due] == ["q2"]
+    assert scheduler.next_due("alice", count=5, now=NOW) == []
+    assert scheduler.next_due("bob", now=NOW + 10 * DAY) == []
+
+
+def test_learners_are_independent():
+    scheduler = SpacedRepetition()
+    scheduler.record("alice", "q1", False, now=NOW)
+    scheduler.record("bob", "q1", True, now=NOW)
+    assert scheduler.learner_stats("alice", now=NOW + DAY)["lapses"] == 1
+    assert scheduler.learner_stats("bob", now=NOW + DAY)["lapses"] == 0
+
+
+def test_evicted_learners_release_memory_and_reload_from_sqlite(tmp_path):
+    scheduler = SpacedRepetition(capacity=1, db_path=str(tmp_path / "srs.db"))
+    scheduler.record_many("alice", [("a1", True), ("a2", False)], now=NOW)
+    scheduler.record_many("bob", [("b1", True)], now=NOW)
+    stats = scheduler.stats()
+    assert (stats["learners_in_memory"], stats["items_in_memory"], stats["evictions"]) == (1, 1, 1)
+
+    due = scheduler.next_due("alice", count=5, now=NOW + DAY)
+    assert [item["item_id"] for item in due] == ["a2", "a1"]
+    assert scheduler.stats()["items_in_memory"] == 2
+    scheduler.close()
+
+
+def test_memory_only_scheduler_is_bounded_by_capacity():
+    scheduler = SpacedRepetition(capacity=2)
+    for learner in ("alice", "bob", "carol"):
+        scheduler.record(learner, "item", True, now=NOW)
+    stats = scheduler.stats()
+    assert (stats["backend"], stats["learners_in_memory"], stats["evictions"]) == ("memory", 2, 1)
+    # Người học ít dùng nhất bị loại cùng lịch ôn của mình
+    assert scheduler.learner_stats("alice", now=NOW)["items"] == 0
+    assert scheduler.learner_stats("carol", now=NOW)["items"] == 1
+
+
+def test_uncached_scheduler_matches_cached_and_reads_only_needed_rows(tmp_path):
+    cached = SpacedRepetition(db_path=str(tmp_path / "cached.db"))
+    uncached = SpacedRepetition(capacity=0, db_path=str(tmp_path / "uncached.db"))
+    history = [("q%d" % i, i % 3 != 0) for i in range(50)]
+    for scheduler in (cached, uncached):
+        # Thời điểm khác nhau để thứ tự đến hạn không phụ thuộc cách xếp các mục trùng hạn
+        for offset, outcome in enumerate(history):
+            scheduler.record_many("alice", [outcome], now=NOW + offset)
+        scheduler.record_many("alice", history[:5], now=NOW + 100)
+
+    loaded = []
+    load = uncached._db.load
+    uncached._db.load = lambda learner_id, item_ids=None: loaded.append(item_ids) or load(learner_id, item_ids)
+    assert uncached.record("alice", "q1", True, now=NOW + 200) == cached.record("alice", "q1", True, now=NOW + 200)
+    assert loaded == [["q1"]]
+
+    later = NOW + 2 * DAY
+    assert uncached.next_due("alice", count=7, now=later) == cached.next_due("alice", count=7, now=later)
+    assert uncached.learner_stats("alice", now=later) == cached.learner_stats("alice", now=later)
+    assert uncached.stats()["learners_in_memory"] == 0
+    cached.close()
+    uncached.close()
@@ -0,0 +1,50 @@
+import pytest
+
+import vocab
+from vocab import Vocabulary, fold, get_vocabulary, load_vocabulary
+
+ENTRIES = [
+    {"english": "house", "vietnamese": ["nhà", "ngôi nhà"], "pos": "noun", "pronunciation": "/haʊs/", "explanation": "A building"},
+    {"english": "home", "vietnamese": ["nhà", "quê hương"], "pos": "noun"},
+    {"english": "go", "vietnamese": ["đi"], "pos": "verb"},
+    {"english": "beautiful", "vietnamese": "đẹp", "pos": "adjective"},
+]
+
+
+def test_fold_removes_vietnamese_diacritics():
+    assert fold("  Nhà ") == "nha"
+    assert fold("Đi") == "di"
+
+
+def test_search_matches_english_and_folded_vietnamese():
+    words = Vocabulary(ENTRIES)
+    assert [item["english"] for item in words.search("ho")["items"]] == ["home", "house"]
+    assert {item["english"] for item in words.search("nha")["items"]} == {"house", "home"}
+    assert [item["english"] for item in words.search("di")["items"]] == ["go"]
+    assert words.search("zzz")["items"] == []
+
+
+def test_entries_round_trip_and_string_gloss_is_listed():
+    words = Vocabulary(ENTRIES)
+    assert words.search("house")["items"][0] == ENTRIES[0]
+    assert words.search("beautiful")["items"][0]["vietnamese"] == ["đẹp"]
+
+
+def test_by_pos_and_sample():
+    words = Vocabulary(ENTRIES)
+    assert [item["english"] for item in words.by_pos("noun")["items"]] == ["house", "home"]
+    assert words.by_pos("adverb")["items"] == []
+    sample = words.sample(10, pos="verb")
+    assert [item["english"] for item in sample] == ["go"]
+    assert len(words.sample(3)) == 3
+
+
+def test_bundled_vocabulary_loads():
+    assert len(load_vocabulary()) > 0
+
+
+def test_missing_vocabulary_file_fails_loudly(monkeypatch, tmp_path):
+    monkeypatch.setattr(vocab, "_vocabulary", None)
+    monkeypatch.setattr(vocab, "VOCAB_PATH", str(tmp_path / "missing.json"))
+    with pytest.raises(RuntimeError):
+        get_vocabulary()
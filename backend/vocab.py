@@ -0,0 +1,179 @@
+import json
+import os
+import random
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+# Mặc định dùng danh sách từ vựng đi kèm backend (frontend lấy từ vựng qua API /vocab/*)
+VOCAB_PATH = os.getenv(
+    "VOCAB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "vocab.json"),
+)
+
+# Ký tự phân tách các nghĩa tiếng Việt khi lưu gộp thành một chuỗi
+_SEPARATOR = "\x1f"
+
+
+def fold(text: str) -> str:
+    """Chuẩn hóa để tìm kiếm: chữ thường, bỏ dấu tiếng Việt (nhà -> nha, đi -> di)"""
+    text = unicodedata.normalize("NFD", text.strip().lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).replace("đ", "d")
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Vocabulary:
+    """
+    Từ vựng lưu dạng mảng song song (mỗi trường một danh sách, mỗi từ một chỉ số).
+
+    - Chỉ mục tiền tố: danh sách khóa đã sắp xếp (từ tiếng Anh và từng nghĩa tiếng Việt), tìm bằng bisect
+    - Chỉ mục trigram: trigram -> array các chỉ số từ, dùng cho tìm kiếm chuỗi con
+    - Chỉ mục theo từ loại (`pos`)
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self._english: List[str] = []
+        self._vietnamese: List[str] = []
+        self._pronunciation: List[str] = []
+        self._explanation: List[str] = []
+        self._pos_names: List[str] = []
+        self._pos_ids = array("H")
+        self._search: List[str] = []
+        self._by_pos: Dict[int, array] = {}
+        self._trigrams: Dict[str, array] = {}
+        pos_lookup: Dict[str, int] = {}
+        prefix_pairs: List[Tuple[str, int]] = []
+
+        for index, entry in enumerate(entries):
+            english = entry.get("english", "")
+            glosses = entry.get("vietnamese") or []
+            if isinstance(glosses, str):
+                glosses = [glosses]
+            pos = entry.get("pos", "")
+            if pos not in pos_lookup:
+                pos_lookup[pos] = len(self._pos_names)
+                self._pos_names.append(pos)
+            pos_id = pos_lookup[pos]
+
+            self._english.append(english)
+            self._vietnamese.append(_SEPARATOR.join(glosses))
+            self._pronunciation.append(entry.get("pronunciation", ""))
+            self._explanation.append(entry.get("explanation", ""))
+            self._pos_ids.append(pos_id)
+            self._by_pos.setdefault(pos_id, array("I")).append(index)
+
+            keys = [fold(english)] + [fold(gloss) for gloss in glosses]
+            search_text = _SEPARATOR.join(keys)
+            self._search.append(search_text)
+            prefix_pairs.extend((key, index) for key in keys if key)
+            for trigram in _trigrams(search_text):
+                postings = self._trigrams.get(trigram)
+                if postings is None:
+                    postings = self._trigrams[trigram] = array("I")
+                postings.append(index)
+
+        prefix_pairs.sort()
+        self._prefix_keys = [key for key, _ in prefix_pairs]
+        self._prefix_ids = array("I", (index for _, index in prefix_pairs))
+
+    def __len__(self) -> int:
+        return len(self._english)
+
+    def entry(self, index: int) -> Dict[str, Any]:
+        """Dựng lại một mục từ vựng theo định dạng của vocab.json"""
+        vietnamese = self._vietnamese[index]
+        return {
+            "english": self._english[index],
+            "vietnamese": vietnamese.split(_SEPARATOR) if vietnamese else [],
+            "pos": self._pos_names[self._pos_ids[index]],
+            "pronunciation": self._pronunciation[index],
+            "explanation": self._explanation[index],
+        }
+
+    def pos_names(self) -> List[str]:
+        return list(self._pos_names)
+
+    def search_ids(self, query: str) -> List[int]:
+        """
+        Tìm từ theo tiếng Anh hoặc nghĩa tiếng Việt (không phân biệt hoa thường và dấu).
+
+        Kết quả khớp tiền tố đứng trước (theo thứ tự chữ cái), sau đó là kết quả
+        chứa chuỗi truy vấn ở giữa (chỉ với truy vấn từ 3 ký tự).
+        """
+        folded = fold(query)
+        if not folded:
+            return []
+        # Các khóa có cùng tiền tố nằm liền nhau trong danh sách đã sắp xếp
+        start = bisect_left(self._prefix_keys, folded)
+        end = bisect_left(self._prefix_keys, folded + "\uffff", start)
+        # dict.fromkeys loại trùng (một từ có thể khớp nhiều khóa) và giữ thứ tự
+        seen = dict.fromkeys(self._prefix_ids[start:end])
+        results: List[int] = list(seen)
+
+        if len(folded) >= 3:
+            postings = [self._trigrams.get(trigram) for trigram in _trigrams(folded)]
+            if all(p is not None for p in postings):
+                # Duyệt danh sách ngắn nhất rồi kiểm tra lại bằng so khớp chuỗi con
+                search = self._search
+                for index in min(postings, key=len):
+                    if index not in seen and folded in search[index]:
+                        seen[index] = None
+                        results.append(index)
+        return results
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
+        """Tìm kiếm có phân trang"""
+        ids = self.search_ids(query)
+        return self._page(ids, offset, limit)
+
+    def ids_by_pos(self, pos: str) -> array:
+        """Chỉ số các từ có đúng từ loại `pos` (mảng rỗng nếu không có)"""
+        try:
+            return self._by_pos.get(self._pos_names.index(pos), array("I"))
+        except ValueError:
+            return array("I")
+
+    def by_pos(self, pos: str, offset: int = 0, limit: int = 20) -> Dict[str, Any]:
+        """Liệt kê từ theo từ loại có phân trang"""
+        return self._page(self.ids_by_pos(pos), offset, limit)
+
+    def sample(self, count: int, pos: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lấy ngẫu nhiên `count` từ (có thể lọc theo từ loại)"""
+        if pos is not None:
+            ids = self.ids_by_pos(pos)
+            chosen = random.sample(range(len(ids)), min(count, len(ids)))
+            return [self.entry(ids[i]) for i in chosen]
+        return [self.entry(i) for i in random.sample(range(len(self)), min(count, len(self)))]
+
+    def _page(self, ids, offset: int, limit: int) -> Dict[str, Any]:
+        return {
+            "items": [self.entry(index) for index in ids[offset:offset + limit]],
+            "total": len(ids),
+            "offset": offset,
+            "limit": limit,
+        }
+
+
+_vocabulary: Optional[Vocabulary] = None
+
+
+def load_vocabulary(path: str = VOCAB_PATH) -> Vocabulary:
+    """Đọc tệp từ vựng JSON và dựng các chỉ mục"""
+    with open(path, encoding="utf-8") as f:
+        return Vocabulary(json.load(f))
+
+
+def get_vocabulary() -> Vocabulary:
+    """Từ vựng dùng chung của ứng dụng, chỉ nạp một lần; ném RuntimeError nếu không đọc được tệp"""
+    global _vocabulary
+    if _vocabulary is None:
+        try:
+            _vocabulary = load_vocabulary(VOCAB_PATH)
+        except (OSError, ValueError) as e:
+            # Gọi khi khởi động: thiếu tệp từ vựng thì dừng ngay thay vì chạy với từ vựng rỗng
+            raise RuntimeError(f"Không nạp được từ vựng từ {VOCAB_PATH} (đặt VOCAB_PATH): {e}") from e
+    return _vocabulary
@@ -0,0 +1,199 @@
+import random
+import uuid
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from question_pool import ALL_QUESTION_TYPES
+from vocab import Vocabulary, get_vocabulary
+
+# Chủ đề "vocab" (hoặc "vocab:<từ loại>", ví dụ "vocab:noun") sinh câu hỏi cục bộ từ danh sách từ vựng
+VOCAB_TOPIC = "vocab"
+
+BLANK = "_____"
+NUM_OPTIONS = 4
+
+
+def parse_vocab_topic(topic: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Kiểm tra chủ đề có yêu cầu câu hỏi từ vựng hay không.
+
+    Returns:
+        (True, từ loại hoặc None) với "vocab" / "vocab:<pos>", (False, None) với chủ đề khác
+    """
+    if not topic:
+        return False, None
+    name, _, pos = topic.strip().partition(":")
+    if name.strip().lower() != VOCAB_TOPIC:
+        return False, None
+    return True, pos.strip().lower() or None
+
+
+def _mask_word(text: str, word: str) -> Optional[str]:
+    """Thay mọi lần xuất hiện (nguyên từ, không phân biệt hoa thường) của word bằng BLANK, None nếu không có"""
+    lowered, target = text.lower(), word.lower()
+    parts: List[str] = []
+    last = 0
+    position = lowered.find(target)
+    while position != -1:
+        end = position + len(target)
+        # Chỉ che khi không nằm giữa một từ dài hơn ("car" trong "carrot")
+        if (position == 0 or not lowered[position - 1].isalnum()) and (end == len(lowered) or not lowered[end].isalnum()):
+            parts.append(text[last:position])
+            parts.append(BLANK)
+            last = end
+        position = lowered.find(target, end)
+    if not parts:
+        return None
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+class VocabQuestionGenerator:
+    """
+    Sinh câu hỏi fill_blank, multiple_choice và sentence_rearrangement từ từ vựng, không cần LLM.
+
+    Phương án nhiễu của câu trắc nghiệm được lấy từ các từ cùng từ loại qua chỉ mục
+    tính sẵn (từ loại -> chỉ số từ); từ có nhiều từ loại ("noun/verb") thuộc mọi nhóm tương ứng.
+    """
+
+    def __init__(self, vocabulary: Vocabulary, rng: Optional[random.Random] = None):
+        self.vocabulary = vocabulary
+        self._rng = rng or random.Random()
+        self._buckets: Dict[str, array] = {}
+        for pos in vocabulary.pos_names():
+            ids = vocabulary.ids_by_pos(pos)
+            for part in pos.split("/"):
+                part = part.strip().lower()
+                if part:
+                    self._buckets.setdefault(part, array("I")).extend(ids)
+
+    def pos_names(self) -> List[str]:
+        return sorted(self._buckets)
+
+    def generate(self, num_questions: int, question_types: Optional[List[str]] = None, pos: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Sinh num_questions câu hỏi, các loại câu hỏi được phân bố đều.
+
+        Args:
+            num_questions: Số lượng câu hỏi cần tạo
+            question_types: Danh sách loại câu hỏi (mặc định tất cả)
+            pos: Chỉ dùng từ thuộc từ loại này (nếu có)
+
+        Returns:
+            Danh sách câu hỏi theo định dạng Question (đã gán ID), rỗng nếu không có từ phù hợp
+        """
+        types = [t for t in (question_types or ALL_QUESTION_TYPES) if t in ALL_QUESTION_TYPES]
+        if pos is not None:
+            candidates = self._buckets.get(pos.lower(), array("I"))
+        else:
+            candidates = range(len(self.vocabulary))
+        if not types or not candidates or num_questions <= 0:
+            return []
+
+        rng = self._rng
+        # Tránh lặp từ trong cùng một lô khi số từ đủ lớn
+        if num_questions <= len(candidates):
+            chosen = [candidates[i] for i in rng.sample(range(len(candidates)), num_questions)]
+        else:
+            chosen = [candidates[rng.randrange(len(candidates))] for _ in range(num_questions)]
+
+        builders = {
+            "fill_blank": self._fill_blank,
+            "multiple_choice": self._multiple_choice,
+            "sentence_rearrangement": self._sentence_rearrangement,
+        }
+        questions = []
+        for i, index in enumerate(chosen):
+            entry = self.vocabulary.entry(index)
+            if not entry["english"] or not entry["vietnamese"]:
+                continue
+            question = builders[types[i % len(types)]](index, entry)
+            question["id"] = str(uuid.uuid4())
+            questions.append(question)
+        return questions
+
+    def _fill_blank(self, index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        english = entry["english"]
+        meaning = ", ".join(entry["vietnamese"])
+        # Dùng câu giải thích của từ làm ngữ cảnh, che từ cần điền
+        context = _mask_word(entry["explanation"], english)
+        if context is None:
+            context = f"{BLANK} ({entry['pos']})"
+        return {
+            "type": "fill_blank",
+            "question": f"Điền từ tiếng Anh có nghĩa \"{meaning}\" vào chỗ trống: {context}",
+            "options": None,
+            "answer": english,
+        }
+
+    def _multiple_choice(self, index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        distractors = [self.vocabulary.entry(i) for i in self._distractors(index, entry)]
+        if self._rng.random() < 0.5:
+            # Chọn nghĩa tiếng Việt của từ tiếng Anh
+            question = f"Từ \"{entry['english']}\" ({entry['pos']}) có nghĩa là gì?"
+            answer = entry["vietnamese"][0]
+            options = [answer] + [d["vietnamese"][0] for d in distractors]
+        else:
+            # Chọn từ tiếng Anh theo nghĩa tiếng Việt
+            question = f"Từ tiếng Anh nào có nghĩa là \"{entry['vietnamese'][0]}\"?"
+            answer = entry["english"]
+            options = [answer] + [d["english"] for d in distractors]
+        self._rng.shuffle(options)
+        return {"type": "multiple_choice", "question": question, "options": options, "answer": answer}
+
+    def _sentence_rearrangement(self, index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        english = entry["english"]
+        words = english.split()
+        if len(words) > 1:
+            question = f"Sắp xếp các từ sau thành cụm từ có nghĩa \"{entry['vietnamese'][0]}\"."
+            answer = words
+        else:
+            question = f"Sắp xếp các chữ cái sau thành từ tiếng Anh có nghĩa \"{entry['vietnamese'][0]}\"."
+            answer = list(english)
+        options = list(answer)
+        # Xáo trộn lại vài lần để tránh trả về đúng thứ tự của đáp án
+        for _ in range(3):
+            self._rng.shuffle(options)
+            if options != answer:
+                break
+        return {"type": "sentence_rearrangement", "question": question, "options": options, "answer": answer}
+
+    def _distractors(self, index: int, entry: Dict[str, Any]) -> List[int]:
+        """Chọn NUM_OPTIONS - 1 từ khác cùng từ loại (bổ sung từ toàn bộ từ vựng nếu nhóm quá nhỏ)"""
+        rng = self._rng
+        bucket = self._buckets.get(entry["pos"].split("/")[0].strip().lower(), array("I"))
+        # Loại cả từ trùng chữ lẫn trùng nghĩa để chỉ có đúng một phương án đúng
+        seen = {entry["english"].lower(), entry["vietnamese"][0].lower()}
+        picked: List[int] = []
+        for pool in (bucket, range(len(self.vocabulary))):
+            attempts = 0
+            while len(picked) < NUM_OPTIONS - 1 and attempts < 10 * NUM_OPTIONS and len(pool) > 1:
+                attempts += 1
+                candidate = pool[rng.randrange(len(pool))]
+                if candidate == index:
+                    continue
+                other = self.vocabulary.entry(candidate)
+                english = other["english"].lower()
+                meaning = other["vietnamese"][0].lower() if other["vietnamese"] else ""
+                if not meaning or english in seen or meaning in seen:
+                    continue
+                seen.update((english, meaning))
+                picked.append(candidate)
+        return picked
+
+
+_generator: Optional[VocabQuestionGenerator] = None
+
+
+def get_vocab_question_generator() -> VocabQuestionGenerator:
+    """Bộ sinh câu hỏi dùng chung, dựng từ từ vựng của ứng dụng"""
+    global _generator
+    if _generator is None:
+        _generator = VocabQuestionGenerator(get_vocabulary())
+    return _generator
+
+
+def generate_vocab_questions(num_questions: int, question_types: Optional[List[str]] = None, topic: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Sinh câu hỏi từ vựng cho chủ đề "vocab" / "vocab:<pos>" (cùng tham số với generate_questions)"""
+    _, pos = parse_vocab_topic(topic)
+    return get_vocab_question_generator().generate(num_questions, question_types, pos=pos)
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from "react";
-import { Question, CheckResult, Answer, WrongQuestion } from "../types";
-import { generateExam, checkAnswer } from "../services/api";
+import { Question, ExamResultDetail, Answer, WrongQuestion } from "../types";
+import { generateExam, checkExam } from "../services/api";
 import QuestionComponent from "../components/Question";
 import MarkdownRenderer from "../components/MarkdownRenderer";
 import axios from "axios";
@@ -12,7 +12,7 @@ import jsPDF from "jspdf";
 const Exam: React.FC = () => {
   const [questions, setQuestions] = useState<Question[]>([]);
   const [userAnswers, setUserAnswers] = useState<{ [key: string]: string | string[] }>({});
-  const [results, setResults] = useState<CheckResult[]>([]);
+  const [results, setResults] = useState<ExamResultDetail[]>([]);
   const [explanations, setExplanations] = useState<{ [key: string]: string }>({});
   const [numQuestions, setNumQuestions] = useState<number>(1);
   const [topic, setTopic] = useState<string>("");
@@ -74,7 +74,7 @@ const Exam: React.FC = () => {
     }));
 
     try {
-      const checkResults = await Promise.all(answers.map((answer) => checkAnswer(answer)));
+      const { details: checkResults } = await checkExam(answers);
       setResults(checkResults);
       setIsSubmitted(true);
 
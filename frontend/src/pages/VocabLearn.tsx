@@ -1,6 +1,6 @@
 // src/pages/VocabLearn.tsx
 import React, { useState } from "react";
-import vocabData from "../data/vocab.json";
+import { getRandomVocab } from "../services/api";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faVolumeHigh, faMicrophone } from "@fortawesome/free-solid-svg-icons";
 import { toast } from "react-toastify";
@@ -9,8 +9,8 @@ interface Vocabulary {
   english: string;
   vietnamese: string[];
   pos: string;
-  pronunciation: string;
-  explanation: string;
+  pronunciation?: string;
+  explanation?: string;
 }
 
 interface WrongVocab extends Vocabulary {
@@ -27,9 +27,15 @@ const VocabLearn: React.FC = () => {
   const [isSubmitted, setIsSubmitted] = useState(false);
   const [results, setResults] = useState<{ [key: string]: boolean }>({});
 
-  const startLearning = () => {
-    const shuffled = [...vocabData].sort(() => 0.5 - Math.random());
-    const selected = shuffled.slice(0, numVocabs);
+  const startLearning = async () => {
+    let selected: Vocabulary[];
+    try {
+      selected = await getRandomVocab(numVocabs);
+    } catch (error) {
+      console.error("Error fetching vocabulary", error);
+      toast.error("Could not load vocabulary. Please try again.");
+      return;
+    }
     setVocabList(selected);
     setUserAnswers({});
     setResults({});
@@ -1,6 +1,6 @@
 // src/services/api.ts
 import axios from "axios";
-import { Question, Answer, CheckResult, ExamRequest } from "../types";
+import { Question, Answer, CheckResult, ExamRequest, ExamResult, VocabEntry } from "../types";
 
 const API_URL = "http://localhost:8000";
 
@@ -14,9 +14,19 @@ export const checkAnswer = async (answer: Answer): Promise<CheckResult> => {
   return response.data;
 };
 
+export const checkExam = async (answers: Answer[]): Promise<ExamResult> => {
+  const response = await axios.post(`${API_URL}/check-exam`, { answers });
+  return response.data;
+};
+
 export const generateExam = async (
   examRequest: ExamRequest
 ): Promise<Question[]> => {
   const response = await axios.post(`${API_URL}/generate-exam`, examRequest);
   return response.data;
-};
\ No newline at end of file
+};
+
+export const getRandomVocab = async (count: number): Promise<VocabEntry[]> => {
+  const response = await axios.get(`${API_URL}/vocab/random`, { params: { count } });
+  return response.data;
+};
@@ -22,6 +22,27 @@ export interface CheckResult {
   correct_answer: string | string[];
 }
 
+export interface ExamResultDetail extends Omit<CheckResult, 'correct_answer'> {
+  question_id: string;
+  // null khi không tìm thấy câu hỏi
+  correct_answer: string | string[] | null;
+}
+
+export interface ExamResult {
+  total_questions: number;
+  correct_answers: number;
+  score: number;
+  details: ExamResultDetail[];
+}
+
+export interface VocabEntry {
+  english: string;
+  vietnamese: string[];
+  pos: string;
+  pronunciation?: string;
+  explanation?: string;
+}
+
 export interface ExamRequest {
   num_questions: number;
   question_types?: string[];